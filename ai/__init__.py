@@ -1,10 +1,12 @@
 """
 オセロAIモジュール
-既存のAI（GreedyAI、CornerAI、LookaheadAI）を提供
+既存のAI（GreedyAI、CornerAI、LookaheadAI、AlphaBetaAI、MCTSAI）を提供
 """
 
 from .greedy_ai import GreedyAI
 from .corner_ai import CornerAI
 from .lookahead_ai import LookaheadAI
+from .alphabeta_ai import AlphaBetaAI
+from .mcts_ai import MCTSAI
 
-__all__ = ['GreedyAI', 'CornerAI', 'LookaheadAI']
+__all__ = ['GreedyAI', 'CornerAI', 'LookaheadAI', 'AlphaBetaAI', 'MCTSAI']
@@ -0,0 +1,529 @@
+"""
+αβ探索AI (Alpha-Beta AI)
+αβ法（ネガマックス）で読める深さまで読んで最善手を選ぶAI
+
+1手読み → 2手読み → 3手読み … と深さを1つずつ増やして探索し（反復深化）、
+1手あたりの持ち時間を使い切ったら、最後に読み終えた深さの最善手を返す。
+前の深さで良かった手から先に調べるので、αβ法の枝刈りがよく効く。
+
+持ち時間は探索の1局面ごとに確かめ、超えたらその場で探索を打ち切るので、
+1手にかかる時間は持ち時間をほとんど超えない。
+
+読んだ局面の結果は置換表（engine.transposition）に覚えておき、手順違いで
+同じ局面になったときや、次の深さ・次の手の探索で使い回す。
+
+空きマスが少なくなったら、engine.endgame で最後まで読み切る。
+終盤の局面表（engine.tablebase、python -m engine.tablebase で作る）があれば、先にそれを引く。
+序盤は、定石（engine.book、python build_book.py で作る）にある局面なら読まずに引く。
+まず勝ち・引き分け・負けだけを読み（速い）、時間が残れば石数の差まで読む。
+持ち時間の半分で勝敗を読み切れなければ、残りの時間でふつうの探索をする。
+
+workers を2以上にすると、ルートの手を複数のプロセスで分けて読む（ルート並列）。
+前の深さの最善手はこのプロセスで読み、その値を α として残りの手をプロセスプールで
+同時に読む。プールは AlphaBetaAI ごとに1回だけ作り、手をまたいで使い回す
+（各プロセスは自分の置換表を持ち続ける）。
+"""
+
+import sys
+import os
+import time
+import threading
+from functools import lru_cache
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from ..engine.evaluation import EvaluatedState, WeightTable
+    from ..engine.transposition import TranspositionTable, EXACT, LOWER, UPPER, NO_MOVE
+    from ..engine import book, endgame, tablebase
+except ImportError:
+    from engine.evaluation import EvaluatedState, WeightTable
+    from engine.transposition import TranspositionTable, EXACT, LOWER, UPPER, NO_MOVE
+    from engine import book, endgame, tablebase
+
+# 1手あたりの持ち時間（秒）
+TIME_LIMIT = 0.05
+
+# 置換表の大きさ（MB）
+TT_SIZE_MB = 4
+
+# ルート並列にする深さ（これより浅いと、プロセスとのやりとりのほうが時間がかかる）
+PARALLEL_DEPTH = 3
+
+# 終局したときの評価値（位置評価スコアの差よりも必ず大きくする）
+WIN_SCORE = 1_000_000
+
+
+class SearchTimeout(Exception):
+    """持ち時間を使い切った"""
+
+
+def get_position_score(size):
+    """
+    位置評価スコア（2次元リスト）
+
+    角が最も高く、角の隣（C・X）は低く、辺は高め、
+    外から2周目は低め、それより内側はほぼ0点にする
+    """
+    last = size - 1
+    scores = []
+    for y in range(size):
+        row = []
+        for x in range(size):
+            ring = min(x, y, last - x, last - y)  # 外から何周目か（0始まり）
+            cx = min(x, last - x)  # 近いほうの端からの距離
+            cy = min(y, last - y)
+            if cx == 0 and cy == 0:
+                row.append(100)   # 角
+            elif cx <= 1 and cy <= 1:
+                row.append(-20)   # 角の隣（C・X）
+            elif ring == 0:
+                row.append(10 if max(cx, cy) == 2 else 5)   # 辺
+            elif ring == 1:
+                row.append(-5)    # 外から2周目
+            elif ring == 2:
+                row.append(3)
+            else:
+                row.append(1)
+        scores.append(row)
+    return scores
+
+
+@lru_cache(maxsize=None)
+def get_weight_table(size):
+    """盤面サイズごとの位置評価スコアの表（サイズごとに1回だけ作る）"""
+    return WeightTable(get_position_score(size), size)
+
+
+class Search:
+    """
+    1回の手選びの探索（反復深化つきのαβ法）
+
+    探索の状態は手選びごとに作るこのオブジェクトに持たせるので、
+    同じ AlphaBetaAI を別々のスレッドの対局で同時に使ってもよい
+    （置換表だけはスレッドごとに分ける）。
+    """
+
+    def __init__(self, state, time_limit, max_depth=None, tt=None, endgame_empties=None, endgame_table=None,
+                 opening_book=None, pool=None, fresh_table=False):
+        """
+        Args:
+            state: 探索する局面（EvaluatedState）
+            time_limit: 持ち時間（秒）
+            max_depth: 読む深さの上限（省略時は空きマスの数まで）
+            tt: 置換表（省略時はこの探索だけで使う置換表を作る）
+            endgame_empties: 読み切りに切り替える空きマスの数（省略時は engine.endgame.solve_empties）
+            endgame_table: 終盤の局面表（engine.tablebase.Tablebase。省略時は既定の場所にあれば使う）
+            opening_book: 定石（engine.book.OpeningBook。省略時は既定の場所にあれば使い、False なら使わない）
+            pool: ルート並列に使うプロセスプール（省略時は1プロセスで読む）
+            fresh_table: True なら置換表（ルート並列のプロセスのものも）を空にしてから読む。
+                max_depth を決めて時間を区切らなければ、同じ局面にはいつも同じ手を返す
+        """
+        self.deadline = time.perf_counter() + time_limit
+        self.state = state
+        self.max_depth = max_depth
+        if endgame_empties is None:
+            endgame_empties = endgame.solve_empties(state.n)
+        self.endgame_empties = endgame_empties
+        if endgame_table is None:
+            endgame_table = tablebase.default(state.n)
+        self.endgame_table = endgame_table
+        if opening_book is None:
+            opening_book = book.default(state.n)
+        self.opening_book = opening_book or None
+        self.pool = pool
+        self.fresh_table = fresh_table
+        self.nodes = 0
+        self.depth = 0  # 最後に読み終えた深さ
+        self.solved = None  # 読み切れたときの (読み方, 値)
+        self.score = None  # 最後に読み終えた深さでの最善手の評価値（定石から引いたときは定石の評価値）
+        if tt is None:
+            tt = TranspositionTable(TT_SIZE_MB)
+        elif fresh_table:
+            tt.clear()
+        tt.new_search()
+        self.tt = tt
+
+    def run(self):
+        """
+        深さを1つずつ増やして読み、最後に読み終えた深さの最善手を返す
+
+        Returns:
+            (最善手のビット番号, ひっくり返る石のマスク)。打てなければ None
+        """
+        state = self.state
+        moves = state.generate_moves()
+        if not moves:
+            return None
+        # 最初は打った直後の位置評価スコアの高い順に並べる
+        scores = {}
+        for sq, flipped in moves:
+            state.make(sq, flipped)
+            scores[sq] = -state.weighted
+            state.unmake()
+        moves.sort(key=lambda move: -scores[move[0]])
+        best = moves[0]
+        if len(moves) == 1:
+            return best
+
+        opening_book = self.opening_book
+        if opening_book is not None and opening_book.n == state.n:
+            found = opening_book.probe(state.p, state.o)
+            if found is not None:
+                for move in moves:
+                    if move[0] == found[1]:
+                        self.score = found[0]
+                        return move
+
+        limit = state.empties()
+        table = self.endgame_table
+        if table is not None and table.n == state.n and limit <= table.max_empties:
+            found = table.best_move(state.p, state.o)
+            if found is not None:
+                self.solved = (endgame.EXACT, found[0])
+                for move in moves:
+                    if move[0] == found[1]:
+                        return move
+        if limit <= self.endgame_empties:
+            move = self.solve(moves)
+            if move is not None:
+                return move
+        if self.max_depth is not None:
+            limit = min(limit, self.max_depth)
+        for depth in range(1, limit + 1):
+            try:
+                scores = self.root(moves, depth)
+            except SearchTimeout:
+                break
+            # 次の深さは、この深さで良かった手から調べる
+            moves.sort(key=lambda move: -scores[move[0]])
+            best = moves[0]
+            self.depth = depth
+            self.score = scores[best[0]]
+            if abs(scores[best[0]]) >= WIN_SCORE:
+                break  # 勝敗まで読み切った
+        return best
+
+    def solve(self, moves):
+        """
+        最後まで読み切った最善手（持ち時間の半分で勝敗を読み切れなければ None）
+        """
+        state = self.state
+        now = time.perf_counter()
+        try:
+            value, sq = endgame.best_move(state.p, state.o, state.n, endgame.WLD,
+                                          now + (self.deadline - now) / 2)
+        except endgame.SolveTimeout:
+            return None
+        self.solved = (endgame.WLD, value)
+        try:
+            # 時間が残っていれば石数の差まで読む（読めなければ勝敗を読んだ手のまま）
+            value, sq = endgame.best_move(state.p, state.o, state.n, endgame.EXACT, self.deadline)
+            self.solved = (endgame.EXACT, value)
+        except endgame.SolveTimeout:
+            pass
+        for move in moves:
+            if move[0] == sq:
+                return move
+        return None
+
+    def root(self, moves, depth):
+        """ルートの各手の評価値 {sq: 評価値}（最善手以外は上限の値のこともある）"""
+        if self.pool is not None and depth >= PARALLEL_DEPTH:
+            return self.parallel_root(moves, depth)
+        state = self.state
+        alpha, beta = -WIN_SCORE * 2, WIN_SCORE * 2
+        scores = {}
+        for sq, flipped in moves:
+            state.make(sq, flipped)
+            try:
+                score = -self.negamax(depth - 1, -beta, -alpha, False)
+            finally:
+                state.unmake()
+            scores[sq] = score
+            if score > alpha:
+                alpha = score
+        return scores
+
+    def parallel_root(self, moves, depth):
+        """
+        root と同じ値を、最初の手はこのプロセスで、残りの手はプロセスプールで読んで求める
+        """
+        state = self.state
+        beta = WIN_SCORE * 2
+        sq, flipped = moves[0]
+        state.make(sq, flipped)
+        try:
+            alpha = -self.negamax(depth - 1, -beta, beta, False)
+        finally:
+            state.unmake()
+        scores = {sq: alpha}
+
+        # 持ち時間の期限はプロセスをまたいでも比べられる時刻（time.time）で渡す
+        deadline = time.time() + (self.deadline - time.perf_counter())
+        futures = [(sq, self.pool.submit(search_root_move, state.black, state.white, state.stone,
+                                         state.n, sq, depth, alpha, deadline, self.fresh_table))
+                   for sq, _ in moves[1:]]
+        try:
+            for sq, future in futures:
+                score, nodes = future.result()
+                self.nodes += nodes
+                if score is None:
+                    raise SearchTimeout()
+                scores[sq] = score
+        finally:
+            for _, future in futures:
+                future.cancel()  # 持ち時間切れなら、まだ始まっていない手は読まない
+        return scores
+
+    def negamax(self, depth, alpha, beta, passed):
+        """手番側から見た評価値"""
+        self.nodes += 1
+        if time.perf_counter() >= self.deadline:
+            raise SearchTimeout()
+        state = self.state
+        if depth <= 0:
+            return state.weighted
+
+        moves = state.generate_moves()
+        if not moves:
+            if passed:
+                # 終局: 石数の差で勝ち負けを決める
+                material = state.material
+                return (WIN_SCORE if material > 0 else -WIN_SCORE if material < 0 else 0) + material
+            state.make_pass()
+            try:
+                return -self.negamax(depth - 1, -beta, -alpha, True)
+            finally:
+                state.unmake()
+
+        # 置換表に十分深く読んだ結果があればそれを使い、
+        # なければ覚えている最善手（前の深さや前の手の探索での最善手）を最初に調べる
+        key = state.key
+        entry = self.tt.probe(key)
+        if entry is not None:
+            tt_depth, bound, tt_score, hint = entry
+            if tt_depth >= depth:
+                if bound == EXACT:
+                    return tt_score
+                if bound == LOWER and tt_score >= beta:
+                    return tt_score
+                if bound == UPPER and tt_score <= alpha:
+                    return tt_score
+            if hint != NO_MOVE:
+                for i, (sq, _) in enumerate(moves):
+                    if sq == hint:
+                        moves[0], moves[i] = moves[i], moves[0]
+                        break
+
+        original_alpha = alpha
+        best_score = -WIN_SCORE * 2
+        best_sq = moves[0][0]
+        for sq, flipped in moves:
+            state.make(sq, flipped)
+            try:
+                score = -self.negamax(depth - 1, -beta, -alpha, False)
+            finally:
+                state.unmake()
+            if score > best_score:
+                best_score, best_sq = score, sq
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+        if best_score <= original_alpha:
+            bound = UPPER
+        elif best_score >= beta:
+            bound = LOWER
+        else:
+            bound = EXACT
+        self.tt.store(key, depth, bound, best_score, best_sq)
+        return best_score
+
+
+# ルート並列のプロセスごとの置換表（プロセスの中で手をまたいで使い回す）
+_worker_tt = None
+
+
+def _init_worker(tt_size_mb):
+    global _worker_tt
+    _worker_tt = TranspositionTable(tt_size_mb)
+
+
+def _ready():
+    """プロセスが起動したことを確かめるだけ（何もしない）"""
+
+
+def search_root_move(black, white, stone, n, sq, depth, alpha, deadline, fresh_table=False):
+    """
+    ルート並列のプロセスで、ルートの1手を読む
+
+    Args:
+        black, white, stone, n: ルートの局面
+        sq: 読む手のビット番号
+        depth: ルートからの深さ
+        alpha: ほかの手で分かっている下限（これ以下なら上限の値を返す）
+        deadline: 持ち時間の期限（time.time の時刻）
+        fresh_table: True ならこのプロセスの置換表を空にしてから読む
+            （どのプロセスがどの手を読んでも同じ値になる）
+
+    Returns:
+        (評価値, 読んだ局面の数)。持ち時間を使い切ったら評価値は None
+    """
+    global _worker_tt
+    if _worker_tt is None:
+        _worker_tt = TranspositionTable(TT_SIZE_MB)
+    elif fresh_table:
+        _worker_tt.clear()
+    state = EvaluatedState(black, white, stone, n, get_weight_table(n))
+    search = Search(state, deadline - time.time(), tt=_worker_tt, opening_book=False)
+    beta = WIN_SCORE * 2
+    state.make(sq)
+    try:
+        return -search.negamax(depth - 1, -beta, -alpha, False), search.nodes
+    except SearchTimeout:
+        return None, search.nodes
+
+
+def create_pool(workers, tt_size_mb=TT_SIZE_MB):
+    """
+    ルート並列のプロセスプールを作り、すべてのプロセスを起動しておく
+
+    スレッドを使っている親プロセスから fork しないように、spawn でプロセスを作る。
+    （multiprocessing は、ルート並列を使わない対局では読み込まない）
+
+    Args:
+        workers: プロセスの数
+        tt_size_mb: プロセスごとの置換表の大きさ（MB）
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn'),
+                               initializer=_init_worker, initargs=(tt_size_mb,))
+    for future in [pool.submit(_ready) for _ in range(workers)]:
+        future.result()
+    return pool
+
+
+def alphabeta_place(board, stone, time_limit=TIME_LIMIT, max_depth=None, tt=None, endgame_empties=None,
+                    endgame_table=None, opening_book=None, pool=None, fresh_table=False):
+    """
+    αβ法で手を選ぶ
+
+    Args:
+        board: 盤面
+        stone: 自分の石の色
+        time_limit: 1手あたりの持ち時間（秒）
+        max_depth: 読む深さの上限（省略時は持ち時間の限り）
+        tt: 置換表（手をまたいで使い回すときに渡す）
+        endgame_empties: 読み切りに切り替える空きマスの数（省略時は engine.endgame.solve_empties）
+        endgame_table: 終盤の局面表（省略時は既定の場所にあれば使う）
+        opening_book: 定石（省略時は既定の場所にあれば使う）
+        pool: ルート並列に使うプロセスプール（省略時は1プロセスで読む）
+        fresh_table: True なら置換表を空にしてから読む（Search を参照）
+
+    Returns:
+        (x, y): 選択した手（打てなければ None）
+    """
+    state = EvaluatedState.from_board(board, stone, get_weight_table(len(board)))
+    move = Search(state, time_limit, max_depth, tt, endgame_empties, endgame_table, opening_book,
+                  pool, fresh_table).run()
+    if move is None:
+        return None
+    return state.coords(move[0])
+
+
+class AlphaBetaAI:
+    """αβ探索AIクラス"""
+
+    def __init__(self, time_limit=TIME_LIMIT, max_depth=None, tt_size_mb=TT_SIZE_MB, endgame_empties=None,
+                 endgame_table=None, opening_book=None, workers=1, fresh_table=False):
+        """
+        Args:
+            time_limit: 1手あたりの持ち時間（秒）
+            max_depth: 読む深さの上限（省略時は持ち時間の限り）
+            tt_size_mb: 置換表の大きさ（MB、スレッドごと）
+            endgame_empties: 読み切りに切り替える空きマスの数（省略時は engine.endgame.solve_empties、0 で読み切らない）
+            endgame_table: 終盤の局面表（省略時は既定の場所にあれば使う）
+            opening_book: 定石（省略時は既定の場所にあれば使う）
+            workers: ルート並列のプロセスの数（1 なら並列にしない）。
+                プロセスは作ったときではなく最初の手（または pool() を呼んだとき）に
+                spawn で起動するので、そこはスクリプトの if __name__ == "__main__": の中で行う
+            fresh_table: True なら手ごとに置換表を空にして読む。time_limit を float('inf') にして
+                max_depth を決めれば、同じ局面にはいつも同じ手を返す（スレッドの数や
+                マシンの速さによらない。トーナメントの採点に使う）
+        """
+        self.time_limit = time_limit
+        self.max_depth = max_depth
+        self.tt_size_mb = tt_size_mb
+        self.endgame_empties = endgame_empties
+        self.endgame_table = endgame_table
+        self.opening_book = opening_book
+        self.workers = workers
+        self.fresh_table = fresh_table
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._local = threading.local()  # スレッドごとの置換表（手をまたいで使い回す）
+        self.table()  # 最初の手の持ち時間に確保の時間が入らないように、先に作っておく
+
+    def table(self):
+        """このスレッドで使う置換表"""
+        tt = getattr(self._local, 'tt', None)
+        if tt is None:
+            tt = self._local.tt = TranspositionTable(self.tt_size_mb)
+        return tt
+
+    def pool(self):
+        """
+        ルート並列のプロセスプール（workers が 1 なら None）
+
+        最初に呼んだときに作り、手をまたいで使い回す。place は探索の時計を始める前に
+        これを呼ぶので、プロセスの起動の時間は最初の手の持ち時間に入らない。
+        """
+        if self.workers <= 1:
+            return None
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = create_pool(self.workers, self.tt_size_mb)
+            return self._pool
+
+    def close(self):
+        """ルート並列のプロセスプールを止める"""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(cancel_futures=True)
+                self._pool = None
+
+    def name(self):
+        return "αβ探索AI"
+
+    def face(self):
+        return "🧠"  # 脳（深く考える）
+
+    def place(self, board, stone):
+        return alphabeta_place(board, stone, self.time_limit, self.max_depth, self.table(),
+                               self.endgame_empties, self.endgame_table, self.opening_book,
+                               self.pool(), self.fresh_table)
+
+# デバッグ用
+if __name__ == "__main__":
+    # テスト用の盤面
+    test_board = [
+        [0,0,0,0,0,0],
+        [0,0,0,0,0,0],
+        [0,0,1,2,0,0],
+        [0,0,2,1,0,0],
+        [0,0,0,0,0,0],
+        [0,0,0,0,0,0],
+    ]
+
+    ai = AlphaBetaAI()
+    print(f"αβ探索AI: {ai.face()}")
+
+    # 黒(1)の手を選択
+    state = EvaluatedState.from_board(test_board, 1, get_weight_table(6))
+    search = Search(state, TIME_LIMIT)
+    sq, _ = search.run()
+    print(f"選択した手: {state.coords(sq)}（深さ {search.depth}、{search.nodes} 局面）")
+    stats = search.tt.stats()
+    print(f"置換表: hit {stats['hit_rate']:.1%}, 衝突 {stats['collision_rate']:.1%}, 上書き {stats['overwrite_rate']:.1%}")
@@ -4,6 +4,7 @@
 
 オセロでは角は一度取ると絶対にひっくり返されない最強の位置。
 角が取れる場合は必ず角を取り、取れない場合は他の手を選ぶ。
+空きマスが少なくなったら、最後まで読み切って打つ（engine.endgame）。
 """
 
 import sys
@@ -11,9 +12,13 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 try:
-    from ..othello import can_place_x_y
+    from ..othello import valid_moves
+    from ..engine import endgame
+    from ..engine.state import GameState
 except ImportError:
-    from othello import can_place_x_y
+    from othello import valid_moves
+    from engine import endgame
+    from engine.state import GameState
 import random
 
 def get_corners(board):
@@ -49,45 +54,54 @@ def get_valid_moves(board, stone):
     Returns:
         合法手のリスト [(x, y), ...]
     """
-    valid_moves = []
-    for y in range(len(board)):
-        for x in range(len(board[0])):
-            if can_place_x_y(board, stone, x, y):
-                valid_moves.append((x, y))
-    return valid_moves
-
-def corner_place(board, stone):
+    return valid_moves(board, stone)
+
+def corner_place(board, stone, endgame_empties=None):
     """
     角優先で手を選ぶ
 
-    1. 角が取れるなら角を取る
-    2. 角が取れないなら、ランダムに手を選ぶ
+    1. 空きマスが少なければ、最後まで読み切った最善手を打つ
+    2. 角が取れるなら角を取る
+    3. 角が取れないなら、ランダムに手を選ぶ
 
     Args:
         board: 盤面
         stone: 石の色
+        endgame_empties: 読み切りに切り替える空きマスの数（省略時は engine.endgame.solve_empties、0 で読み切らない）
 
     Returns:
         (x, y): 選択した手
     """
-    corners = get_corners(board)
+    state = GameState.from_board(board, stone)
+
+    sq = endgame.solve_move(state.p, state.o, state.n, endgame_empties)
+    if sq is not None:
+        return state.coords(sq)
+    valid_moves = [sq for sq, _ in state.generate_moves()]
 
-    # 角が取れるかチェック
-    for x, y in corners:
-        if can_place_x_y(board, stone, x, y):
-            return (x, y)
+    # 角が取れるかチェック（合法手は左上→右上→左下→右下の順に並んでいる）
+    corners = {state.square(x, y) for x, y in get_corners(board)}
+    for sq in valid_moves:
+        if sq in corners:
+            return state.coords(sq)
 
     # 角が取れない場合は、合法手からランダムに選ぶ
-    valid_moves = get_valid_moves(board, stone)
 
     if valid_moves:
-        return random.choice(valid_moves)
+        return state.coords(random.choice(valid_moves))
 
     return None
 
 class CornerAI:
     """角優先AIクラス"""
 
+    def __init__(self, endgame_empties=None):
+        """
+        Args:
+            endgame_empties: 読み切りに切り替える空きマスの数（省略時は engine.endgame.solve_empties、0 で読み切らない）
+        """
+        self.endgame_empties = endgame_empties
+
     def name(self):
         return "角優先AI"
 
@@ -95,7 +109,7 @@ class CornerAI:
         return "📐"  # 角度記号（角のイメージ）
 
     def place(self, board, stone):
-        return corner_place(board, stone)
+        return corner_place(board, stone, self.endgame_empties)
 
 # デバッグ用
 if __name__ == "__main__":
@@ -4,6 +4,7 @@
 
 オセロでは序盤に多く取りすぎると後で不利になることが多いため、
 このAIは強くありません。
+空きマスが少なくなったら、最後まで読み切って打ちます（engine.endgame）。
 """
 
 import sys
@@ -12,9 +13,13 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 try:
-    from ..othello import can_place_x_y
+    from ..othello import flips_x_y
+    from ..engine import bitboard, endgame
+    from ..engine.state import GameState
 except ImportError:
-    from othello import can_place_x_y
+    from othello import flips_x_y
+    from engine import bitboard, endgame
+    from engine.state import GameState
 
 def count_flips(board, stone, x, y):
     """
@@ -26,59 +31,50 @@ def count_flips(board, stone, x, y):
         x, y: 石を置く位置
 
     Returns:
-        ひっくり返る石の数
+        ひっくり返る石の数（置けない場合は 0）
     """
-    if not can_place_x_y(board, stone, x, y):
-        return 0
+    return len(flips_x_y(board, stone, x, y))
 
-    opponent = 3 - stone
-    directions = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
-    flip_count = 0
-
-    for dx, dy in directions:
-        nx, ny = x + dx, y + dy
-        temp_count = 0
-
-        # 相手の石が続く限りカウント
-        while 0 <= nx < len(board[0]) and 0 <= ny < len(board) and board[ny][nx] == opponent:
-            temp_count += 1
-            nx += dx
-            ny += dy
-
-        # 自分の石で挟めた場合のみカウントに加える
-        if temp_count > 0 and 0 <= nx < len(board[0]) and 0 <= ny < len(board) and board[ny][nx] == stone:
-            flip_count += temp_count
-
-    return flip_count
-
-def greedy_place(board, stone):
+def greedy_place(board, stone, endgame_empties=None):
     """
     最も多くの石をひっくり返せる手を選ぶ
 
     Args:
         board: 盤面
         stone: 石の色 (1: 黒, 2: 白)
+        endgame_empties: 読み切りに切り替える空きマスの数（省略時は engine.endgame.solve_empties、0 で読み切らない）
 
     Returns:
         (x, y): 選択した手の座標
     """
+    state = GameState.from_board(board, stone)
+
+    # 空きマスが少なければ最後まで読み切った最善手を打つ
+    sq = endgame.solve_move(state.p, state.o, state.n, endgame_empties)
+    if sq is not None:
+        return state.coords(sq)
     best_move = None
     max_flips = -1
 
-    # 全ての位置を調べる
-    for y in range(len(board)):
-        for x in range(len(board[0])):
-            if can_place_x_y(board, stone, x, y):
-                flips = count_flips(board, stone, x, y)
-                if flips > max_flips:
-                    max_flips = flips
-                    best_move = (x, y)
+    # 全ての合法手を、ひっくり返る石と一緒に調べる
+    for sq, flipped in state.generate_moves():
+        flips = bitboard.count(flipped)
+        if flips > max_flips:
+            max_flips = flips
+            best_move = state.coords(sq)
 
     return best_move
 
 class GreedyAI:
     """貪欲AIクラス"""
 
+    def __init__(self, endgame_empties=None):
+        """
+        Args:
+            endgame_empties: 読み切りに切り替える空きマスの数（省略時は engine.endgame.solve_empties、0 で読み切らない）
+        """
+        self.endgame_empties = endgame_empties
+
     def name(self):
         return "貪欲AI"
 
@@ -86,7 +82,7 @@ class GreedyAI:
         return "🤑"  # お金の顔（貪欲なイメージ）
 
     def place(self, board, stone):
-        return greedy_place(board, stone)
+        return greedy_place(board, stone, self.endgame_empties)
 
 # デバッグ用
 if __name__ == "__main__":
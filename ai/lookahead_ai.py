@@ -3,6 +3,7 @@
 2手先を読んで最善手を選ぶAI
 
 自分の手 → 相手の最善手 を予測して、最終的に自分に有利な手を選ぶ
+空きマスが少なくなったら、最後まで読み切って打つ（engine.endgame）
 """
 
 import sys
@@ -10,9 +11,13 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 try:
-    from ..othello import can_place_x_y, move_stone, copy
+    from ..othello import valid_moves
+    from ..engine import endgame
+    from ..engine.evaluation import EvaluatedState
 except ImportError:
-    from othello import can_place_x_y, move_stone, copy
+    from othello import valid_moves
+    from engine import endgame
+    from engine.evaluation import EvaluatedState
 
 def count_stones(board, stone):
     """
@@ -41,12 +46,7 @@ def get_valid_moves(board, stone):
     Returns:
         合法手のリスト [(x, y), ...]
     """
-    valid_moves = []
-    for y in range(len(board)):
-        for x in range(len(board[0])):
-            if can_place_x_y(board, stone, x, y):
-                valid_moves.append((x, y))
-    return valid_moves
+    return valid_moves(board, stone)
 
 def evaluate_board(board, my_stone):
     """
@@ -64,7 +64,7 @@ def evaluate_board(board, my_stone):
     opp_count = count_stones(board, opponent)
     return my_count - opp_count
 
-def lookahead_2(board, stone):
+def lookahead_2(board, stone, endgame_empties=None):
     """
     2手先を読んで最善手を選ぶ
 
@@ -73,45 +73,53 @@ def lookahead_2(board, stone):
     3. 相手が最善手を打った後の盤面を評価
     4. 自分にとって最も有利な手を選ぶ
 
+    空きマスが少なければ、2手先ではなく最後まで読み切った最善手を打つ。
+
     Args:
         board: 盤面
         stone: 自分の石の色
+        endgame_empties: 読み切りに切り替える空きマスの数（省略時は engine.endgame.solve_empties、0 で読み切らない）
 
     Returns:
         (x, y): 選択した手
     """
-    my_moves = get_valid_moves(board, stone)
+    # 盤面は局面オブジェクトに変換し、手を試すたびに make/unmake する（コピーしない）
+    # 石数の差も make/unmake のたびに差分で更新されるので、数え直さない
+    state = EvaluatedState.from_board(board, stone)
+
+    sq = endgame.solve_move(state.p, state.o, state.n, endgame_empties)
+    if sq is not None:
+        return state.coords(sq)
+
+    # 合法手はひっくり返る石と一緒に求め、make で求め直さない
+    my_moves = state.generate_moves()
 
     if not my_moves:
         return None
 
-    opponent = 3 - stone
     best_move = None
     best_score = float('-inf')
 
     # 自分の各手を試す
-    for my_x, my_y in my_moves:
-        # 自分の手を打った後の盤面をシミュレート
-        temp_board = copy(board)
-        move_stone(temp_board, stone, my_x, my_y)
+    for my_sq, my_flipped in my_moves:
+        # 自分の手を打つ
+        state.make(my_sq, my_flipped)
 
         # 相手の合法手を取得
-        opponent_moves = get_valid_moves(temp_board, opponent)
+        opponent_moves = state.generate_moves()
 
         if not opponent_moves:
             # 相手が打てない場合、この盤面の評価値をそのまま使う
-            score = evaluate_board(temp_board, stone)
+            score = state.disc_difference(stone)
         else:
             # 相手の最善手を予測（相手にとって最も有利 = 自分にとって最悪）
             worst_score = float('inf')
 
-            for opp_x, opp_y in opponent_moves:
-                # 相手の手を打った後の盤面をシミュレート
-                temp_board2 = copy(temp_board)
-                move_stone(temp_board2, opponent, opp_x, opp_y)
-
-                # この盤面を評価
-                score = evaluate_board(temp_board2, stone)
+            for opp_sq, opp_flipped in opponent_moves:
+                # 相手の手を打って評価し、元に戻す（自分の石数 - 相手の石数）
+                state.make(opp_sq, opp_flipped)
+                score = state.disc_difference(stone)
+                state.unmake()
 
                 # 相手にとって最善（自分にとって最悪）
                 if score < worst_score:
@@ -119,16 +127,25 @@ def lookahead_2(board, stone):
 
             score = worst_score
 
+        state.unmake()
+
         # 自分にとって最善の手を選ぶ
         if score > best_score:
             best_score = score
-            best_move = (my_x, my_y)
+            best_move = state.coords(my_sq)
 
     return best_move
 
 class LookaheadAI:
     """2手先読みAIクラス"""
 
+    def __init__(self, endgame_empties=None):
+        """
+        Args:
+            endgame_empties: 読み切りに切り替える空きマスの数（省略時は engine.endgame.solve_empties、0 で読み切らない）
+        """
+        self.endgame_empties = endgame_empties
+
     def name(self):
         return "先読みAI"
 
@@ -136,7 +153,7 @@ class LookaheadAI:
         return "🔮"  # 水晶玉（未来を見る）
 
     def place(self, board, stone):
-        return lookahead_2(board, stone)
+        return lookahead_2(board, stone, self.endgame_empties)
 
 # デバッグ用
 if __name__ == "__main__":
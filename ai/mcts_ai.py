@@ -0,0 +1,399 @@
+"""
+モンテカルロ木探索AI (MCTS AI)
+ランダムに終局まで打つ対局（プレイアウト）をたくさん行い、勝率の高い手を選ぶAI
+
+評価関数を使わないので、位置評価スコアの調整に頼らず、
+持ち時間（プレイアウトの数）を増やすほど強くなる。
+
+探索木の選び方は UCT（勝率 + 調べた回数の少ない手へのボーナス）。
+プレイアウトは1局ずつではなく、まとめて（最大 BATCH_SIZE 局ずつ）行う:
+  1. 探索木をたどって葉をいくつか選ぶ（選んだ道は仮に負けとして数え、
+     同じ葉ばかり選ばないようにする）。いくつ選ぶかは、前のまとまりにかかった時間と
+     残りの持ち時間から決める（持ち時間を超えないように）
+  2. 選んだ葉の局面から、まとめてランダムに終局まで打つ
+     （numpy があり盤面が 8x8 以下なら engine.batch で全局面を一緒に1手ずつ進める。
+     なければビットボードで1局ずつ行い、まとめずに1局ごとに結果を伝える。
+     numpy は重いので、最初に手を選ぶときに読み込む）
+  3. 結果を葉から根へ伝える
+1手ごとに、行ったプレイアウトの数と1秒あたりのプレイアウト数を記録する。
+"""
+
+import sys
+import os
+import math
+import random
+import threading
+import time
+from functools import lru_cache
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from ..engine import bitboard
+    from ..engine.state import PASS
+except ImportError:
+    from engine import bitboard
+    from engine.state import PASS
+
+# 1手あたりの持ち時間（秒）
+TIME_LIMIT = 0.05
+
+# まとめて行うプレイアウトの数（の上限）
+BATCH_SIZE = 128
+
+# 1局あたりの時間がまだわからないときに、最初にまとめて行うプレイアウトの数
+FIRST_BATCH_SIZE = 8
+
+# UCT の探索の強さ（大きいほど調べた回数の少ない手を試す）
+EXPLORATION = 1.4
+
+
+@lru_cache(maxsize=None)
+def load_batch():
+    """
+    engine.batch を読み込む（numpy がなければ None）
+
+    numpy の読み込みには時間がかかるので、MCTS を使わない対局では読み込まない
+    """
+    try:
+        try:
+            from ..engine import batch
+        except ImportError:
+            from engine import batch
+    except ImportError:
+        return None  # numpy がなければ、プレイアウトはビットボードで1局ずつ行う
+    return batch
+
+
+# 盤面サイズ → 最後にまとめて行ったプレイアウトの (空きマス1つあたりの時間, 数)
+# （手選びをまたいで使う目安。まとめて打つ時間は終局までの手数、つまり空きマスの数にほぼ比例する）
+_batch_seconds = {}
+
+
+class Node:
+    """探索木の節（局面）"""
+
+    __slots__ = ('p', 'o', 'move', 'parent', 'children', 'untried', 'visits', 'wins')
+
+    def __init__(self, p, o, n, rng, move=None, parent=None):
+        """
+        Args:
+            p, o: 手番側と相手の石
+            n: 盤面の一辺のマス数
+            rng: まだ調べていない手の順番を決める random.Random
+            move: 親からこの局面に進んだ手（ビット番号、パスは PASS）
+            parent: 親の節
+        """
+        self.p = p
+        self.o = o
+        self.move = move
+        self.parent = parent
+        self.children = []
+        untried = bitboard.generate_moves(p, o, n)
+        if untried:
+            rng.shuffle(untried)
+        elif bitboard.legal_moves(o, p, n):
+            untried = [(PASS, 0)]
+        self.untried = untried  # まだ子を作っていない (手, ひっくり返る石)。終局なら空
+        self.visits = 0
+        self.wins = 0.0  # この局面に進んだ側（親の手番側）から見た勝ち数（引き分けは 0.5）
+
+
+def random_playout(p, o, n, rng):
+    """
+    ビットボードで1局だけ、両者ともランダムに終局まで打つ
+
+    Returns:
+        終局の石数の差（最初の手番側から見た値）
+    """
+    sign = 1
+    passed = False
+    while True:
+        moves = bitboard.legal_moves(p, o, n)
+        if not moves:
+            if passed:
+                break
+            passed = True
+        else:
+            passed = False
+            for _ in range(rng.randrange(bitboard.count(moves))):
+                moves &= moves - 1
+            sq = (moves & -moves).bit_length() - 1
+            flipped = bitboard.flips(p, o, sq, n)
+            p, o = p | flipped | (1 << sq), o & ~flipped
+        p, o = o, p
+        sign = -sign
+    return sign * (bitboard.count(p) - bitboard.count(o))
+
+
+class Search:
+    """
+    1回の手選びの探索（UCT）
+
+    探索の状態は手選びごとに作るこのオブジェクトに持たせるので、
+    同じ MCTSAI を別々のスレッドの対局で同時に使ってもよい。
+    """
+
+    def __init__(self, p, o, n, time_limit=TIME_LIMIT, playouts=None, batch_size=BATCH_SIZE,
+                 exploration=EXPLORATION, rng=None):
+        """
+        Args:
+            p, o: 手番側と相手の石
+            n: 盤面の一辺のマス数
+            time_limit: 持ち時間（秒、None なら時間は区切らない）
+            playouts: プレイアウトの数の上限（省略時は持ち時間の限り）
+            batch_size: まとめて行うプレイアウトの数
+            exploration: UCT の探索の強さ
+            rng: random.Random（省略時は新しく作る）
+        """
+        if time_limit is None and playouts is None:
+            raise ValueError("time_limit か playouts のどちらかを指定してください")
+        if playouts is not None and playouts < 1:
+            raise ValueError(f"playouts は1以上にしてください: {playouts}")
+        self.batch = load_batch() if n <= 8 else None
+        self.start = time.perf_counter()
+        self.deadline = math.inf if time_limit is None else self.start + time_limit
+        self.n = n
+        self.limit = math.inf if playouts is None else playouts
+        self.exploration = exploration
+        self.rng = rng if rng is not None else random.Random()
+        self.vectorized = self.batch is not None
+        # 1局ずつ打つなら、まとめても速くならないので、1局ごとに持ち時間を確かめる
+        self.batch_size = batch_size if self.vectorized else 1
+        if self.vectorized:
+            import numpy as np
+            self.np_rng = np.random.default_rng(self.rng.getrandbits(64))
+        self.root = Node(p, o, n, self.rng)
+        self.playouts = 0
+        self.elapsed = 0.0
+
+    def playouts_per_second(self):
+        return self.playouts / self.elapsed if self.elapsed else 0.0
+
+    def run(self):
+        """
+        持ち時間（プレイアウトの数）の限りプレイアウトを行い、いちばん多く調べた手を返す
+
+        Returns:
+            最善手のビット番号（打てなければ None）
+        """
+        root = self.root
+        moves = [sq for sq, _ in root.untried if sq != PASS]
+        if len(moves) <= 1:
+            self.elapsed = time.perf_counter() - self.start
+            return moves[0] if moves else None
+
+        # まとめて打つ時間はいちばん長い対局でほぼ決まり、数にはあまりよらない。
+        # 前のまとまり（前の手選びのものなら空きマスの数に比例させる）と同じだけはかかり、
+        # 数を増やせばその平方根に比例して長くなると見て（実際はもっとゆるやか）、
+        # 残りの持ち時間に収まる数だけまとめる。まだ測っていなければ FIRST_BATCH_SIZE で測る。
+        # まとめて打つと収まらなければ、ビットボードで1局ずつ行い、1局ごとに持ち時間を確かめる
+        empties = max(1, self.n * self.n - bitboard.count(root.p | root.o))
+        estimate = _batch_seconds.get(self.n) if self.vectorized else None
+        if estimate is not None:
+            estimate = (estimate[0] * empties, estimate[1])
+        last = 0.0  # 1局ずつ打ったときの、最後の1局の時間
+        while self.playouts < self.limit:
+            started = time.perf_counter()
+            remaining = self.deadline - started
+            vectorized = False
+            if self.vectorized:
+                if estimate is None:
+                    count, vectorized = min(self.batch_size, FIRST_BATCH_SIZE), True
+                elif estimate[0] <= remaining:
+                    seconds, size = estimate
+                    count = min(self.batch_size, size * (remaining / seconds) ** 2 if seconds else self.batch_size)
+                    vectorized = True
+            if not vectorized:
+                if self.playouts and remaining < last:
+                    break
+                count = 1
+            count = int(min(count, self.limit - self.playouts))
+            leaves = [self.select() for _ in range(count)]
+            for leaf, diff in zip(leaves, self.simulate(leaves, vectorized)):
+                self.backpropagate(leaf, diff)
+            self.playouts += count
+            if vectorized:
+                estimate = (time.perf_counter() - started, count)
+                _batch_seconds[self.n] = (estimate[0] / empties, count)
+            else:
+                last = time.perf_counter() - started
+        self.elapsed = time.perf_counter() - self.start
+
+        best = max(root.children, key=lambda child: child.visits)
+        return best.move
+
+    def select(self):
+        """
+        UCT で探索木をたどり、まだ調べていない手があればその子を作って返す
+
+        たどった節の visits は先に増やしておく（結果が出るまでは負けとして数える）
+        """
+        n, rng, c = self.n, self.rng, self.exploration
+        node = self.root
+        node.visits += 1
+        while not node.untried and node.children:
+            log_visits = math.log(node.visits)
+            best, best_score = None, -1.0
+            for child in node.children:
+                score = child.wins / child.visits + c * math.sqrt(log_visits / child.visits)
+                if score > best_score:
+                    best, best_score = child, score
+            node = best
+            node.visits += 1
+        if node.untried:
+            sq, flipped = node.untried.pop()
+            p, o = node.p, node.o
+            if sq == PASS:
+                child = Node(o, p, n, rng, PASS, node)
+            else:
+                child = Node(o & ~flipped, p | flipped | (1 << sq), n, rng, sq, node)
+            node.children.append(child)
+            child.visits = 1
+            node = child
+        return node
+
+    def simulate(self, leaves, vectorized=True):
+        """
+        葉の局面からまとめてプレイアウトを行う
+
+        Args:
+            leaves: 葉の節のリスト
+            vectorized: False なら numpy を使えるときもビットボードで1局ずつ行う
+
+        Returns:
+            それぞれの葉の手番側から見た、終局の石数の差のリスト
+        """
+        n = self.n
+        results = [None] * len(leaves)
+        pending = []
+        for i, leaf in enumerate(leaves):
+            if leaf.untried or leaf.children:
+                pending.append(i)
+            else:
+                results[i] = bitboard.count(leaf.p) - bitboard.count(leaf.o)  # 終局
+        if not pending:
+            return results
+        if self.vectorized and vectorized:
+            p = [leaves[i].p for i in pending]
+            o = [leaves[i].o for i in pending]
+            for i, diff in zip(pending, self.batch.random_playouts_packed(p, o, n, self.np_rng).tolist()):
+                results[i] = diff
+        else:
+            for i in pending:
+                results[i] = random_playout(leaves[i].p, leaves[i].o, n, self.rng)
+        return results
+
+    def backpropagate(self, leaf, diff):
+        """プレイアウトの結果（葉の手番側から見た石数の差）を根まで伝える"""
+        # 葉に進んだ側（葉の手番の相手）から見た勝ち数
+        reward = 0.0 if diff > 0 else 1.0 if diff < 0 else 0.5
+        node = leaf
+        while node is not None:
+            node.wins += reward
+            reward = 1.0 - reward
+            node = node.parent
+
+
+def mcts_place(board, stone, time_limit=TIME_LIMIT, playouts=None, batch_size=BATCH_SIZE,
+               exploration=EXPLORATION, rng=None):
+    """
+    モンテカルロ木探索で手を選ぶ
+
+    Args:
+        board: 盤面
+        stone: 自分の石の色
+        time_limit: 1手あたりの持ち時間（秒、None なら時間は区切らない）
+        playouts: 1手あたりのプレイアウトの数の上限（省略時は持ち時間の限り）
+        batch_size: まとめて行うプレイアウトの数
+        exploration: UCT の探索の強さ
+        rng: random.Random（省略時は新しく作る）
+
+    Returns:
+        ((x, y), search): 選択した手（打てなければ None）と、探索（プレイアウトの数など）
+    """
+    n = len(board)
+    black, white = bitboard.pack(board)
+    p, o = (black, white) if stone == bitboard.BLACK else (white, black)
+    search = Search(p, o, n, time_limit, playouts, batch_size, exploration, rng)
+    sq = search.run()
+    return (None if sq is None else bitboard.coords(sq, n)), search
+
+
+class MCTSAI:
+    """モンテカルロ木探索AIクラス"""
+
+    def __init__(self, time_limit=TIME_LIMIT, playouts=None, batch_size=BATCH_SIZE,
+                 exploration=EXPLORATION):
+        """
+        Args:
+            time_limit: 1手あたりの持ち時間（秒、None なら playouts だけで区切る）
+            playouts: 1手あたりのプレイアウトの数の上限（省略時は持ち時間の限り）
+            batch_size: まとめて行うプレイアウトの数
+            exploration: UCT の探索の強さ
+        """
+        self.time_limit = time_limit
+        self.playouts = playouts
+        self.batch_size = batch_size
+        self.exploration = exploration
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def name(self):
+        return "モンテカルロ木探索AI"
+
+    def face(self):
+        return "🎲"  # サイコロ（ランダムな対局を繰り返す）
+
+    def reset_stats(self):
+        """手の数・プレイアウトの数・かかった時間を 0 に戻す"""
+        with self._lock:
+            self.moves = 0
+            self.total_playouts = 0
+            self.seconds = 0.0
+
+    def stats(self):
+        """
+        これまでの手選びの合計
+
+        Returns:
+            {'moves', 'playouts', 'seconds', 'playouts_per_second'}
+        """
+        with self._lock:
+            return {
+                'moves': self.moves,
+                'playouts': self.total_playouts,
+                'seconds': self.seconds,
+                'playouts_per_second': self.total_playouts / self.seconds if self.seconds else 0.0,
+            }
+
+    def place(self, board, stone):
+        move, search = mcts_place(board, stone, self.time_limit, self.playouts,
+                                  self.batch_size, self.exploration)
+        if search.playouts:
+            with self._lock:
+                self.moves += 1
+                self.total_playouts += search.playouts
+                self.seconds += search.elapsed
+        return move
+
+# デバッグ用
+if __name__ == "__main__":
+    # テスト用の盤面
+    test_board = [
+        [0,0,0,0,0,0],
+        [0,0,0,0,0,0],
+        [0,0,1,2,0,0],
+        [0,0,2,1,0,0],
+        [0,0,0,0,0,0],
+        [0,0,0,0,0,0],
+    ]
+
+    ai = MCTSAI()
+    print(f"モンテカルロ木探索AI: {ai.face()}")
+    print(f"プレイアウト: {'numpy でまとめて' if load_batch() is not None else 'ビットボードで1局ずつ'}")
+
+    # 黒(1)の手を選択
+    for time_limit in (0.05, 0.2, 1.0):
+        move, search = mcts_place(test_board, 1, time_limit)
+        print(f"持ち時間 {time_limit}s: 選択した手 {move}（{search.playouts} プレイアウト、"
+              f"{search.playouts_per_second():.0f} プレイアウト/秒）")
@@ -14,27 +14,28 @@ _battle_dir = os.path.dirname(os.path.abspath(__file__))
 if _battle_dir not in sys.path:
     sys.path.insert(0, _battle_dir)
 
-try:
-    from tqdm import tqdm
-except ImportError:
-    print("tqdmをインストールしています...")
-    import os
-    os.system('pip install tqdm')
-    from tqdm import tqdm
-
 try:
     # パッケージとして使われる場合
-    from .othello import can_place_x_y, copy, move_stone, can_place, safe_place, safe_face, BLACK, WHITE, draw_board
-    from kogi_canvas import Canvas
+    from .othello import can_place_x_y, copy, apply_move, can_place, safe_place, safe_face, BLACK, WHITE, draw_board, load_canvas, prepare_board
+    from .engine import bitboard, endgame
 except ImportError:
     # 直接実行される場合
-    from othello import can_place_x_y, copy, move_stone, can_place, safe_place, safe_face, BLACK, WHITE, draw_board
+    from othello import can_place_x_y, copy, apply_move, can_place, safe_place, safe_face, BLACK, WHITE, draw_board, load_canvas, prepare_board
+    from engine import bitboard, endgame
+
+
+def load_tqdm():
+    """
+    tqdm を読み込む（盤面を表示しながら対戦するときに初めて読み込む）
+    インストールされていなければ、このときにインストールする。
+    """
     try:
-        from kogi_canvas import Canvas
+        from tqdm import tqdm
     except ImportError:
-        import os
-        os.system('pip install kogi_canvas')
-        from kogi_canvas import Canvas
+        print("tqdmをインストールしています...")
+        os.system('pip install tqdm')
+        from tqdm import tqdm
+    return tqdm
 
 
 def count_stone(board):
@@ -44,44 +45,31 @@ def count_stone(board):
     return black, white
 
 
-def run_othello_live(blackai=None, whiteai=None, board=None, width=300, delay=1.0, name1=None, name2=None):
+def _adjudicate(board, stone):
+    """確定石で勝敗が決まっていれば読み切った終局の石数 (黒, 白)、まだなら None"""
+    black, white = bitboard.pack(board)
+    return endgame.adjudicate(black, white, stone, len(board))
+
+
+def run_othello_live(blackai=None, whiteai=None, board=None, width=300, delay=1.0, name1=None, name2=None, adjudicate=False):
     """
     AI同士を対戦させ、リアルタイムで盤面を表示する
 
     Args:
         blackai: 黒のAI (関数またはPandaAI互換オブジェクト)
         whiteai: 白のAI (関数またはPandaAI互換オブジェクト)
-        board: 盤面サイズ (6, 8) または盤面の2次元配列
+        board: 盤面サイズ（4以上の偶数）または盤面の2次元配列
         width: Canvasの幅（デフォルト: 300）
         delay: 各手の後の待機時間（秒）
+        adjudicate: True なら、確定石で勝敗が決まり空きマスが少なくなった時点で
+            対戦を打ち切り、残りは engine.endgame.adjudicate で読み切って石数を決める
 
     Returns:
         (black_count, white_count, winner): 最終結果
             winner: 'black', 'white', 'draw', 'error'
     """
-    # 盤面の初期化
-    if board == 8:
-        board = [
-            [0,0,0,0,0,0,0,0],
-            [0,0,0,0,0,0,0,0],
-            [0,0,0,0,0,0,0,0],
-            [0,0,0,1,2,0,0,0],
-            [0,0,0,2,1,0,0,0],
-            [0,0,0,0,0,0,0,0],
-            [0,0,0,0,0,0,0,0],
-            [0,0,0,0,0,0,0,0],
-        ]
-    elif board is None or board == 6:
-        board = [
-            [0,0,0,0,0,0],
-            [0,0,0,0,0,0],
-            [0,0,1,2,0,0],
-            [0,0,2,1,0,0],
-            [0,0,0,0,0,0],
-            [0,0,0,0,0,0],
-        ]
-    else:
-        board = copy(board)
+    # 盤面の初期化（サイズが指定されたときは初期配置、盤面が渡されたときはそのコピー）
+    board = copy(prepare_board(board))
 
     # AIがNoneの場合はランダムAIを使用
     try:
@@ -112,6 +100,7 @@ def run_othello_live(blackai=None, whiteai=None, board=None, width=300, delay=1.
 
     black_error = False
     white_error = False
+    settled = None  # 打ち切ったときの (黒, 白) の石数
 
     # IPython.displayをインポート
     try:
@@ -120,10 +109,14 @@ def run_othello_live(blackai=None, whiteai=None, board=None, width=300, delay=1.
     except ImportError:
         has_ipython = False
 
+    # 表示用のモジュールは対戦を表示するときに読み込む
+    Canvas = load_canvas()
+    tqdm = load_tqdm()
+
     # Canvasを作成して初期表示
     print(f'先攻（黒）: {name1}  vs  後攻（白）: {name2}')
     canvas = Canvas(background='green', grid=width//len(board), width=width, height=width)
-    draw_board(canvas, board)
+    draw_board(canvas, board, width)
     display(canvas)
 
     # tqdmで進捗を表示
@@ -132,6 +125,11 @@ def run_othello_live(blackai=None, whiteai=None, board=None, width=300, delay=1.
         while moved or can_place(board, BLACK) or can_place(board, WHITE):
             moved = False
 
+            if adjudicate:
+                settled = _adjudicate(board, BLACK)
+                if settled:
+                    break
+
             # 黒のターン
             if can_place(board, BLACK):
                 try:
@@ -146,7 +144,7 @@ def run_othello_live(blackai=None, whiteai=None, board=None, width=300, delay=1.
                         black_error = True
                         break
 
-                    move_stone(board, BLACK, x, y)
+                    apply_move(board, BLACK, x, y)
                     black, white = count_stone(board)
                     print(f'黒 {name1}は{(x, y)}におきました。黒: {black}, 白: {white} (思考時間: {think_time:.5f}秒)')
 
@@ -160,7 +158,7 @@ def run_othello_live(blackai=None, whiteai=None, board=None, width=300, delay=1.
                     print(f'先攻（黒）: {black_icon} {name1}')
                     print(f'後攻（白）: {white_icon} {name2}')
                     canvas = Canvas(background='green', grid=width//len(board), width=width, height=width)
-                    draw_board(canvas, board)
+                    draw_board(canvas, board, width)
                     display(canvas)
 
                     moved = True
@@ -173,6 +171,11 @@ def run_othello_live(blackai=None, whiteai=None, board=None, width=300, delay=1.
                 if can_place(board, WHITE):
                     print(f'{name1}は、どこにも置けないのでスキップします')
 
+            if adjudicate:
+                settled = _adjudicate(board, WHITE)
+                if settled:
+                    break
+
             # 白のターン
             if can_place(board, WHITE):
                 try:
@@ -187,7 +190,7 @@ def run_othello_live(blackai=None, whiteai=None, board=None, width=300, delay=1.
                         white_error = True
                         break
 
-                    move_stone(board, WHITE, x, y)
+                    apply_move(board, WHITE, x, y)
                     black, white = count_stone(board)
                     print(f'白 {name2}は{(x, y)}におきました。黒: {black}, 白: {white} (思考時間: {think_time:.5f}秒)')
 
@@ -201,7 +204,7 @@ def run_othello_live(blackai=None, whiteai=None, board=None, width=300, delay=1.
                     print(f'先攻（黒）: {black_icon} {name1}')
                     print(f'後攻（白）: {white_icon} {name2}')
                     canvas = Canvas(background='green', grid=width//len(board), width=width, height=width)
-                    draw_board(canvas, board)
+                    draw_board(canvas, board, width)
                     display(canvas)
 
                     moved = True
@@ -223,6 +226,9 @@ def run_othello_live(blackai=None, whiteai=None, board=None, width=300, delay=1.
         black, white = 0, count_stone(board)[1]
     elif white_error:
         black, white = count_stone(board)[0], 0
+    elif settled:
+        print('確定石で勝敗が決まったので打ち切りました（残りは読み切り）')
+        black, white = settled
     else:
         black, white = count_stone(board)
 
@@ -320,7 +326,7 @@ def battle_myais(myai1, myai2, name1="AI1", name2="AI2", board_size=6, width=300
         myai2: 2つ目のmyai関数
         name1: AI1の名前（表示用）
         name2: AI2の名前（表示用）
-        board_size: 盤面サイズ (6 or 8)
+        board_size: 盤面サイズ（4以上の偶数、6 や 8 など）
         width: Canvasの幅
         delay: 各手の待機時間
 
@@ -419,7 +425,7 @@ def battle_user_ais(jsonl_path, board_size=6, width=300, delay=1.0):
 
     Args:
         jsonl_path: ユーザーAIが含まれるJSONLファイルのパス
-        board_size: 盤面サイズ (6 or 8)
+        board_size: 盤面サイズ（4以上の偶数、6 や 8 など）
         width: Canvasの幅
         delay: 各手の待機時間
 
@@ -0,0 +1,82 @@
+"""
+定石（オープニングブック）を作る
+αβ探索AI と同じ探索（同じ評価関数）で序盤の局面を深く読み、engine.book の形式で保存する
+
+定石のファイルの形式と引き方は engine.book を参照。engine パッケージは ai パッケージに
+よらないので、ai の探索を使って読むこの部分はここに置き、engine.book.build には
+局面を読む関数を渡す。
+
+使い方（オフラインで1回だけ）:
+    python build_book.py                  # 6x6、10 手目まで、深さ 8
+    python build_book.py -s 8 -p 8 -d 6 -o book8.bin
+"""
+
+import argparse
+import os
+import time
+
+try:
+    # パッケージとして使われる場合（from hachi import ...）
+    from .engine import bitboard, book
+    from .engine.evaluation import EvaluatedState
+    from .engine.transposition import TranspositionTable
+    from .ai.alphabeta_ai import Search, TT_SIZE_MB, get_weight_table
+except ImportError:
+    # 直接実行される場合（python build_book.py）
+    from engine import bitboard, book
+    from engine.evaluation import EvaluatedState
+    from engine.transposition import TranspositionTable
+    from ai.alphabeta_ai import Search, TT_SIZE_MB, get_weight_table
+
+
+def make_search(depth, tt_size_mb=TT_SIZE_MB):
+    """
+    深さだけを決めて時間は区切らずに局面を読む関数（engine.book.build に渡す）
+
+    置換表は1つだけ作ってすべての局面で使い回す（確保は1回で済み、
+    兄弟の局面で同じになる先の局面の結果も使える）。
+
+    Returns:
+        search(p, o, n) -> (評価値, 最善手のビット番号)
+    """
+    tt = TranspositionTable(tt_size_mb)
+
+    def search(p, o, n):
+        state = EvaluatedState(p, o, bitboard.BLACK, n, get_weight_table(n))
+        searcher = Search(state, float('inf'), depth, tt=tt, opening_book=False)
+        sq, _ = searcher.run()
+        # 手が1つしかなければ読まずに返すので、評価値は 0 とする
+        return (0 if searcher.score is None else searcher.score), sq
+
+    return search
+
+
+def main():
+    parser = argparse.ArgumentParser(description='定石（オープニングブック）を作る')
+    parser.add_argument('-o', '--output', default=None,
+                        help='保存するファイル（デフォルト: engine/data/book<サイズ>.bin）')
+    parser.add_argument('-s', '--size', type=int, default=6, help='盤面サイズ（デフォルト: 6）')
+    parser.add_argument('-p', '--plies', type=int, default=10,
+                        help='何手目までの局面を保存するか（デフォルト: 10）')
+    parser.add_argument('-d', '--depth', type=int, default=8,
+                        help='1局面を読む深さ（デフォルト: 8）')
+    args = parser.parse_args()
+    try:
+        bitboard.check_size(args.size)
+    except ValueError as e:
+        parser.error(str(e))
+    output = args.output or book.default_path(args.size)
+
+    def log(count):
+        if count % 100 == 0:
+            print(f"  {count} 局面", flush=True)
+
+    start = time.perf_counter()
+    count = book.build(output, args.size, args.plies, make_search(args.depth), log)
+    elapsed = time.perf_counter() - start
+    print(f"{args.size}x{args.size} {args.plies} 手目まで（深さ {args.depth}）: {count} 局面 "
+          f"({os.path.getsize(output)} バイト, {elapsed:.1f}s) -> {output}")
+
+
+if __name__ == "__main__":
+    main()
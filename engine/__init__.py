@@ -0,0 +1,15 @@
+"""
+オセロ高速エンジンモジュール
+盤面を2つの整数（ビットボード）で表し、合法手・反転・着手をシフトとマスクで計算する
+"""
+
+from . import bitboard, book, endgame, evaluation, mailbox, stability, symmetry, tablebase, transposition, zobrist
+from .state import GameState, PASS
+from .position import Position
+from .evaluation import EvaluatedState, WeightTable
+from .book import OpeningBook
+from .tablebase import Tablebase
+from .transposition import TranspositionTable
+from .zobrist import position_key
+
+__all__ = ['bitboard', 'book', 'endgame', 'evaluation', 'mailbox', 'stability', 'symmetry', 'tablebase', 'transposition', 'zobrist', 'GameState', 'PASS', 'EvaluatedState', 'WeightTable', 'OpeningBook', 'Position', 'Tablebase', 'TranspositionTable', 'position_key']
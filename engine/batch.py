@@ -0,0 +1,355 @@
+"""
+NumPy による一括処理
+多数の盤面をまとめて扱い、合法手・ひっくり返る石の数・着手をベクトル演算で求める
+
+盤面は (B, N, N) の int8 配列（0: 空き, 1: 黒, 2: 白）、手番は (B,) の配列で渡す。
+自己対戦や評価関数の調整など、何千局も同時に進めたいときに使う。
+N が 8 以下なら、ビットボードを uint64 配列に詰めた形でも合法手を求められ、
+ランダムな対局（プレイアウト）を何局もまとめて終局まで進められる。
+
+使い方:
+    python -m engine.batch   # can_place_x_y / move_stone と結果を突き合わせる
+"""
+
+try:
+    import numpy as np
+except ImportError:
+    raise ImportError("engine.batch には numpy が必要です (pip install numpy)")
+
+from . import bitboard
+
+DIRECTIONS = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
+
+
+def _shifted(a, dx, dy, k):
+    """
+    各マス (x, y) に、(x + k*dx, y + k*dy) の値を並べた配列を返す
+    盤の外は False (0) になる
+    """
+    n = a.shape[-1]
+    out = np.zeros_like(a)
+    sx, sy = k * dx, k * dy
+    if abs(sx) >= n or abs(sy) >= n:
+        return out
+    dst_y = slice(max(0, -sy), n - max(0, sy))
+    src_y = slice(max(0, sy), n - max(0, -sy))
+    dst_x = slice(max(0, -sx), n - max(0, sx))
+    src_x = slice(max(0, sx), n - max(0, -sx))
+    out[:, dst_y, dst_x] = a[:, src_y, src_x]
+    return out
+
+
+def _as_arrays(boards, stones):
+    boards = np.asarray(boards, dtype=np.int8)
+    stones = np.broadcast_to(np.asarray(stones, dtype=np.int8), boards.shape[:1])
+    return boards, stones
+
+
+def direction_flips(boards, stones):
+    """
+    全マスについて、方向ごとにひっくり返る石の数を求める
+
+    Args:
+        boards: (B, N, N) の盤面
+        stones: (B,) の手番の石の色（スカラーなら全盤面で同じ手番）
+
+    Returns:
+        (8, B, N, N) の int8 配列（置けないマスは 0）
+    """
+    boards, stones = _as_arrays(boards, stones)
+    own = boards == stones[:, None, None]
+    opp = boards == (3 - stones)[:, None, None]
+    empty = boards == 0
+    n = boards.shape[-1]
+
+    result = np.zeros((len(DIRECTIONS),) + boards.shape, dtype=np.int8)
+    for d, (dx, dy) in enumerate(DIRECTIONS):
+        run = empty.copy()  # 空きマスから相手の石が続いているか
+        for k in range(1, n):
+            if k > 1:
+                closed = run & _shifted(own, dx, dy, k)
+                result[d][closed] = k - 1
+            run &= _shifted(opp, dx, dy, k)
+            if not run.any():
+                break
+    return result
+
+
+def flip_counts(boards, stones):
+    """
+    全マスについて、打ったときにひっくり返る石の数を求める
+
+    Returns:
+        (B, N, N) の int 配列（置けないマスは 0）
+    """
+    return direction_flips(boards, stones).sum(axis=0, dtype=np.int16)
+
+
+def legal_moves(boards, stones):
+    """
+    全マスについて、打てるかどうかを求める
+
+    Returns:
+        (B, N, N) の bool 配列
+    """
+    return flip_counts(boards, stones) > 0
+
+
+def apply_moves(boards, stones, xs, ys):
+    """
+    各盤面に1手ずつ打つ（元の配列は書き換えない）
+
+    Args:
+        boards: (B, N, N) の盤面
+        stones: (B,) の手番の石の色
+        xs, ys: (B,) の打つ座標。x が負の盤面はパスとしてそのまま返す
+
+    Returns:
+        (new_boards, flipped)
+        new_boards: (B, N, N) の着手後の盤面（置けない手の盤面はそのまま）
+        flipped: (B,) のひっくり返った石の数（置けない手・パスは 0）
+    """
+    boards, stones = _as_arrays(boards, stones)
+    xs = np.asarray(xs, dtype=np.int64)
+    ys = np.asarray(ys, dtype=np.int64)
+    count, n = boards.shape[0], boards.shape[-1]
+    index = np.arange(count)
+    opponents = 3 - stones
+
+    on_board = (xs >= 0) & (xs < n) & (ys >= 0) & (ys < n)
+    start = on_board & (boards[index, ys.clip(0, n - 1), xs.clip(0, n - 1)] == 0)
+
+    new_boards = boards.copy()
+    flipped = np.zeros(count, dtype=np.int64)
+    for dx, dy in DIRECTIONS:
+        run = start.copy()
+        closed = np.zeros(count, dtype=bool)
+        length = np.zeros(count, dtype=np.int64)
+        for k in range(1, n):
+            cx, cy = xs + k * dx, ys + k * dy
+            inside = (cx >= 0) & (cx < n) & (cy >= 0) & (cy < n)
+            cell = boards[index, cy.clip(0, n - 1), cx.clip(0, n - 1)]
+            if k > 1:
+                closed |= run & inside & (cell == stones)
+            run &= inside & (cell == opponents)
+            length += run
+            if not run.any():
+                break
+        length[~closed] = 0
+        for k in range(1, int(length.max(initial=0)) + 1):
+            hit = length >= k
+            new_boards[index[hit], ys[hit] + k * dy, xs[hit] + k * dx] = stones[hit]
+        flipped += length
+
+    placed = flipped > 0
+    new_boards[index[placed], ys[placed], xs[placed]] = stones[placed]
+    return new_boards, flipped
+
+
+def pack(boards):
+    """
+    (B, N, N) の盤面（N <= 8）をビットボードの uint64 配列に詰める
+    ビットの並びは engine.bitboard と同じ（マス (x, y) がビット y * N + x）
+
+    Returns:
+        (black, white): (B,) の uint64 配列
+    """
+    boards = np.asarray(boards, dtype=np.int8)
+    n = boards.shape[-1]
+    if n > 8:
+        raise ValueError("uint64 に詰められるのは 8x8 までです")
+    weights = np.left_shift(np.uint64(1), np.arange(n * n, dtype=np.uint64))
+    flat = boards.reshape(boards.shape[0], n * n)
+    black = np.bitwise_or.reduce(np.where(flat == 1, weights, np.uint64(0)), axis=1)
+    white = np.bitwise_or.reduce(np.where(flat == 2, weights, np.uint64(0)), axis=1)
+    return black, white
+
+
+def unpack(black, white, n):
+    """pack の逆変換。(B, N, N) の int8 配列を返す"""
+    bits = np.arange(n * n, dtype=np.uint64)
+    one = np.uint64(1)
+    b = (np.asarray(black, dtype=np.uint64)[:, None] >> bits) & one
+    w = (np.asarray(white, dtype=np.uint64)[:, None] >> bits) & one
+    return (b + 2 * w).astype(np.int8).reshape(-1, n, n)
+
+
+def legal_moves_packed(p, o, n):
+    """
+    uint64 配列に詰めたビットボードで、合法手をまとめて求める
+    engine.bitboard.legal_moves を配列に対して行うもの
+
+    Args:
+        p: (B,) 手番側の石
+        o: (B,) 相手の石
+        n: 盤面の一辺のマス数（8 以下）
+
+    Returns:
+        (B,) の合法手のマスク（uint64）
+    """
+    p = np.asarray(p, dtype=np.uint64)
+    o = np.asarray(o, dtype=np.uint64)
+    full = np.uint64((1 << (n * n)) - 1)
+    left = sum(1 << (y * n) for y in range(n))
+    inner = np.uint64(((1 << (n * n)) - 1) & ~left & ~(left << (n - 1)))
+    moves = np.zeros_like(p)
+    for shift, mask in ((1, inner), (n, full), (n + 1, inner), (n - 1, inner)):
+        s = np.uint64(shift)
+        om = o & mask
+        for step in (np.left_shift, np.right_shift):
+            t = step(p, s) & om
+            for _ in range(n - 3):
+                t |= step(t, s) & om
+            moves |= step(t, s)
+    return moves & full & ~(p | o)
+
+
+def flips_packed(p, o, moves, n):
+    """
+    uint64 配列に詰めたビットボードで、1手ずつ打ったときにひっくり返る石をまとめて求める
+
+    Args:
+        p: (B,) 手番側の石
+        o: (B,) 相手の石
+        moves: (B,) 打つマスのビット（1ビットだけ立てたもの）
+        n: 盤面の一辺のマス数（8 以下）
+
+    Returns:
+        (B,) のひっくり返る石のマスク（uint64）
+    """
+    _, directions = bitboard.geometry(n)
+    zero = np.uint64(0)
+    flipped = np.zeros_like(p)
+    for shift, mask in directions:
+        step = np.left_shift if shift > 0 else np.right_shift
+        s = np.uint64(abs(shift))
+        om = o & np.uint64(mask)
+        # 打ったマスから相手の石が続く範囲を広げ、その先に自分の石があれば挟める
+        t = step(moves, s) & om
+        for _ in range(n - 3):
+            t |= step(t, s) & om
+        flipped |= np.where(step(t, s) & p, t, zero)
+    return flipped
+
+
+def popcount_packed(masks, n):
+    """(B,) の uint64 配列の、それぞれの立っているビットの数"""
+    masks = np.asarray(masks, dtype=np.uint64)
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(masks).astype(np.int64)
+    bits = np.arange(n * n, dtype=np.uint64)
+    return ((masks[:, None] >> bits) & np.uint64(1)).sum(axis=1, dtype=np.int64)
+
+
+def random_playouts_packed(p, o, n, rng=None):
+    """
+    uint64 配列に詰めた局面から、両者ともランダムに終局まで打つ（全局面を一緒に1手ずつ進める）
+
+    Args:
+        p: (B,) 手番側の石
+        o: (B,) 相手の石
+        n: 盤面の一辺のマス数（8 以下）
+        rng: numpy.random.Generator（省略時は新しく作る）
+
+    Returns:
+        (B,) の終局の石数の差（最初の手番側から見た値、int64）
+    """
+    if n > 8:
+        raise ValueError("uint64 に詰められるのは 8x8 までです")
+    if rng is None:
+        rng = np.random.default_rng()
+    p = np.array(p, dtype=np.uint64)
+    o = np.array(o, dtype=np.uint64)
+    count = len(p)
+    one, zero = np.uint64(1), np.uint64(0)
+    bits = np.arange(n * n, dtype=np.uint64)
+    sign = np.ones(count, dtype=np.int64)   # 今の手番側が最初の手番側なら 1
+    active = np.ones(count, dtype=bool)     # まだ終局していない
+    passed = np.zeros(count, dtype=bool)    # 直前の手番がパスした
+
+    while active.any():
+        moves = np.where(active, legal_moves_packed(p, o, n), zero)
+        can_move = moves != zero
+        # 続けて2回パスなら終局
+        active &= can_move | ~passed
+        passed = active & ~can_move
+
+        index = np.nonzero(can_move)[0]
+        if index.size:
+            # 合法手にだけ乱数を振り、いちばん大きいマスに打つ（一様に1手を選ぶ）
+            legal = ((moves[index, None] >> bits) & one).astype(bool)
+            keys = rng.random(legal.shape)
+            keys[~legal] = -1.0
+            chosen = np.left_shift(one, keys.argmax(axis=1).astype(np.uint64))
+            mp, mo = p[index], o[index]
+            flipped = flips_packed(mp, mo, chosen, n)
+            p[index] = mp | flipped | chosen
+            o[index] = mo & ~flipped
+
+        # 打った局面もパスした局面も手番を入れ替える
+        p, o = np.where(active, o, p), np.where(active, p, o)
+        sign = np.where(active, -sign, sign)
+
+    return sign * (popcount_packed(p, n) - popcount_packed(o, n))
+
+
+# デバッグ用: can_place_x_y / move_stone と結果を突き合わせる
+if __name__ == "__main__":
+    import random
+    import sys
+    import os
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from othello import can_place_x_y, move_stone, copy, valid_moves
+
+    random.seed(0)
+    for n in (4, 6, 8, 10):
+        # ランダムな対局の途中局面を集める
+        boards, stones = [], []
+        while len(boards) < 300:
+            board = [[0] * n for _ in range(n)]
+            c = n // 2
+            board[c - 1][c - 1] = board[c][c] = 1
+            board[c - 1][c] = board[c][c - 1] = 2
+            stone = 1
+            for _ in range(n * n):
+                boards.append(copy(board))
+                stones.append(stone)
+                moves = valid_moves(board, stone) or valid_moves(board, 3 - stone)
+                if not moves:
+                    break
+                if not valid_moves(board, stone):
+                    stone = 3 - stone
+                move_stone(board, stone, *random.choice(moves))
+                stone = 3 - stone
+
+        array = np.array(boards, dtype=np.int8)
+        side = np.array(stones, dtype=np.int8)
+        legal = legal_moves(array, side)
+        for i, board in enumerate(boards):
+            for y in range(n):
+                for x in range(n):
+                    assert legal[i, y, x] == can_place_x_y(board, stones[i], x, y), (n, i, x, y)
+
+        if n <= 8:
+            black, white = pack(array)
+            assert (unpack(black, white, n) == array).all()
+            p = np.where(side == 1, black, white)
+            o = np.where(side == 1, white, black)
+            packed = unpack(legal_moves_packed(p, o, n), np.zeros_like(p), n) == 1
+            assert (packed == legal).all(), n
+
+        # 合法手（なければ適当なマス）を1つずつ選んで打つ
+        xs, ys = [], []
+        for i, board in enumerate(boards):
+            moves = valid_moves(board, stones[i]) or [(0, 0)]
+            x, y = random.choice(moves)
+            xs.append(x)
+            ys.append(y)
+        new_boards, flipped = apply_moves(array, side, xs, ys)
+        counts = flip_counts(array, side)
+        for i, board in enumerate(boards):
+            expected = copy(board)
+            frames = move_stone(expected, stones[i], xs[i], ys[i])
+            assert new_boards[i].tolist() == expected, (n, i)
+            assert flipped[i] == max(len(frames) - 4, 0) == counts[i, ys[i], xs[i]], (n, i)
+        print(f"{n}x{n}: {len(boards)} 局面で一致")
@@ -0,0 +1,318 @@
+"""
+ビットボードエンジン
+N×N の盤面を黒石・白石それぞれ1つの整数で表す
+
+マス (x, y) はビット番号 y * N + x に対応する。
+合法手はシフトとマスクで全マス分をまとめて求め、ひっくり返る石は
+事前に作った半直線のビット表をたどって求めるため、
+2次元リストを1マスずつ調べるよりずっと速い。
+"""
+
+from functools import lru_cache
+from itertools import chain
+
+EMPTY = 0
+BLACK = 1
+WHITE = 2
+
+# 2次元リスト → '0'/'1' の文字列への変換表（bytes.translate用）
+_BLACK_DIGITS = bytes(0x31 if i == BLACK else 0x30 for i in range(256))
+_WHITE_DIGITS = bytes(0x31 if i == WHITE else 0x30 for i in range(256))
+
+
+@lru_cache(maxsize=None)
+def geometry(n):
+    """
+    盤面サイズごとのマスクとシフト方向を計算する（サイズごとに1回だけ）
+
+    Args:
+        n: 盤面の一辺のマス数
+
+    Returns:
+        (full, directions)
+        full: 盤面全体のマスク
+        directions: [(shift, mask), ...]
+            shift: 正なら左シフト、負なら右シフト
+            mask: 盤の端で折り返さないように相手の石に掛けるマスク
+    """
+    full = (1 << (n * n)) - 1
+    left_column = 0
+    for y in range(n):
+        left_column |= 1 << (y * n)
+    right_column = left_column << (n - 1)
+    inner = full & ~left_column & ~right_column
+    directions = (
+        (1, inner), (-1, inner),                # 横
+        (n, full), (-n, full),                  # 縦
+        (n + 1, inner), (-(n + 1), inner),      # 斜め
+        (n - 1, inner), (-(n - 1), inner),      # 斜め
+    )
+    return full, directions
+
+
+def check_size(n):
+    """
+    盤面サイズを確かめる（4以上の偶数でなければ ValueError）
+
+    Returns:
+        n
+    """
+    if not isinstance(n, int) or n < 4 or n % 2:
+        raise ValueError(f"盤面サイズは4以上の偶数にしてください: {n!r}")
+    return n
+
+
+@lru_cache(maxsize=None)
+def ray_indices(n):
+    """
+    各マスから8方向に伸びる半直線を、マスの番号の列として計算する（サイズごとに1回だけ）
+    方向は (-1,-1), (-1,0), (-1,1), (0,-1), (0,1), (1,-1), (1,0), (1,1) の順で、
+    盤の端までのマスを近い順に並べる（盤の外に出るかどうかを毎回調べなくてよい）
+
+    Args:
+        n: 盤面の一辺のマス数
+
+    Returns:
+        ray_indices[sq] = [[sq, sq, ...], ...]（8方向分）
+    """
+    return [_lines_from(sq, n) for sq in range(n * n)]
+
+
+@lru_cache(maxsize=None)
+def rays(n):
+    """
+    各マスから8方向に伸びる半直線を、マスのビットの列として計算する（サイズごとに1回だけ）
+    石を挟めない長さ1以下の半直線は含めない
+
+    Args:
+        n: 盤面の一辺のマス数
+
+    Returns:
+        rays[sq] = [[bit, bit, ...], ...]
+    """
+    return [[[1 << s for s in line] for line in lines if len(line) >= 2] for lines in ray_indices(n)]
+
+
+def _lines_from(sq, n):
+    """sq から8方向に伸びる半直線（盤の端まで）をマスの番号の列で返す"""
+    x, y = sq % n, sq // n
+    result = []
+    for dx, dy in ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)):
+        line = []
+        nx, ny = x + dx, y + dy
+        while 0 <= nx < n and 0 <= ny < n:
+            line.append(ny * n + nx)
+            nx += dx
+            ny += dy
+        result.append(line)
+    return result
+
+
+def square(x, y, n):
+    """座標 (x, y) をビット番号に変換する"""
+    return y * n + x
+
+
+def coords(sq, n):
+    """ビット番号を座標 (x, y) に変換する"""
+    return sq % n, sq // n
+
+
+def count(mask):
+    """マスクに含まれる石の数"""
+    return mask.bit_count()
+
+
+def squares(mask):
+    """
+    マスクに含まれるビット番号を小さい順に返す
+    （2次元リストを y, x の順に走査したときと同じ順番になる）
+    """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def initial(n):
+    """
+    初期配置のビットボードを返す
+
+    Args:
+        n: 盤面の一辺のマス数（4以上の偶数）
+
+    Returns:
+        (black, white)
+    """
+    check_size(n)
+    c = n // 2
+    black = (1 << square(c - 1, c - 1, n)) | (1 << square(c, c, n))
+    white = (1 << square(c, c - 1, n)) | (1 << square(c - 1, c, n))
+    return black, white
+
+
+def pack(board):
+    """
+    2次元リストの盤面をビットボードに変換する
+
+    Args:
+        board: 2次元配列のオセロボード
+
+    Returns:
+        (black, white)
+    """
+    try:
+        cells = bytes(chain.from_iterable(board))[::-1]
+    except (TypeError, ValueError):
+        # 0〜255の整数以外が入っている盤面は1マスずつ変換する
+        black = white = 0
+        bit = 1
+        for row in board:
+            for stone in row:
+                if stone == BLACK:
+                    black |= bit
+                elif stone == WHITE:
+                    white |= bit
+                bit <<= 1
+        return black, white
+    return int(cells.translate(_BLACK_DIGITS), 2), int(cells.translate(_WHITE_DIGITS), 2)
+
+
+def unpack(black, white, n):
+    """
+    ビットボードを2次元リストの盤面に変換する
+
+    Args:
+        black, white: ビットボード
+        n: 盤面の一辺のマス数
+
+    Returns:
+        2次元配列のオセロボード
+    """
+    cells = [EMPTY] * (n * n)
+    for sq in squares(black):
+        cells[sq] = BLACK
+    for sq in squares(white):
+        cells[sq] = WHITE
+    return [cells[y * n:(y + 1) * n] for y in range(n)]
+
+
+def legal_moves(p, o, n):
+    """
+    合法手をまとめて求める
+
+    Args:
+        p: 手番側の石
+        o: 相手の石
+        n: 盤面の一辺のマス数
+
+    Returns:
+        合法手のマスク
+    """
+    full, directions = geometry(n)
+    moves = 0
+    for shift, mask in directions:
+        om = o & mask
+        # 手番側の石から相手の石が続く範囲を、伸びなくなるまで広げる
+        if shift > 0:
+            t = (p << shift) & om
+            while t:
+                grown = t | ((t << shift) & om)
+                if grown == t:
+                    break
+                t = grown
+            moves |= t << shift
+        else:
+            shift = -shift
+            t = (p >> shift) & om
+            while t:
+                grown = t | ((t >> shift) & om)
+                if grown == t:
+                    break
+                t = grown
+            moves |= t >> shift
+    return moves & full & ~(p | o)
+
+
+def flips(p, o, sq, n):
+    """
+    sq に打ったときにひっくり返る石を求める
+
+    Args:
+        p: 手番側の石
+        o: 相手の石
+        sq: 打つマスのビット番号
+        n: 盤面の一辺のマス数
+
+    Returns:
+        ひっくり返る石のマスク（置けない場合は 0）
+    """
+    if (p | o) >> sq & 1:
+        return 0
+    flipped = 0
+    for line in rays(n)[sq]:
+        run = 0
+        for bit in line:
+            if o & bit:
+                run |= bit
+            else:
+                if p & bit:
+                    flipped |= run
+                break
+    return flipped
+
+
+def generate_moves(p, o, n):
+    """
+    合法手と、それぞれの手でひっくり返る石をまとめて求める
+
+    合法手はシフト演算でまとめて求め、ひっくり返る石は合法手のマスだけ
+    半直線をたどって求める（置けるかどうかを1マスずつ調べ直さない）。
+
+    Args:
+        p: 手番側の石
+        o: 相手の石
+        n: 盤面の一辺のマス数
+
+    Returns:
+        [(sq, flipped), ...]（ビット番号の小さい順）
+    """
+    table = rays(n)
+    result = []
+    moves = legal_moves(p, o, n)
+    while moves:
+        low = moves & -moves
+        sq = low.bit_length() - 1
+        moves ^= low
+        flipped = 0
+        for line in table[sq]:
+            run = 0
+            for bit in line:
+                if o & bit:
+                    run |= bit
+                else:
+                    if p & bit:
+                        flipped |= run
+                    break
+        result.append((sq, flipped))
+    return result
+
+
+def play(p, o, sq, n):
+    """
+    sq に打って石をひっくり返す
+
+    Args:
+        p: 手番側の石
+        o: 相手の石
+        sq: 打つマスのビット番号
+        n: 盤面の一辺のマス数
+
+    Returns:
+        (p, o, flipped): 着手後の手番側の石・相手の石・ひっくり返った石
+        置けない場合は flipped が 0 で、盤面はそのまま
+    """
+    flipped = flips(p, o, sq, n)
+    if not flipped:
+        return p, o, 0
+    return p | flipped | (1 << sq), o & ~flipped, flipped
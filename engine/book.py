@@ -0,0 +1,267 @@
+"""
+定石（オープニングブック）
+序盤の局面の最善手と評価値を、前もって深く読んでファイルに保存しておく
+
+対局はいつも同じ初期配置から始まるので、序盤の手は対局のたびに同じ探索をすることになる。
+深く読んだ結果を1回だけ保存しておけば、序盤は読まずに引くだけで済む。
+
+ファイルの作り方（オフラインで1回だけ）:
+    python build_book.py -s 6 -p 10 -d 8
+
+    局面を読むのは αβ探索AI の探索なので、作るスクリプトは engine の外（build_book.py）に
+    置き、build には局面を読む関数を渡す。
+
+    初期配置から p 手目までの局面のうち、AIが打つ局面ではその局面を深く読んだ最善手だけを、
+    相手が打つ局面ではすべての手を打ち進めて集める（黒番・白番の両方）。
+    定石どおりに打っているかぎり、相手がどう打っても p 手目までは表から引ける。
+
+ファイルの形式:
+    ヘッダ（マジック b'OTBK'、版、盤面サイズ、手数 p、局面の数）のあとに、
+    (キー, 最善手, 評価値) の固定長のレコードをキーの小さい順に並べる。
+    キーは手番側・相手側の石を対称変換で正規形にしたもの（ビッグエンディアン）、
+    最善手は正規形の局面でのビット番号（1バイト）、評価値は手番側から見た値（4バイト）。
+
+引くときはファイルを mmap して二分探索する。ファイルはOSのページキャッシュに
+1つだけ載り、同じファイルを開いたスレッドやプロセスはそれを共有するので、
+ワーカーが増えてもメモリは増えない。
+
+使い方:
+    with OpeningBook(path) as book:
+        found = book.probe(p, o)        # (評価値, 最善手のビット番号)（表になければ None）
+    print(book.stats())                 # 引いた回数と hit 率
+"""
+
+import mmap
+import os
+import struct
+import threading
+
+from . import bitboard, symmetry
+
+MAGIC = b'OTBK'
+VERSION = 1
+_HEADER = struct.Struct('<4sBBBxQ')  # マジック, 版, 盤面サイズ, 手数, (詰め物), 局面の数
+_VALUE = struct.Struct('>Bi')        # 最善手, 評価値
+
+# 既定のファイルの場所（python build_book.py で作る）
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+
+def default_path(n):
+    """盤面サイズ n の定石の既定のファイル"""
+    return os.path.join(DATA_DIR, f'book{n}.bin')
+
+
+def _key_bytes(n):
+    """キーのバイト数（手番側と相手側の2つのビットボード）"""
+    return (2 * n * n + 7) // 8
+
+
+def collect(n, plies, search, log=None):
+    """
+    定石の局面を集めて読む
+
+    Args:
+        n: 盤面の一辺のマス数
+        plies: 何手目までの局面を集めるか
+        search: 局面を読む関数 search(p, o, n) -> (評価値, 最善手のビット番号)
+        log: 読んだ局面の数を知らせる関数（省略可）
+
+    Returns:
+        {キー: (正規形の局面での最善手, 評価値)}
+    """
+    entries = {}
+    visited = set()
+
+    def visit(p, o, ply, mine):
+        if ply >= plies:
+            return
+        moves = bitboard.generate_moves(p, o, n)
+        if not moves:
+            if bitboard.legal_moves(o, p, n):
+                visit(o, p, ply, not mine)  # パス
+            return
+        cp, co, t = symmetry.canonicalize(p, o, n)
+        key = (cp << (n * n)) | co
+        if (key, mine) in visited:
+            return  # 手順違いで同じ局面（手数も同じになる）
+        visited.add((key, mine))
+        if mine:
+            entry = entries.get(key)
+            if entry is None:
+                score, sq = search(p, o, n)
+                entry = entries[key] = (symmetry.to_canonical_move(sq, t, n), score)
+                if log is not None:
+                    log(len(entries))
+            sq = symmetry.from_canonical_move(entry[0], t, n)
+            moves = [(sq, bitboard.flips(p, o, sq, n))]
+        for sq, flipped in moves:
+            visit(o & ~flipped, p | flipped | (1 << sq), ply + 1, not mine)
+
+    p, o = bitboard.initial(n)
+    visit(p, o, 0, True)   # 黒番で打つ場合
+    visit(p, o, 0, False)  # 白番で打つ場合
+    return entries
+
+
+def write(path, n, plies, entries):
+    """
+    {キー: (最善手, 評価値)} をキーの小さい順にファイルに書く
+
+    一時ファイルに書いてから置き換えるので、古いファイルを開いているものがあってもよい。
+
+    Returns:
+        書いた局面の数
+    """
+    size = _key_bytes(n)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temporary = path + '.tmp'
+    with open(temporary, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, n, plies, len(entries)))
+        for key in sorted(entries):
+            move, score = entries[key]
+            f.write(key.to_bytes(size, 'big'))
+            f.write(_VALUE.pack(move, score))
+    os.replace(temporary, path)
+    return len(entries)
+
+
+def build(path, n=6, plies=10, search=None, log=None):
+    """
+    定石を作ってファイルに保存する
+
+    Args:
+        path: 保存するファイル
+        n: 盤面の一辺のマス数
+        plies: 何手目までの局面を保存するか
+        search: 局面を読む関数 search(p, o, n) -> (評価値, 最善手のビット番号)
+        log: 読んだ局面の数を知らせる関数（省略可）
+
+    Returns:
+        保存した局面の数
+    """
+    bitboard.check_size(n)
+    return write(path, n, plies, collect(n, plies, search, log))
+
+
+class OpeningBook:
+    """mmap で開いた定石（ファイル全体はメモリに読み込まない）"""
+
+    def __init__(self, path):
+        """
+        Raises:
+            ValueError: 定石のファイルではない場合
+        """
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, n, plies, count = _HEADER.unpack_from(self._map, 0)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"定石のファイルではありません: {path}")
+        except Exception:
+            self._file.close()
+            raise
+        self.n = n
+        self.plies = plies
+        self.count = count
+        self._key_size = _key_bytes(n)
+        self._record = self._key_size + _VALUE.size
+        self._lock = threading.Lock()  # 引いた回数は対局のスレッドから同時に数える
+        self.reset_stats()
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    def reset_stats(self):
+        """引いた回数と hit の回数を 0 に戻す"""
+        with self._lock:
+            self.probes = 0  # 定石の手数のうちに引いた回数
+            self.hits = 0    # 表にあった回数
+
+    def stats(self):
+        """
+        引いた回数と hit 率
+
+        Returns:
+            {'probes', 'hits', 'hit_rate'}（手数が定石より多い局面は数えない）
+        """
+        with self._lock:
+            return {
+                'probes': self.probes,
+                'hits': self.hits,
+                'hit_rate': self.hits / self.probes if self.probes else 0.0,
+            }
+
+    def _lookup(self, key):
+        """キーの (最善手, 評価値) を二分探索で引く（なければ None）"""
+        target = key.to_bytes(self._key_size, 'big')
+        data, record, size = self._map, self._record, self._key_size
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = _HEADER.size + mid * record
+            found = data[start:start + size]
+            if found < target:
+                lo = mid + 1
+            elif found > target:
+                hi = mid
+            else:
+                return _VALUE.unpack_from(data, start + size)
+        return None
+
+    def probe(self, p, o):
+        """
+        局面の最善手と評価値
+
+        Args:
+            p: 手番側の石
+            o: 相手の石
+
+        Returns:
+            (評価値, 最善手のビット番号)。表になければ None
+        """
+        n = self.n
+        if bitboard.count(p | o) - 4 >= self.plies:
+            return None
+        cp, co, t = symmetry.canonicalize(p, o, n)
+        found = self._lookup((cp << (n * n)) | co)
+        with self._lock:
+            self.probes += 1
+            if found is not None:
+                self.hits += 1
+        if found is None:
+            return None
+        move, score = found
+        return score, symmetry.from_canonical_move(move, t, n)
+
+
+_default = {}
+
+
+def default(n=6):
+    """
+    既定の場所（default_path(n)）の定石。なければ None
+
+    一度開いたものを使い回す（表は読むだけで、引いた回数はロックして数えるので、スレッド間で共有してよい）
+    """
+    if n not in _default:
+        try:
+            book = OpeningBook(default_path(n))
+        except (OSError, ValueError):
+            book = None
+        _default[n] = book if book is None or book.n == n else None
+    return _default[n]
+
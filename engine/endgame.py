@@ -0,0 +1,399 @@
+"""
+終盤の読み切り
+残りの空きマスが少ない局面を最後まで読んで、両者が最善を尽くしたときの終局の石数を求める
+
+Solver は最後まで読んで、終局の石数の差（手番側 - 相手側）と最善手を求める。
+    - 偶数理論（パリティ）: 空きマスが奇数個残っている区画（盤を4つに分けたもの）の手から調べる
+    - 速さ優先（fastest-first）: 空きが多いうちは、打ったあと相手の合法手が少なくなる手から調べる
+    - 勝敗だけを知りたいときは窓を (-1, 1) に狭めて読む（WLD、石数の差まで読むより速い）
+
+使い方:
+    score, sq = best_move(p, o, n)              # 石数の差と最善手
+    result, sq = best_move(p, o, n, mode=WLD)   # 1: 勝ち, 0: 引き分け, -1: 負け
+    for entry in score_record(parse_record("f5d6c3d3c4"), 8):   # 棋譜の終盤を採点
+        print(entry)
+"""
+
+import time
+from functools import lru_cache
+
+from . import bitboard, stability
+
+# 確定石で打ち切るのは空きマスがこれ以下のとき（Solver.final_counts ですぐ読み切れる数）
+EXACT_EMPTIES = 8
+
+# 盤面サイズごとの、AI が読み切りに切り替える空きマスの数（score_record の既定値も同じ）
+# （αβ探索AI の持ち時間 0.05 秒の半分でたいてい勝敗まで読み切れる数。表にないサイズは 8）
+SOLVE_EMPTIES = {4: 16, 6: 12, 8: 10}
+
+# これより空きマスが多いときは速さ優先（相手の合法手の少ない順）で並べる
+FASTEST_FIRST_EMPTIES = 6
+
+# 読み方
+EXACT = 'exact'  # 石数の差まで
+WLD = 'wld'      # 勝ち・引き分け・負けだけ
+
+
+def solve_empties(n):
+    """盤面サイズ n で読み切りに切り替える空きマスの数"""
+    return SOLVE_EMPTIES.get(n, 8)
+
+
+class SolveTimeout(Exception):
+    """読み切りが制限時間に間に合わなかった"""
+
+
+@lru_cache(maxsize=None)
+def _quadrants(n):
+    """盤を縦横半分に分けた4つの区画のマスク"""
+    half = n // 2
+    masks = []
+    for qy in (0, half):
+        for qx in (0, half):
+            mask = 0
+            for y in range(qy, qy + half):
+                for x in range(qx, qx + half):
+                    mask |= 1 << (y * n + x)
+            masks.append(mask)
+    return tuple(masks)
+
+
+class Solver:
+    """
+    最後まで読んで石数の差を求める
+
+    終局の石数の差は、空きマスが残って終わった場合も空きマスを数えない
+    （run_match と同じ数え方）。
+    """
+
+    def __init__(self, n, deadline=None):
+        """
+        Args:
+            n: 盤面の一辺のマス数
+            deadline: time.perf_counter() の値でこの時刻を過ぎたら SolveTimeout（省略時は制限なし）
+        """
+        self.n = n
+        self.full = (1 << (n * n)) - 1
+        self.quadrants = _quadrants(n)
+        self.deadline = deadline
+        self.nodes = 0
+
+    def solve(self, p, o, alpha=None, beta=None):
+        """
+        石数の差（手番側 - 相手側）
+
+        Args:
+            p: 手番側の石
+            o: 相手の石
+            alpha, beta: 窓（省略時は全範囲）。窓の外なら値はその側の境界（fail-soft）
+
+        Returns:
+            石数の差
+        """
+        cells = self.n * self.n
+        if alpha is None:
+            alpha = -cells
+        if beta is None:
+            beta = cells
+        return self._solve(p, o, alpha, beta, False)
+
+    def _ordered(self, p, o, moves):
+        """調べる順に並べた合法手"""
+        n = self.n
+        empty = self.full & ~(p | o)
+        odd = 0
+        for region in self.quadrants:
+            if bitboard.count(empty & region) & 1:
+                odd |= region
+        if bitboard.count(empty) > FASTEST_FIRST_EMPTIES:
+            # 打ったあとの相手の合法手が少ない順、同じなら奇数区画の手から
+            keyed = []
+            for sq, flipped in moves:
+                mobility = bitboard.count(bitboard.legal_moves(o & ~flipped, p | flipped | (1 << sq), n))
+                keyed.append((mobility, not (odd >> sq) & 1, sq, flipped))
+            keyed.sort()
+            return [(sq, flipped) for _, _, sq, flipped in keyed]
+        # 奇数区画の手から（同じ区画どうしは元の順）
+        return ([move for move in moves if (odd >> move[0]) & 1]
+                + [move for move in moves if not (odd >> move[0]) & 1])
+
+    def _solve(self, p, o, alpha, beta, passed):
+        self.nodes += 1
+        if self.deadline is not None and time.perf_counter() >= self.deadline:
+            raise SolveTimeout()
+        n = self.n
+        moves = bitboard.generate_moves(p, o, n)
+        if not moves:
+            if passed:
+                return bitboard.count(p) - bitboard.count(o)
+            return -self._solve(o, p, -beta, -alpha, True)
+        if len(moves) > 1:
+            moves = self._ordered(p, o, moves)
+        best = -n * n - 1
+        for sq, flipped in moves:
+            score = -self._solve(o & ~flipped, p | flipped | (1 << sq), -beta, -alpha, False)
+            if score > best:
+                best = score
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+        return best
+
+    def final_counts(self, p, o):
+        """
+        両者が最善を尽くしたときの終局の石数
+
+        石数の差だけでは、空きマスが残って終わる場合に石数が決まらないので、
+        最善手を打って終局まで進める。先へ進むほど空きマスが減るので、
+        かかる時間はほとんど最初の1手の読み切りで決まる。
+
+        Args:
+            p: 手番側の石
+            o: 相手の石
+
+        Returns:
+            (手番側の石数, 相手の石数)
+        """
+        n = self.n
+        swapped = False  # p, o が最初の手番側と入れ替わっているか
+        passed = False
+        while True:
+            if not bitboard.legal_moves(p, o, n):
+                if passed:
+                    break
+                passed = True
+            else:
+                passed = False
+                _, sq = self.best_move(p, o)
+                p, o, _ = bitboard.play(p, o, sq, n)
+            p, o = o, p
+            swapped = not swapped
+        if swapped:
+            p, o = o, p
+        return bitboard.count(p), bitboard.count(o)
+
+    def best_move(self, p, o, mode=EXACT):
+        """
+        最善手と、その手を打ったときの値
+
+        Args:
+            p: 手番側の石
+            o: 相手の石
+            mode: EXACT（石数の差まで）か WLD（勝ち1・引き分け0・負け-1）
+
+        Returns:
+            (値, 最善手のビット番号)。打てなければ (値, None)（パスして読んだ値）
+        """
+        n = self.n
+        cells = n * n
+        moves = bitboard.generate_moves(p, o, n)
+        if mode == WLD:
+            alpha, beta = -1, 1
+        else:
+            alpha, beta = -cells, cells
+        if not moves:
+            score = self.solve(p, o, alpha, beta)
+            return (_sign(score) if mode == WLD else score), None
+        best_score, best_sq = -cells - 1, None
+        for sq, flipped in self._ordered(p, o, moves):
+            score = -self._solve(o & ~flipped, p | flipped | (1 << sq), -beta, -alpha, False)
+            if score > best_score:
+                best_score, best_sq = score, sq
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+        if mode == WLD:
+            best_score = _sign(best_score)
+        return best_score, best_sq
+
+
+def _sign(score):
+    return (score > 0) - (score < 0)
+
+
+def solve(p, o, n):
+    """
+    両者が最善を尽くしたときの終局の石数の差（手番側 - 相手側）
+
+    Args:
+        p: 手番側の石
+        o: 相手の石
+        n: 盤面の一辺のマス数
+    """
+    return Solver(n).solve(p, o)
+
+
+def best_move(p, o, n, mode=EXACT, deadline=None):
+    """
+    最後まで読んだ最善手
+
+    Args:
+        p: 手番側の石
+        o: 相手の石
+        n: 盤面の一辺のマス数
+        mode: EXACT（石数の差まで）か WLD（勝ち1・引き分け0・負け-1）
+        deadline: time.perf_counter() の値で読み切りの締め切り（過ぎたら SolveTimeout）
+
+    Returns:
+        (値, 最善手のビット番号)。打てなければ最善手は None
+    """
+    return Solver(n, deadline).best_move(p, o, mode)
+
+
+def solve_move(p, o, n, max_empties=None):
+    """
+    空きマスが少なければ最後まで読んだ最善手（AIが終盤に読み切りへ切り替えるときに使う）
+
+    Args:
+        p: 手番側の石
+        o: 相手の石
+        n: 盤面の一辺のマス数
+        max_empties: 読み切りに切り替える空きマスの数（省略時は solve_empties(n)、0 で読み切らない）
+
+    Returns:
+        最善手のビット番号。空きマスが多い（または打てない）なら None
+    """
+    if max_empties is None:
+        max_empties = solve_empties(n)
+    if n * n - bitboard.count(p | o) > max_empties:
+        return None
+    return best_move(p, o, n)[1]
+
+
+def final_counts(p, o, n):
+    """
+    両者が最善を尽くしたとき（石数の差を最大にするように打つとき）の終局の石数
+
+    Args:
+        p: 手番側の石
+        o: 相手の石
+        n: 盤面の一辺のマス数
+
+    Returns:
+        (手番側の石数, 相手の石数)
+    """
+    return Solver(n).final_counts(p, o)
+
+
+def greedy_move(p, o, n):
+    """いちばん多くひっくり返せる手（同じならビット番号の小さい手）。打てなければ None"""
+    best = None
+    best_count = 0
+    for sq, flipped in bitboard.generate_moves(p, o, n):
+        count = bitboard.count(flipped)
+        if count > best_count:
+            best, best_count = (sq, flipped), count
+    return best
+
+
+def adjudicate(black, white, stone, n, exact_empties=EXACT_EMPTIES):
+    """
+    確定石だけで勝敗が決まっていれば、そこから最後まで読み切った終局の石数を返す
+
+    読み切り（Solver.final_counts）に時間がかからないよう、空きマスが
+    exact_empties 以下になるまでは打ち切らない。返す石数は両者が最善を尽くした
+    ときのもので、勝敗は確定石で決まっているので実際に打ち続けた場合と変わらないが、
+    石数は実際の対局の手順によっては違うことがある。
+
+    Args:
+        black, white: ビットボード
+        stone: 手番の石の色 (1: 黒, 2: 白)
+        n: 盤面の一辺のマス数
+        exact_empties: 打ち切る（読み切る）空きマスの数の上限
+
+    Returns:
+        (黒の石数, 白の石数)。まだ決まっていない（または空きマスが多い）なら None
+    """
+    if n * n - bitboard.count(black | white) > exact_empties:
+        return None
+    if stability.decided(black, white, n) is None:
+        return None
+    if stone == bitboard.BLACK:
+        return final_counts(black, white, n)
+    white_count, black_count = final_counts(white, black, n)
+    return black_count, white_count
+
+
+def parse_record(text, n=8):
+    """
+    "f5d6c3..." の形の棋譜を座標のリストにする
+
+    列は a から、行は 1 から数える（a1 が左上）。大文字でもよく、空白は無視する。
+
+    Returns:
+        [(x, y), ...]
+    """
+    text = ''.join(text.split()).lower()
+    moves = []
+    i = 0
+    while i < len(text):
+        x = ord(text[i]) - ord('a')
+        j = i + 1
+        while j < len(text) and text[j].isdigit():
+            j += 1
+        if not 0 <= x < n or j == i + 1:
+            raise ValueError(f"棋譜を読めません: {text[i:j + 1]!r}")
+        y = int(text[i + 1:j]) - 1
+        if not 0 <= y < n:
+            raise ValueError(f"棋譜を読めません: {text[i:j]!r}")
+        moves.append((x, y))
+        i = j
+    return moves
+
+
+def score_record(moves, n=8, max_empties=None, table=None):
+    """
+    棋譜の終盤の各手を、最後まで読んだ値で採点する
+
+    初期配置から moves の順に打ち（打てない手番は自動でパスする）、
+    空きマスが max_empties 以下になった局面ごとに、最善手と実際の手の値を求める。
+
+    Args:
+        moves: [(x, y), ...]（parse_record の結果など）
+        n: 盤面の一辺のマス数
+        max_empties: 読み切る空きマスの数（省略時は solve_empties(n)）
+        table: 終盤の局面表（engine.tablebase.Tablebase）。表にある局面は読み切らずに引く
+
+    Returns:
+        [{'ply': 何手目（0始まり）, 'stone': 手番, 'move': 打った手 (x, y),
+          'best': 最善手 (x, y), 'best_score': 最善の石数の差,
+          'score': 打った手の石数の差, 'loss': 最善との差}, ...]
+        石数の差は打った側から見た値
+
+    Raises:
+        ValueError: 打てない手が棋譜にある場合
+    """
+    if max_empties is None:
+        max_empties = solve_empties(n)
+    black, white = bitboard.initial(n)
+    p, o, stone = black, white, bitboard.BLACK
+    solver = Solver(n)
+    results = []
+    for ply, (x, y) in enumerate(moves):
+        if not bitboard.legal_moves(p, o, n):
+            p, o, stone = o, p, 3 - stone  # パス
+        sq = y * n + x
+        flipped = bitboard.flips(p, o, sq, n) if 0 <= x < n and 0 <= y < n else 0
+        if not flipped:
+            raise ValueError(f"{ply + 1}手目の {(x, y)} には打てません")
+        if n * n - bitboard.count(p | o) <= max_empties:
+            found = None if table is None or table.n != n else table.best_move(p, o)
+            if found is not None:
+                best_score, best_sq = found
+                score = -table.probe(o & ~flipped, p | flipped | (1 << sq))
+            else:
+                best_score, best_sq = solver.best_move(p, o)
+                score = -solver.solve(o & ~flipped, p | flipped | (1 << sq))
+            results.append({
+                'ply': ply,
+                'stone': stone,
+                'move': (x, y),
+                'best': bitboard.coords(best_sq, n),
+                'best_score': best_score,
+                'score': score,
+                'loss': best_score - score,
+            })
+        p, o, stone = o & ~flipped, p | flipped | (1 << sq), 3 - stone
+    return results
@@ -0,0 +1,136 @@
+"""
+差分更新する評価関数
+石数の差と、マスごとの重み（位置評価スコア）の合計の差を、着手のたびに差分で更新する
+
+重みの表（WeightTable）は盤面サイズごとに1回だけ作って使い回す。
+1手で変わるのは打ったマスとひっくり返した石だけなので、その分の重みを足し引きすれば
+評価値を最初から数え直さなくてよい。末端の局面の評価は属性を読むだけ（O(1)）になる。
+
+使い方:
+    weights = WeightTable(position_scores, n)   # サイズごとに1回だけ
+    state = EvaluatedState.from_board(board, stone, weights)
+    for sq, flipped in state.generate_moves():
+        state.make(sq, flipped)
+        score = state.evaluate(stone)   # 位置評価スコアの差（stone から見た値）
+        state.unmake()
+"""
+
+from . import bitboard
+from .bitboard import BLACK
+from .state import GameState
+
+
+class WeightTable:
+    """盤面サイズごとのマスの重みの表"""
+
+    def __init__(self, weights, n):
+        """
+        Args:
+            weights: 1次元に並べた重み（weights[y * n + x]）か、2次元リストの重み
+            n: 盤面の一辺のマス数
+        """
+        if weights and isinstance(weights[0], (list, tuple)):
+            weights = [w for row in weights for w in row]
+        if len(weights) != n * n:
+            raise ValueError(f"重みの数が {n}x{n} の盤面と合いません: {len(weights)}")
+        self.n = n
+        self.weights = tuple(weights)
+        # 8マスごとの重みの合計（マスクの重みの合計を8ビットずつまとめて引く）
+        self._chunks = []
+        for start in range(0, n * n, 8):
+            part = self.weights[start:start + 8]
+            table = [0] * 256
+            for byte in range(1, 256):
+                low = byte & -byte
+                bit = low.bit_length() - 1
+                table[byte] = table[byte ^ low] + (part[bit] if bit < len(part) else 0)
+            self._chunks.append(table)
+
+    def score(self, mask):
+        """mask の石の重みの合計"""
+        total = 0
+        for table in self._chunks:
+            total += table[mask & 0xFF]
+            mask >>= 8
+        return total
+
+    def flipped_score(self, flipped):
+        """
+        ひっくり返した石の重みの合計（数個しかないので1つずつ足す）
+        """
+        weights = self.weights
+        total = 0
+        while flipped:
+            low = flipped & -flipped
+            total += weights[low.bit_length() - 1]
+            flipped ^= low
+        return total
+
+
+class EvaluatedState(GameState):
+    """
+    石数の差（material）と重みの合計の差（weighted）を着手ごとに差分更新する局面
+
+    どちらも手番側から見た値（手番側 - 相手側）で持つ。
+    着手前の値は履歴と一緒に保存するので、unmake は O(1) で戻る。
+    重みを渡さなければ石数の差だけを更新する（weighted は 0 のまま）。
+    """
+
+    def __init__(self, black, white, stone=BLACK, n=8, weights=None):
+        """
+        Args:
+            black, white: ビットボード
+            stone: 手番の石の色 (1: 黒, 2: 白)
+            n: 盤面の一辺のマス数
+            weights: WeightTable（省略時は石数の差だけを更新する）
+        """
+        super().__init__(black, white, stone, n)
+        if weights is not None and weights.n != n:
+            raise ValueError(f"重みの表の大きさ {weights.n}x{weights.n} が盤面と合いません")
+        self.weights = weights
+        self.material = bitboard.count(self.p) - bitboard.count(self.o)
+        self.weighted = 0 if weights is None else weights.score(self.p) - weights.score(self.o)
+        self._scores = []  # 着手前の (material, weighted)
+
+    @classmethod
+    def from_board(cls, board, stone, weights=None):
+        """2次元リストの盤面から局面を作る"""
+        black, white = bitboard.pack(board)
+        return cls(black, white, stone, len(board), weights)
+
+    @classmethod
+    def initial(cls, n=6, weights=None):
+        """初期配置（黒番）の局面を作る"""
+        black, white = bitboard.initial(n)
+        return cls(black, white, BLACK, n, weights)
+
+    def evaluate(self, stone):
+        """stone から見た重みの合計の差"""
+        return self.weighted if stone == self.stone else -self.weighted
+
+    def disc_difference(self, stone):
+        """stone から見た石数の差"""
+        return self.material if stone == self.stone else -self.material
+
+    def make(self, sq, flipped=None):
+        flipped = super().make(sq, flipped)
+        material, weighted = self.material, self.weighted
+        self._scores.append((material, weighted))
+        # 打った石と、相手から自分に移った石（2倍）の分だけ増え、手番が入れ替わる
+        self.material = -(material + 1 + 2 * bitboard.count(flipped))
+        weights = self.weights
+        if weights is not None:
+            weighted += weights.weights[sq] + 2 * weights.flipped_score(flipped)
+        self.weighted = -weighted
+        return flipped
+
+    def make_pass(self):
+        super().make_pass()
+        self._scores.append((self.material, self.weighted))
+        self.material, self.weighted = -self.material, -self.weighted
+
+    def unmake(self):
+        sq = super().unmake()
+        self.material, self.weighted = self._scores.pop()
+        return sq
+
@@ -0,0 +1,175 @@
+"""
+1次元メールボックス盤面
+N×N の盤面を、周りを番兵（WALL）で1周囲んだ (N+2)×(N+2) の1次元配列で表す
+
+マス (x, y) は添字 (y + 1) * (N + 2) + (x + 1) に対応し、8方向はそれぞれ
+添字に足す1つの整数（オフセット）になる。盤の外は必ず番兵に当たるので、
+半直線をたどるときに 0 <= x < N のような範囲チェックがいらない。
+
+ビット演算を使わずに速いAIを書きたいときに使う。
+2次元リストの盤面とは to_mailbox / from_mailbox で相互に変換できる。
+
+使い方:
+    cells = to_mailbox(board)
+    n = len(board)
+    for i in legal_moves(cells, stone, n):
+        flipped = play(cells, stone, i, n)   # その場で打つ
+        ...
+        undo(cells, stone, i, flipped)       # 元に戻す
+"""
+
+from array import array
+from functools import lru_cache
+
+from .bitboard import EMPTY
+
+WALL = 3  # 盤の外（番兵）
+
+
+@lru_cache(maxsize=None)
+def directions(n):
+    """
+    8方向のオフセット（サイズごとに1回だけ計算する）
+
+    Returns:
+        (offset, ...)
+    """
+    w = n + 2
+    return (-w - 1, -w, -w + 1, -1, 1, w - 1, w, w + 1)
+
+
+@lru_cache(maxsize=None)
+def playable(n):
+    """盤の内側のマスの添字（y, x の順に小さい方から）"""
+    w = n + 2
+    return tuple((y + 1) * w + (x + 1) for y in range(n) for x in range(n))
+
+
+def index(x, y, n):
+    """座標 (x, y) を添字に変換する"""
+    return (y + 1) * (n + 2) + (x + 1)
+
+
+def coords(i, n):
+    """添字を座標 (x, y) に変換する"""
+    w = n + 2
+    return i % w - 1, i // w - 1
+
+
+def to_mailbox(board):
+    """
+    2次元リストの盤面をメールボックスに変換する
+
+    Args:
+        board: 2次元配列のオセロボード
+
+    Returns:
+        array('b')
+    """
+    n = len(board)
+    w = n + 2
+    cells = array('b', [WALL]) * (w * w)
+    for y, row in enumerate(board):
+        start = (y + 1) * w + 1
+        cells[start:start + n] = array('b', row)
+    return cells
+
+
+def from_mailbox(cells, n):
+    """
+    メールボックスを2次元リストの盤面に変換する
+
+    Args:
+        cells: メールボックス
+        n: 盤面の一辺のマス数
+
+    Returns:
+        2次元配列のオセロボード
+    """
+    w = n + 2
+    return [cells[(y + 1) * w + 1:(y + 1) * w + 1 + n].tolist() for y in range(n)]
+
+
+def flips(cells, stone, i, n):
+    """
+    添字 i に打ったときにひっくり返る石を求める
+
+    Args:
+        cells: メールボックス
+        stone: 手番の石の色 (1: 黒, 2: 白)
+        i: 打つマスの添字
+        n: 盤面の一辺のマス数
+
+    Returns:
+        ひっくり返る石の添字のリスト（置けない場合は []）
+    """
+    if cells[i] != EMPTY:
+        return []
+    opponent = 3 - stone
+    flipped = []
+    for d in directions(n):
+        j = i + d
+        if cells[j] != opponent:
+            continue
+        run = []
+        while cells[j] == opponent:
+            run.append(j)
+            j += d
+        if cells[j] == stone:
+            flipped.extend(run)
+    return flipped
+
+
+def can_place(cells, stone, i, n):
+    """添字 i に打てるかどうか（見つかった時点で打ち切る）"""
+    if cells[i] != EMPTY:
+        return False
+    opponent = 3 - stone
+    for d in directions(n):
+        j = i + d
+        if cells[j] != opponent:
+            continue
+        j += d
+        while cells[j] == opponent:
+            j += d
+        if cells[j] == stone:
+            return True
+    return False
+
+
+def legal_moves(cells, stone, n):
+    """
+    合法手の添字のリスト（y, x の順に小さい方から）
+    """
+    return [i for i in playable(n) if can_place(cells, stone, i, n)]
+
+
+def play(cells, stone, i, n):
+    """
+    添字 i に打って石をひっくり返す（cells をその場で書き換える）
+
+    Returns:
+        ひっくり返した石の添字のリスト（置けない場合は [] で、盤面はそのまま）
+    """
+    flipped = flips(cells, stone, i, n)
+    if flipped:
+        cells[i] = stone
+        for j in flipped:
+            cells[j] = stone
+    return flipped
+
+
+def undo(cells, stone, i, flipped):
+    """
+    play で打った手を元に戻す
+
+    Args:
+        cells: メールボックス
+        stone: 打った石の色
+        i: 打ったマスの添字
+        flipped: play が返したひっくり返した石の添字のリスト
+    """
+    cells[i] = EMPTY
+    opponent = 3 - stone
+    for j in flipped:
+        cells[j] = opponent
@@ -0,0 +1,132 @@
+"""
+不変の局面オブジェクト
+石の配置（ビットボード）と手番だけを持つ、小さくて変更できない局面
+
+辞書のキーやキャッシュ、プロセス間のやりとりで盤面を受け渡すためのもの。
+2次元リストの盤面と違ってコピーする必要がなく、等価比較とハッシュは
+整数の比較だけで済む。ハッシュ値は作ったときに1回だけ計算して持っておく。
+pickle すると数十バイトになる。
+"""
+
+from . import bitboard, zobrist
+from .bitboard import BLACK
+
+
+class Position:
+    """ビットボードと手番からなる不変の局面"""
+
+    __slots__ = ('black', 'white', 'stone', 'n', '_hash')
+
+    def __init__(self, black, white, stone=BLACK, n=8):
+        """
+        Args:
+            black, white: ビットボード
+            stone: 手番の石の色 (1: 黒, 2: 白)
+            n: 盤面の一辺のマス数
+        """
+        set_ = object.__setattr__
+        set_(self, 'black', black)
+        set_(self, 'white', white)
+        set_(self, 'stone', stone)
+        set_(self, 'n', n)
+        set_(self, '_hash', hash((black, white, stone, n)))
+
+    @classmethod
+    def from_board(cls, board, stone):
+        """2次元リストの盤面から局面を作る"""
+        black, white = bitboard.pack(board)
+        return cls(black, white, stone, len(board))
+
+    @classmethod
+    def from_state(cls, state):
+        """GameState の現在の局面から作る"""
+        return cls(state.black, state.white, state.stone, state.n)
+
+    @classmethod
+    def initial(cls, n=6):
+        """初期配置（黒番）の局面を作る"""
+        black, white = bitboard.initial(n)
+        return cls(black, white, BLACK, n)
+
+    def to_board(self):
+        """2次元リストの盤面に変換する"""
+        return bitboard.unpack(self.black, self.white, self.n)
+
+    def to_state(self, cls=None):
+        """
+        make/unmake できる局面に変換する
+
+        Args:
+            cls: 作る局面のクラス（省略時は GameState）
+        """
+        if cls is None:
+            from .state import GameState as cls
+        return cls(self.black, self.white, self.stone, self.n)
+
+    @property
+    def p(self):
+        """手番側の石"""
+        return self.black if self.stone == BLACK else self.white
+
+    @property
+    def o(self):
+        """相手の石"""
+        return self.white if self.stone == BLACK else self.black
+
+    def key(self):
+        """局面の Zobrist キー（GameState.key と同じ値）"""
+        return zobrist.position_key(self.black, self.white, self.stone, self.n)
+
+    def canonical(self):
+        """
+        対称な8通りの局面のうち正規形のものを返す
+
+        Returns:
+            (position, t): 正規形の局面と、この局面を正規形に移す変換（engine.symmetry を参照）
+        """
+        from .symmetry import canonical_position
+        return canonical_position(self)
+
+    def legal_moves(self):
+        """手番側の合法手のマスク"""
+        return bitboard.legal_moves(self.p, self.o, self.n)
+
+    def play(self, sq):
+        """
+        sq に打った後の局面を返す（自分自身は変わらない）
+
+        Returns:
+            着手後の局面（置けない場合は None）
+        """
+        p, o, flipped = bitboard.play(self.p, self.o, sq, self.n)
+        if not flipped:
+            return None
+        if self.stone == BLACK:
+            return Position(p, o, 3 - self.stone, self.n)
+        return Position(o, p, 3 - self.stone, self.n)
+
+    def passed(self):
+        """パスした後の局面"""
+        return Position(self.black, self.white, 3 - self.stone, self.n)
+
+    def __eq__(self, other):
+        if not isinstance(other, Position):
+            return NotImplemented
+        return (self._hash == other._hash and self.black == other.black and self.white == other.white
+                and self.stone == other.stone and self.n == other.n)
+
+    def __hash__(self):
+        return self._hash
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Position は変更できません")
+
+    def __delattr__(self, name):
+        raise AttributeError("Position は変更できません")
+
+    def __reduce__(self):
+        # ハッシュ値は保存せず、復元時に計算し直す
+        return (Position, (self.black, self.white, self.stone, self.n))
+
+    def __repr__(self):
+        return f"Position(black={self.black:#x}, white={self.white:#x}, stone={self.stone}, n={self.n})"
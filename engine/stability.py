@@ -0,0 +1,118 @@
+"""
+確定石の計算
+この先どう打ってもひっくり返されることのない石（確定石）を求める
+
+縦・横・2つの斜めの4本の直線それぞれについて、次のどれかを満たす石は
+その直線の向きではひっくり返されない。
+    - その直線が端から端まで埋まっている（打てる空きマスがない）
+    - 直線の片側の隣が盤の外か、同じ色の確定石
+4本すべてで満たす石が確定石。角から順に、確定石が増えなくなるまで繰り返す。
+すべての確定石を見つけるわけではない（少なめに見積もる）が、見つけた石は必ず確定している。
+"""
+
+from functools import lru_cache
+
+from . import bitboard
+
+# 4本の直線の向き（それぞれ逆向きと対にして使う）
+_AXES = ((1, 0), (0, 1), (1, 1), (1, -1))
+
+
+@lru_cache(maxsize=None)
+def _tables(n):
+    """
+    盤面サイズごとの表（サイズごとに1回だけ計算する）
+
+    Returns:
+        [(lines, forward, backward), ...]（4本の直線の向きごと）
+        lines: その向きの直線（盤の端から端まで）のマスクのリスト
+        forward, backward: (shift, edge)
+            shift: 隣のマスへのビット番号の差
+            edge: その向きの隣が盤の外になるマス
+    """
+    full = (1 << (n * n)) - 1
+    tables = []
+    for dx, dy in _AXES:
+        lines = []
+        for sq in range(n * n):
+            x, y = sq % n, sq // n
+            # 直線の始点（逆向きに1歩戻ると盤の外になるマス）からだけ直線を作る
+            if 0 <= x - dx < n and 0 <= y - dy < n:
+                continue
+            mask = 0
+            while 0 <= x < n and 0 <= y < n:
+                mask |= 1 << (y * n + x)
+                x += dx
+                y += dy
+            lines.append(mask)
+        sides = []
+        for sx, sy in ((dx, dy), (-dx, -dy)):
+            edge = 0
+            for sq in range(n * n):
+                x, y = sq % n + sx, sq // n + sy
+                if not (0 <= x < n and 0 <= y < n):
+                    edge |= 1 << sq
+            sides.append((sy * n + sx, edge))
+        tables.append((lines, sides[0], sides[1]))
+    return full, tables
+
+
+def _neighbour_in(mask, shift, edge, full):
+    """隣（ビット番号が shift だけ違うマス）が mask に含まれるマス"""
+    if shift > 0:
+        return (mask >> shift) & ~edge
+    return (mask << -shift) & ~edge & full
+
+
+def stable_discs(p, o, n):
+    """
+    手番側（p）の確定石を求める
+
+    Args:
+        p: 確定石を求める側の石
+        o: 相手の石
+        n: 盤面の一辺のマス数
+
+    Returns:
+        確定石のマスク
+    """
+    full, tables = _tables(n)
+    occupied = p | o
+
+    # 向きごとに、直線がすべて埋まっているか盤の端に接しているマス
+    safe = []
+    for lines, (f_shift, f_edge), (b_shift, b_edge) in tables:
+        filled = f_edge | b_edge
+        for line in lines:
+            if occupied & line == line:
+                filled |= line
+        safe.append(filled)
+
+    stable = 0
+    while True:
+        grown = p
+        for (lines, (f_shift, f_edge), (b_shift, b_edge)), filled in zip(tables, safe):
+            grown &= (filled
+                      | _neighbour_in(stable, f_shift, f_edge, full)
+                      | _neighbour_in(stable, b_shift, b_edge, full))
+            if not grown:
+                return stable
+        if grown == stable:
+            return stable
+        stable = grown
+
+
+def decided(black, white, n):
+    """
+    確定石だけで勝敗が決まっているかを調べる
+
+    Returns:
+        1: 黒の勝ちが確定, 2: 白の勝ちが確定, None: まだ決まっていない
+    """
+    half = n * n // 2
+    # 確定石は自分の石の一部なので、石が半分以下の側は調べなくてよい
+    if bitboard.count(black) > half and bitboard.count(stable_discs(black, white, n)) > half:
+        return 1
+    if bitboard.count(white) > half and bitboard.count(stable_discs(white, black, n)) > half:
+        return 2
+    return None
@@ -0,0 +1,159 @@
+"""
+探索用の局面クラス
+ビットボードと手番を持ち、make で1手進め、unmake で1手戻す
+
+探索では試す手ごとに盤面をコピーする代わりに、
+make → 評価 → unmake を繰り返す。
+着手ごとにひっくり返した石のマスクを履歴に積むので、
+unmake はその分を元に戻すだけで済む。
+局面の Zobrist キー（key）も着手のたびに差分で更新する。
+"""
+
+from . import bitboard, zobrist
+from .bitboard import BLACK
+from .position import Position
+
+PASS = -1
+
+
+class GameState:
+    """make/unmake で進めたり戻したりできる局面"""
+
+    def __init__(self, black, white, stone=BLACK, n=8):
+        """
+        Args:
+            black, white: ビットボード
+            stone: 手番の石の色 (1: 黒, 2: 白)
+            n: 盤面の一辺のマス数
+        """
+        self.n = n
+        self.stone = stone
+        if stone == BLACK:
+            self.p, self.o = black, white
+        else:
+            self.p, self.o = white, black
+        self._zobrist = zobrist.table(n)
+        self.key = self._zobrist.key(black, white, stone)  # 局面の Zobrist キー
+        self.history = []  # [(sq, flipped, 着手前のkey), ...] パスは sq = PASS
+
+    @classmethod
+    def from_board(cls, board, stone):
+        """2次元リストの盤面から局面を作る"""
+        black, white = bitboard.pack(board)
+        return cls(black, white, stone, len(board))
+
+    @classmethod
+    def initial(cls, n=6):
+        """初期配置（黒番）の局面を作る"""
+        black, white = bitboard.initial(n)
+        return cls(black, white, BLACK, n)
+
+    @property
+    def black(self):
+        return self.p if self.stone == BLACK else self.o
+
+    @property
+    def white(self):
+        return self.o if self.stone == BLACK else self.p
+
+    def to_board(self):
+        """2次元リストの盤面に変換する"""
+        return bitboard.unpack(self.black, self.white, self.n)
+
+    def position(self):
+        """現在の局面を不変の Position として返す"""
+        return Position(self.black, self.white, self.stone, self.n)
+
+    def square(self, x, y):
+        """座標 (x, y) をビット番号に変換する"""
+        return y * self.n + x
+
+    def coords(self, sq):
+        """ビット番号を座標 (x, y) に変換する"""
+        return sq % self.n, sq // self.n
+
+    def count(self, stone):
+        """指定した色の石の数"""
+        return bitboard.count(self.p if stone == self.stone else self.o)
+
+    def empties(self):
+        """空きマスの数"""
+        return self.n * self.n - bitboard.count(self.p | self.o)
+
+    def legal_moves(self):
+        """手番側の合法手のマスク"""
+        return bitboard.legal_moves(self.p, self.o, self.n)
+
+    def opponent_moves(self):
+        """相手側の合法手のマスク"""
+        return bitboard.legal_moves(self.o, self.p, self.n)
+
+    def moves(self):
+        """手番側の合法手のビット番号のリスト（小さい順）"""
+        return list(bitboard.squares(self.legal_moves()))
+
+    def generate_moves(self):
+        """
+        手番側の合法手と、それぞれの手でひっくり返る石
+
+        Returns:
+            [(sq, flipped), ...]（ビット番号の小さい順）
+            flipped はそのまま make(sq, flipped) に渡せる
+        """
+        return bitboard.generate_moves(self.p, self.o, self.n)
+
+    def flips(self, sq):
+        """sq に打ったときにひっくり返る石のマスク（置けない場合は 0）"""
+        return bitboard.flips(self.p, self.o, sq, self.n)
+
+    def is_game_over(self):
+        """両者とも打てなければ終局"""
+        return not self.legal_moves() and not self.opponent_moves()
+
+    def make(self, sq, flipped=None):
+        """
+        sq に打って手番を交代する
+
+        Args:
+            sq: 打つマスのビット番号
+            flipped: ひっくり返る石のマスク（generate_moves で求めたもの）。
+                     渡せば求め直さない。省略時はここで求める
+
+        Returns:
+            ひっくり返した石のマスク
+
+        Raises:
+            ValueError: sq に置けない場合
+        """
+        if flipped is None:
+            flipped = bitboard.flips(self.p, self.o, sq, self.n)
+        if not flipped:
+            raise ValueError(f"そこには置けません: {self.coords(sq)}")
+        self.history.append((sq, flipped, self.key))
+        self.key = self._zobrist.after_move(self.key, self.stone, sq, flipped)
+        self.p, self.o = self.o & ~flipped, self.p | flipped | (1 << sq)
+        self.stone = 3 - self.stone
+        return flipped
+
+    def make_pass(self):
+        """パスして手番を交代する"""
+        self.history.append((PASS, 0, self.key))
+        self.key = self._zobrist.after_pass(self.key)
+        self.p, self.o = self.o, self.p
+        self.stone = 3 - self.stone
+
+    def unmake(self):
+        """
+        直前の make / make_pass を取り消す
+
+        Returns:
+            取り消した手のビット番号（パスなら PASS）
+        """
+        sq, flipped, self.key = self.history.pop()
+        if sq == PASS:
+            self.p, self.o = self.o, self.p
+        else:
+            self.p, self.o = self.o & ~(flipped | (1 << sq)), self.p | flipped
+        self.stone = 3 - self.stone
+        return sq
+
@@ -0,0 +1,171 @@
+"""
+盤面の対称変換（回転・反転の8通り）
+対称な局面を1つの代表（正規形）にまとめる
+
+オセロの局面は90度ずつの回転と裏返しで最大8通りの同じ形になる。
+定石や置換表、結果のキャッシュを正規形のキーで引けば、
+対称な局面どうしで同じエントリを使い回せる。
+
+マスクの変換は、ビットボードを8ビットずつに区切り、区切りごとの
+変換結果を事前に表にしておいて OR でつなげる（表は盤面サイズごとに1回だけ作る）。
+"""
+
+from functools import lru_cache
+
+IDENTITY = 0
+ROTATE_90 = 1
+ROTATE_180 = 2
+ROTATE_270 = 3
+FLIP_X = 4          # 左右反転
+FLIP_Y = 5          # 上下反転
+TRANSPOSE = 6       # 左上-右下の対角線で反転
+ANTI_TRANSPOSE = 7  # 右上-左下の対角線で反転
+
+TRANSFORMS = range(8)
+
+# 各変換の逆変換
+_INVERSE = (IDENTITY, ROTATE_270, ROTATE_180, ROTATE_90, FLIP_X, FLIP_Y, TRANSPOSE, ANTI_TRANSPOSE)
+
+
+def inverse(t):
+    """変換 t の逆変換"""
+    return _INVERSE[t]
+
+
+def transform_coords(x, y, t, n):
+    """
+    座標 (x, y) を変換 t で移した座標を返す
+
+    Args:
+        x, y: 座標
+        t: 変換の番号 (0〜7)
+        n: 盤面の一辺のマス数
+
+    Returns:
+        (x, y)
+    """
+    m = n - 1
+    if t == IDENTITY:
+        return x, y
+    if t == ROTATE_90:
+        return m - y, x
+    if t == ROTATE_180:
+        return m - x, m - y
+    if t == ROTATE_270:
+        return y, m - x
+    if t == FLIP_X:
+        return m - x, y
+    if t == FLIP_Y:
+        return x, m - y
+    if t == TRANSPOSE:
+        return y, x
+    return m - y, m - x
+
+
+@lru_cache(maxsize=None)
+def _square_tables(n):
+    """各変換でのマスの移り先 squares[t][sq]（サイズごとに1回だけ計算する）"""
+    tables = []
+    for t in TRANSFORMS:
+        table = []
+        for sq in range(n * n):
+            x, y = transform_coords(sq % n, sq // n, t, n)
+            table.append(y * n + x)
+        tables.append(table)
+    return tables
+
+
+@lru_cache(maxsize=None)
+def _chunk_tables(n):
+    """
+    8ビットごとの変換表 chunks[t][c][v]（サイズごとに1回だけ計算する）
+    c 番目の8ビットが v のとき、変換後にどのビットが立つかのマスク
+    """
+    squares = _square_tables(n)
+    size = n * n
+    tables = []
+    for t in TRANSFORMS:
+        per_chunk = []
+        for c in range(0, size, 8):
+            entries = [0] * 256
+            for v in range(1, 256):
+                low = v & -v
+                bit = low.bit_length() - 1
+                sq = c + bit
+                moved = 1 << squares[t][sq] if sq < size else 0
+                entries[v] = entries[v ^ low] | moved
+            per_chunk.append(entries)
+        tables.append(per_chunk)
+    return tables
+
+
+def transform_square(sq, t, n):
+    """ビット番号 sq を変換 t で移したビット番号"""
+    return _square_tables(n)[t][sq]
+
+
+def transform_mask(mask, t, n):
+    """
+    ビットボードを変換 t で移す
+
+    Args:
+        mask: ビットボード
+        t: 変換の番号 (0〜7)
+        n: 盤面の一辺のマス数
+
+    Returns:
+        変換後のビットボード
+    """
+    if t == IDENTITY:
+        return mask
+    result = 0
+    for entries in _chunk_tables(n)[t]:
+        if mask & 0xFF:
+            result |= entries[mask & 0xFF]
+        mask >>= 8
+    return result
+
+
+def canonicalize(black, white, n):
+    """
+    8通りの対称形のうち、(黒, 白) が最小になるものを正規形として返す
+
+    Args:
+        black, white: ビットボード
+        n: 盤面の一辺のマス数
+
+    Returns:
+        (black, white, t): 正規形のビットボードと、元の局面を正規形に移す変換
+    """
+    best = (black, white, IDENTITY)
+    for t in range(1, 8):
+        b = transform_mask(black, t, n)
+        if b > best[0]:
+            continue
+        w = transform_mask(white, t, n)
+        if (b, w) < best[:2]:
+            best = (b, w, t)
+    return best
+
+
+def canonical_position(position):
+    """
+    Position を正規形にする
+
+    Returns:
+        (position, t): 正規形の局面と、元の局面を正規形に移す変換
+    """
+    black, white, t = canonicalize(position.black, position.white, position.n)
+    if t == IDENTITY:
+        return position, t
+    return type(position)(black, white, position.stone, position.n), t
+
+
+def to_canonical_move(sq, t, n):
+    """元の局面での手 sq を、変換 t で移した正規形の局面での手に直す"""
+    return _square_tables(n)[t][sq]
+
+
+def from_canonical_move(sq, t, n):
+    """正規形の局面での手 sq を、元の局面（変換 t で正規形に移したもの）での手に戻す"""
+    return _square_tables(n)[_INVERSE[t]][sq]
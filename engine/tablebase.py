@@ -0,0 +1,359 @@
+"""
+終盤の局面表（テーブルベース）
+空きマスが K 個以下の局面の、最後まで読んだ値（石数の差）をファイルに保存しておき、
+対局や棋譜の採点のときに読み切らずに引く
+
+6x6 のトーナメントでは終盤の局面が何度も現れるので、前もって1回だけ読んでおけば
+同じ局面を何度も読み切らずに済む。
+
+ファイルの作り方（オフラインで1回だけ）:
+    python -m engine.tablebase -s 6 -k 8 --games 2000
+
+    自己対戦（とランダムな対局）や棋譜から空きマスが K 個になった局面を集め、
+    そこから打ち進めて現れるすべての局面（空きマス K 個以下）を読んで保存する。
+
+ファイルの形式:
+    ヘッダ（マジック b'OTTB'、版、盤面サイズ、K、局面の数）のあとに、
+    (キー, 値) の固定長のレコードをキーの小さい順に並べる。
+    キーは手番側・相手側の石を対称変換で正規形にしたもの（ビッグエンディアン）、
+    値は手番側から見た石数の差（符号付き1バイト）。石数の差が 127 を超えないよう、
+    盤面サイズは MAX_SIZE（10）まで。
+    対称な8つの局面は同じキーになるので、ファイルは約8分の1の大きさで済む。
+
+引くときはファイルを mmap して二分探索するので、全体をメモリに読み込まない。
+打てない局面（パス・終局）は保存せず、引くときに計算する。
+
+使い方:
+    with Tablebase(path) as table:
+        value = table.probe(p, o)        # 手番側から見た石数の差（表になければ None）
+        value, sq = table.best_move(p, o)
+"""
+
+import argparse
+import mmap
+import os
+import random
+import struct
+import time
+
+from . import bitboard, endgame, symmetry
+
+MAGIC = b'OTTB'
+VERSION = 1
+_HEADER = struct.Struct('<4sBBBxQ')  # マジック, 版, 盤面サイズ, K, (詰め物), 局面の数
+_VALUE = struct.Struct('b')          # 石数の差
+
+# 値は1バイトなので、石数の差（最大 n*n）が 127 に収まる盤面サイズまで
+MAX_SIZE = 10
+
+# 既定のファイルの場所（python -m engine.tablebase で作る）
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'tablebase6.bin')
+
+
+def _key_bytes(n):
+    """キーのバイト数（手番側と相手側の2つのビットボード）"""
+    return (2 * n * n + 7) // 8
+
+
+def check_size(n):
+    """
+    局面表を作れる盤面サイズか確かめる（4以上 MAX_SIZE 以下の偶数でなければ ValueError）
+
+    Returns:
+        n
+    """
+    bitboard.check_size(n)
+    if n > MAX_SIZE:
+        raise ValueError(f"局面表の盤面サイズは {MAX_SIZE} 以下にしてください: {n!r}")
+    return n
+
+
+def canonical_key(p, o, n):
+    """
+    局面のキー（対称変換で正規形にした (手番側, 相手側) を1つの整数にしたもの）
+    """
+    cp, co, _ = symmetry.canonicalize(p, o, n)
+    return (cp << (n * n)) | co
+
+
+def _values_of(p, o, n, values):
+    """
+    (p, o) から打ち進めて現れる局面をすべて読み、values に {キー: 値} を入れる
+
+    Returns:
+        手番側から見た石数の差
+    """
+    moves = bitboard.generate_moves(p, o, n)
+    if not moves:
+        if not bitboard.legal_moves(o, p, n):
+            return bitboard.count(p) - bitboard.count(o)
+        return -_values_of(o, p, n, values)
+    key = canonical_key(p, o, n)
+    value = values.get(key)
+    if value is not None:
+        return value
+    best = -n * n - 1
+    for sq, flipped in moves:
+        score = -_values_of(o & ~flipped, p | flipped | (1 << sq), n, values)
+        if score > best:
+            best = score
+    values[key] = best
+    return best
+
+
+def seed_positions(n, max_empties, games, rng, records=()):
+    """
+    空きマスが max_empties 個以下になった最初の局面 (p, o) を対局ごとに1つずつ集める
+
+    Args:
+        n: 盤面の一辺のマス数
+        max_empties: K
+        games: 自己対戦の数（半分は両者ランダム、半分は貪欲とランダムを混ぜる）
+        rng: random.Random
+        records: 棋譜（[(x, y), ...] のリスト）
+
+    Yields:
+        (p, o)
+    """
+    def playout(pick):
+        p, o = bitboard.initial(n)
+        passed = False
+        while n * n - bitboard.count(p | o) > max_empties:
+            moves = bitboard.generate_moves(p, o, n)
+            if not moves:
+                if passed:
+                    return None
+                passed = True
+            else:
+                sq, flipped = pick(p, o, moves)
+                p, o = p | flipped | (1 << sq), o & ~flipped
+                passed = False
+            p, o = o, p
+        return p, o
+
+    def random_move(p, o, moves):
+        return rng.choice(moves)
+
+    def mixed_move(p, o, moves):
+        if rng.random() < 0.5:
+            return endgame.greedy_move(p, o, n)
+        return rng.choice(moves)
+
+    for i in range(games):
+        position = playout(random_move if i % 2 == 0 else mixed_move)
+        if position is not None:
+            yield position
+
+    for moves in records:
+        p, o = bitboard.initial(n)
+        for x, y in moves:
+            if n * n - bitboard.count(p | o) <= max_empties:
+                yield p, o
+                break
+            if not bitboard.legal_moves(p, o, n):
+                p, o = o, p  # パス
+            flipped = bitboard.flips(p, o, y * n + x, n)
+            if not flipped:
+                break  # 打てない手があれば、その棋譜は使わない
+            p, o = o & ~flipped, p | flipped | (1 << (y * n + x))
+
+
+def write(path, n, max_empties, values):
+    """
+    {キー: 値} をキーの小さい順にファイルに書く
+
+    一時ファイルに書いてから置き換えるので、古いファイルを開いているものがあってもよい。
+
+    Returns:
+        書いた局面の数
+    """
+    size = _key_bytes(n)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temporary = path + '.tmp'
+    with open(temporary, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, n, max_empties, len(values)))
+        for key in sorted(values):
+            f.write(key.to_bytes(size, 'big'))
+            f.write(_VALUE.pack(values[key]))
+    os.replace(temporary, path)
+    return len(values)
+
+
+def build(path, n=6, max_empties=8, games=1000, seed=0, records=()):
+    """
+    局面表を作ってファイルに保存する
+
+    Args:
+        path: 保存するファイル
+        n: 盤面の一辺のマス数
+        max_empties: K（空きマスがこれ以下の局面を保存する）
+        games: 局面を集める自己対戦の数
+        seed: 乱数のシード
+        records: 局面を集める棋譜（[(x, y), ...] のリスト）
+
+    Returns:
+        保存した局面の数
+
+    Raises:
+        ValueError: 盤面サイズが MAX_SIZE より大きい場合など
+    """
+    check_size(n)
+    rng = random.Random(seed)
+    values = {}
+    for p, o in seed_positions(n, max_empties, games, rng, records):
+        _values_of(p, o, n, values)
+    return write(path, n, max_empties, values)
+
+
+class Tablebase:
+    """mmap で開いた局面表（ファイル全体はメモリに読み込まない）"""
+
+    def __init__(self, path):
+        """
+        Raises:
+            ValueError: 局面表のファイルではない場合
+        """
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, n, max_empties, count = _HEADER.unpack_from(self._map, 0)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"局面表のファイルではありません: {path}")
+        except Exception:
+            self._file.close()
+            raise
+        self.n = n
+        self.max_empties = max_empties
+        self.count = count
+        self._key_size = _key_bytes(n)
+        self._record = self._key_size + _VALUE.size
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    def _lookup(self, key):
+        """キーの値を二分探索で引く（なければ None）"""
+        target = key.to_bytes(self._key_size, 'big')
+        data, record, size = self._map, self._record, self._key_size
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = _HEADER.size + mid * record
+            found = data[start:start + size]
+            if found < target:
+                lo = mid + 1
+            elif found > target:
+                hi = mid
+            else:
+                return _VALUE.unpack_from(data, start + size)[0]
+        return None
+
+    def probe(self, p, o):
+        """
+        局面の値（手番側から見た、両者が最善を尽くしたときの石数の差）
+
+        Args:
+            p: 手番側の石
+            o: 相手の石
+
+        Returns:
+            石数の差。表にない局面（空きマスが多い、集めた局面から現れないなど）は None
+        """
+        n = self.n
+        if n * n - bitboard.count(p | o) > self.max_empties:
+            return None
+        if not bitboard.legal_moves(p, o, n):
+            if not bitboard.legal_moves(o, p, n):
+                return bitboard.count(p) - bitboard.count(o)
+            value = self.probe(o, p)
+            return None if value is None else -value
+        return self._lookup(canonical_key(p, o, n))
+
+    def best_move(self, p, o):
+        """
+        最善手と、その手を打ったときの値
+
+        Returns:
+            (値, 最善手のビット番号)。打てなければ (値, None)。
+            表にない局面（どれかの手の行き先が表にない場合も）は None
+        """
+        n = self.n
+        moves = bitboard.generate_moves(p, o, n)
+        if not moves:
+            value = self.probe(p, o)
+            return None if value is None else (value, None)
+        best = None
+        for sq, flipped in moves:
+            value = self.probe(o & ~flipped, p | flipped | (1 << sq))
+            if value is None:
+                return None
+            if best is None or -value > best[0]:
+                best = (-value, sq)
+        return best
+
+
+_default = {}
+
+
+def default(n=6):
+    """
+    既定の場所（DEFAULT_PATH）の局面表（盤面サイズが n のとき）。なければ None
+
+    一度開いたものを使い回す（読むだけなのでスレッド間で共有してよい）
+    """
+    if 'table' not in _default:
+        try:
+            _default['table'] = Tablebase(DEFAULT_PATH)
+        except (OSError, ValueError):
+            _default['table'] = None
+    table = _default['table']
+    if table is None or table.n != n:
+        return None
+    return table
+
+
+def main():
+    parser = argparse.ArgumentParser(description='終盤の局面表（テーブルベース）を作る')
+    parser.add_argument('-o', '--output', default=DEFAULT_PATH,
+                        help=f'保存するファイル（デフォルト: {DEFAULT_PATH}）')
+    parser.add_argument('-s', '--size', type=int, default=6, help='盤面サイズ（デフォルト: 6）')
+    parser.add_argument('-k', '--empties', type=int, default=8,
+                        help='空きマスがこれ以下の局面を保存する（デフォルト: 8）')
+    parser.add_argument('--games', type=int, default=1000,
+                        help='局面を集める自己対戦の数（デフォルト: 1000）')
+    parser.add_argument('--records', default=None, metavar='FILE',
+                        help='局面を集める棋譜のファイル（1行に1局、"f5d6c3..." の形）')
+    parser.add_argument('--seed', type=int, default=0, help='乱数のシード')
+    args = parser.parse_args()
+    try:
+        check_size(args.size)
+    except ValueError as e:
+        parser.error(str(e))
+
+    records = []
+    if args.records:
+        with open(args.records, encoding='utf-8') as f:
+            records = [endgame.parse_record(line, args.size) for line in f if line.strip()]
+
+    start = time.perf_counter()
+    count = build(args.output, args.size, args.empties, args.games, args.seed, records)
+    elapsed = time.perf_counter() - start
+    print(f"{args.size}x{args.size} 空きマス {args.empties} 以下: {count} 局面 "
+          f"({os.path.getsize(args.output)} バイト, {elapsed:.1f}s) -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
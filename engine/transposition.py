@@ -0,0 +1,178 @@
+"""
+置換表（トランスポジションテーブル）
+探索で一度調べた局面の結果を、局面の Zobrist キーで引けるように覚えておく
+
+オセロでは手順が違っても同じ局面になることが多いので、同じ局面を
+もう一度読まずに済む。覚えておくのは、読んだ深さ・評価値の種類（ちょうどの値か
+上限か下限か）・評価値・最善手。
+
+大きさは MB で決め、最初に確保した配列の中だけを使う（局面が増えてもメモリは増えない）。
+2つのマスを1組にして、1つ目は深く読んだ結果を優先して残し（depth-preferred）、
+2つ目は常に新しい結果で上書きする（always-replace）。
+
+使い方:
+    tt = TranspositionTable(size_mb=8)
+    entry = tt.probe(state.key)
+    if entry is not None:
+        depth, bound, score, move = entry
+    ...
+    tt.store(state.key, depth, bound, score, move)
+    print(tt.stats())
+"""
+
+from array import array
+
+# 評価値の種類
+EXACT = 0  # ちょうどの値
+LOWER = 1  # 下限（これ以上。β カットしたとき）
+UPPER = 2  # 上限（これ以下。どの手も α を超えなかったとき）
+
+NO_MOVE = -1  # 最善手がない（パスなど）
+
+# 1マスに使うバイト数（キー8 + 評価値4 + そのほか4）
+ENTRY_BYTES = 16
+
+# 「そのほか」の4バイトの中身
+_USED = 1                   # 使っているマス
+_BOUND_SHIFT = 1            # 評価値の種類（2ビット）
+_DEPTH_SHIFT = 3            # 深さ（8ビット）
+_MOVE_SHIFT = 11            # 最善手 + 1（13ビット、0 は NO_MOVE）
+_AGE_SHIFT = 24             # 何回目の探索で書いたか（8ビット）
+_MAX_DEPTH = 0xFF
+_MAX_MOVE = 0x1FFF - 1
+
+_INT32_MAX = 2**31 - 1
+
+
+class TranspositionTable:
+    """大きさが決まった置換表"""
+
+    def __init__(self, size_mb=8):
+        """
+        Args:
+            size_mb: 使うメモリ（MB）。マスの数はこれに収まる最大の2の累乗（の組）になる
+
+        Raises:
+            ValueError: 小さすぎて1組も作れない場合
+        """
+        slots = int(size_mb * 1024 * 1024) // ENTRY_BYTES
+        if slots < 2:
+            raise ValueError(f"置換表が小さすぎます: {size_mb} MB")
+        buckets = 1 << ((slots // 2).bit_length() - 1)
+        self.size_mb = size_mb
+        self._mask = buckets - 1
+        self._keys = array('Q', bytes(8 * 2 * buckets))
+        self._scores = array('i', bytes(4 * 2 * buckets))
+        self._info = array('I', bytes(4 * 2 * buckets))
+        self._age = 0
+        self.reset_stats()
+
+    def __len__(self):
+        """マスの数"""
+        return len(self._keys)
+
+    def reset_stats(self):
+        """hit・衝突・上書きの回数を 0 に戻す"""
+        self.probes = 0      # probe の回数
+        self.hits = 0        # キーが一致した回数
+        self.collisions = 0  # 組のマスが別の局面で埋まっていて見つからなかった回数
+        self.stores = 0      # store の回数
+        self.overwrites = 0  # 別の局面の結果を上書きした回数
+
+    def clear(self):
+        """すべての結果を消す"""
+        n = len(self._keys)
+        self._keys = array('Q', bytes(8 * n))
+        self._scores = array('i', bytes(4 * n))
+        self._info = array('I', bytes(4 * n))
+        self._age = 0
+        self.reset_stats()
+
+    def new_search(self):
+        """
+        新しい手の探索を始める
+
+        前の手の探索で書いた結果も引けるが、深さを優先するマスでも
+        新しい結果で上書きしてよい古い結果として扱う。
+        """
+        self._age = (self._age + 1) & 0xFF
+
+    def probe(self, key):
+        """
+        局面の結果を引く
+
+        Args:
+            key: 局面の Zobrist キー
+
+        Returns:
+            (depth, bound, score, move)。覚えていなければ None
+        """
+        self.probes += 1
+        i = (key & self._mask) << 1
+        keys, info = self._keys, self._info
+        for slot in (i, i + 1):
+            data = info[slot]
+            if data & _USED and keys[slot] == key:
+                self.hits += 1
+                return ((data >> _DEPTH_SHIFT) & _MAX_DEPTH,
+                        (data >> _BOUND_SHIFT) & 3,
+                        self._scores[slot],
+                        ((data >> _MOVE_SHIFT) & 0x1FFF) - 1)
+        if info[i] & _USED or info[i + 1] & _USED:
+            self.collisions += 1
+        return None
+
+    def store(self, key, depth, bound, score, move=NO_MOVE):
+        """
+        局面の結果を覚える
+
+        Args:
+            key: 局面の Zobrist キー
+            depth: 読んだ深さ（0〜255）
+            bound: EXACT, LOWER, UPPER のどれか
+            score: 評価値（32ビットに収まる整数）
+            move: 最善手のビット番号（なければ NO_MOVE）
+        """
+        self.stores += 1
+        i = (key & self._mask) << 1
+        keys, info = self._keys, self._info
+        first = info[i]
+        # 1つ目のマス: 同じ局面か、空きか、古い探索の結果か、今回のほうが深く読んでいれば置く
+        if (not first & _USED or keys[i] == key
+                or (first >> _AGE_SHIFT) != self._age
+                or depth >= (first >> _DEPTH_SHIFT) & _MAX_DEPTH):
+            slot = i
+        else:
+            slot = i + 1  # 2つ目のマス: いつも上書きする
+        if info[slot] & _USED and keys[slot] != key:
+            self.overwrites += 1
+        keys[slot] = key
+        self._scores[slot] = max(-_INT32_MAX, min(_INT32_MAX, score))
+        info[slot] = (_USED
+                      | (bound << _BOUND_SHIFT)
+                      | (min(depth, _MAX_DEPTH) << _DEPTH_SHIFT)
+                      | ((min(move, _MAX_MOVE) + 1) << _MOVE_SHIFT)
+                      | (self._age << _AGE_SHIFT))
+
+    def stats(self):
+        """
+        hit・衝突・上書きの回数と割合
+
+        Returns:
+            {'probes', 'hits', 'collisions', 'stores', 'overwrites',
+             'hit_rate', 'collision_rate', 'overwrite_rate', 'usage'}
+            hit_rate, collision_rate は probe あたり、overwrite_rate は store あたり、
+            usage は使っているマスの割合
+        """
+        used = sum(1 for data in self._info if data & _USED)
+        return {
+            'probes': self.probes,
+            'hits': self.hits,
+            'collisions': self.collisions,
+            'stores': self.stores,
+            'overwrites': self.overwrites,
+            'hit_rate': self.hits / self.probes if self.probes else 0.0,
+            'collision_rate': self.collisions / self.probes if self.probes else 0.0,
+            'overwrite_rate': self.overwrites / self.stores if self.stores else 0.0,
+            'usage': used / len(self._info),
+        }
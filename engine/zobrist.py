@@ -0,0 +1,93 @@
+"""
+Zobrist ハッシュ
+局面（石の配置＋手番）を64ビットの整数1つで表す
+
+マスごと・色ごとに乱数を割り当て、置かれている石の乱数をすべて XOR したものを
+局面のキーとする。石を置く・ひっくり返す・手番を交代するたびに、
+変わったマスの乱数を XOR するだけでキーを更新できる。
+乱数は盤面サイズごとに固定のシードで作るので、プロセスが違っても同じ局面は同じキーになる。
+"""
+
+import random
+from functools import lru_cache
+
+from . import bitboard
+from .bitboard import BLACK
+
+
+class ZobristTable:
+    """盤面サイズごとの Zobrist 乱数表"""
+
+    def __init__(self, n):
+        rng = random.Random(0x07E110 + n)
+        self.n = n
+        self.black = [rng.getrandbits(64) for _ in range(n * n)]
+        self.white = [rng.getrandbits(64) for _ in range(n * n)]
+        # 石をひっくり返すと黒の乱数と白の乱数が入れ替わる
+        self.flip = [b ^ w for b, w in zip(self.black, self.white)]
+        # 白番のときに XOR する乱数
+        self.side = rng.getrandbits(64)
+
+    def key(self, black, white, stone):
+        """
+        局面のキーを最初から計算する
+
+        Args:
+            black, white: ビットボード
+            stone: 手番の石の色 (1: 黒, 2: 白)
+
+        Returns:
+            64ビットのキー
+        """
+        key = 0 if stone == BLACK else self.side
+        for sq in bitboard.squares(black):
+            key ^= self.black[sq]
+        for sq in bitboard.squares(white):
+            key ^= self.white[sq]
+        return key
+
+    def after_move(self, key, stone, sq, flipped):
+        """
+        着手後のキーを差分で求める（手番の交代も含む）
+
+        Args:
+            key: 着手前のキー
+            stone: 打った石の色
+            sq: 打ったマスのビット番号
+            flipped: ひっくり返した石のマスク
+
+        Returns:
+            着手後のキー
+        """
+        key ^= self.side ^ (self.black[sq] if stone == BLACK else self.white[sq])
+        flip = self.flip
+        while flipped:
+            low = flipped & -flipped
+            key ^= flip[low.bit_length() - 1]
+            flipped ^= low
+        return key
+
+    def after_pass(self, key):
+        """パス後のキー"""
+        return key ^ self.side
+
+
+@lru_cache(maxsize=None)
+def table(n):
+    """盤面サイズ n の乱数表（サイズごとに1回だけ作る）"""
+    return ZobristTable(n)
+
+
+def position_key(black, white, stone, n):
+    """
+    局面のキーを求める
+
+    Args:
+        black, white: ビットボード
+        stone: 手番の石の色 (1: 黒, 2: 白)
+        n: 盤面の一辺のマス数
+
+    Returns:
+        64ビットのキー
+    """
+    return table(n).key(black, white, stone)
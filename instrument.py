@@ -0,0 +1,134 @@
+"""
+エンジン関数の呼び出し回数と時間の計測
+トーナメントの時間のうち、can_place / can_place_x_y / copy / move_stone などの
+ルール関数にどれだけ使われているかを、対局ごと・AIごとに数える
+
+計測は instrumented() の中でだけ行う。入るときに、読み込まれているモジュール
+（とユーザーAIの実行環境）の中の対象関数を、回数と時間を数える関数に差し替え、
+出るときに元に戻す。計測しないときは何も差し替えないので、ふだんの対戦には
+まったく影響しない。
+
+使い方:
+    with instrumented() as stats:
+        with stats.attribute('myai'):
+            myai(board, stone)
+    print(stats.as_dict())
+
+    run_match(ai1, ai2, 6, instrument=True).stats   # 対局ごとの集計
+"""
+
+import sys
+import time
+from contextlib import contextmanager
+
+try:
+    from . import othello
+except ImportError:
+    import othello
+
+# 計測する関数（othello.py の関数名）
+PRIMITIVES = ('can_place', 'can_place_x_y', 'copy', 'move_stone', 'apply_move',
+              'valid_moves', 'generate_moves')
+
+# どのAIの呼び出しでもないとき（対戦の進行など）の集計先
+OTHER = 'other'
+
+
+class CallStats:
+    """関数ごと・集計先（AI）ごとの呼び出し回数と累積時間"""
+
+    def __init__(self):
+        self.label = OTHER
+        self.records = {}  # {label: {name: [calls, seconds]}}
+
+    @contextmanager
+    def attribute(self, label):
+        """この中で呼ばれた関数を label に集計する"""
+        previous = self.label
+        self.label = label
+        try:
+            yield self
+        finally:
+            self.label = previous
+
+    def wrap(self, name, func):
+        """func を呼び出し回数と時間を数える関数で包む"""
+        records = self.records
+        perf_counter = time.perf_counter
+
+        def counted(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = perf_counter() - start
+                entry = records.setdefault(self.label, {}).setdefault(name, [0, 0.0])
+                entry[0] += 1
+                entry[1] += elapsed
+
+        counted.__name__ = getattr(func, '__name__', name)
+        counted.__doc__ = getattr(func, '__doc__', None)
+        counted.__wrapped__ = func
+        return counted
+
+    def as_dict(self):
+        """
+        集計結果を返す
+
+        Returns:
+            {label: {name: {'calls': 回数, 'seconds': 累積時間}}, 'total': {...}}
+            時間は呼び出した関数の中で呼ばれた関数の分も含む
+        """
+        result = {}
+        total = {}
+        for label, names in self.records.items():
+            result[label] = {}
+            for name, (calls, seconds) in names.items():
+                result[label][name] = {'calls': calls, 'seconds': seconds}
+                entry = total.setdefault(name, {'calls': 0, 'seconds': 0.0})
+                entry['calls'] += calls
+                entry['seconds'] += seconds
+        result['total'] = total
+        return result
+
+
+@contextmanager
+def instrumented(namespaces=()):
+    """
+    この中では対象関数の呼び出しを数える
+
+    sys.modules のモジュールと namespaces の辞書から、対象関数そのものを指している
+    名前を探して差し替える（from othello import copy のように取り込んだ名前も含む）。
+
+    Args:
+        namespaces: ほかに差し替える辞書（ユーザーAIを exec した環境など）
+
+    Yields:
+        CallStats
+    """
+    stats = CallStats()
+    originals = {}
+    for name in PRIMITIVES:
+        func = getattr(othello, name, None)
+        if func is not None:
+            originals[id(func)] = (name, func)
+    wrappers = {key: stats.wrap(name, func) for key, (name, func) in originals.items()}
+
+    targets = [vars(module) for module in list(sys.modules.values()) if hasattr(module, '__dict__')]
+    targets.extend(ns for ns in namespaces if ns is not None)
+
+    patched = []  # [(辞書, 名前, 元の関数), ...]
+    seen = set()
+    for namespace in targets:
+        if id(namespace) in seen:
+            continue
+        seen.add(id(namespace))
+        for key, value in list(namespace.items()):
+            if id(value) in originals and originals[id(value)][1] is value:
+                namespace[key] = wrappers[id(value)]
+                patched.append((namespace, key, value))
+    try:
+        yield stats
+    finally:
+        for namespace, key, value in patched:
+            namespace[key] = value
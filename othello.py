@@ -1,25 +1,24 @@
 import os
-try:
-    from kogi_canvas import Canvas
-except ImportError:
-    os.system('pip install kogi_canvas')
-    from kogi_canvas import Canvas
-
 import math
 import random
 import time
+import warnings
+from functools import lru_cache
+
+try:
+    from .engine import bitboard, zobrist
+    from .engine.state import GameState
+    from .engine.evaluation import EvaluatedState, WeightTable
+except ImportError:
+    from engine import bitboard, zobrist
+    from engine.state import GameState
+    from engine.evaluation import EvaluatedState, WeightTable
 
 BLACK=1
 WHITE=2
 
-board = [
-        [0,0,0,0,0,0],
-        [0,0,0,0,0,0],
-        [0,0,1,2,0,0],
-        [0,0,2,1,0,0],
-        [0,0,0,0,0,0],
-        [0,0,0,0,0,0],
-]
+# 盤面を描くキャンバスの幅（ピクセル）の既定値
+DEFAULT_WIDTH = 300
 
 def can_place_x_y(board, stone, x, y):
     """
@@ -29,25 +28,58 @@ def can_place_x_y(board, stone, x, y):
     stone: 現在のプレイヤーの石 (1: 黒, 2: 白)
     return: 置けるなら True, 置けないなら False
     """
+    if x < 0 or y < 0:
+        return False  # 負の座標で盤面を後ろから読まないように、先に確かめる
     if board[y][x] != 0:
         return False  # 既に石がある場合は置けない
+    opponent = 3 - stone
+    n = len(board)
+    # 盤面全体をビットボードに詰めず、(x, y) から8方向に盤面をそのままたどる
+    for line in _ray_coords(n)[y * n + x]:
+        if len(line) < 2:
+            continue  # 盤の端までに2マスなければ挟めない
+        fx, fy = line[0]
+        if board[fy][fx] != opponent:
+            continue
+        for i in range(1, len(line)):
+            fx, fy = line[i]
+            cell = board[fy][fx]
+            if cell != opponent:
+                if cell == stone:
+                    return True  # 石を置ける条件を満たす
+                break
+    return False
 
-    opponent = 3 - stone  # 相手の石 (1なら2、2なら1)
-    directions = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
-
-    for dx, dy in directions:
-        nx, ny = x + dx, y + dy
-        found_opponent = False
-
-        while 0 <= nx < len(board[0]) and 0 <= ny < len(board) and board[ny][nx] == opponent:
-            nx += dx
-            ny += dy
-            found_opponent = True
-
-        if found_opponent and 0 <= nx < len(board[0]) and 0 <= ny < len(board) and board[ny][nx] == stone:
-            return True  # 石を置ける条件を満たす
+@lru_cache(maxsize=None)
+def _ray_coords(n):
+    """bitboard.ray_indices の半直線を (x, y) の列に直したもの（サイズごとに1回だけ）"""
+    return [[[(sq % n, sq // n) for sq in line] for line in lines]
+            for lines in bitboard.ray_indices(n)]
 
-    return False
+def flips_x_y(board, stone, x, y):
+    """
+    石を置いたときにひっくり返る石を調べる関数。
+    board: 2次元配列のオセロボード
+    x, y: 石を置きたい座標 (0-indexed)
+    stone: 現在のプレイヤーの石 (1: 黒, 2: 白)
+    return: ひっくり返る石の座標のリスト [(x, y), ...]（方向ごとに近い順）。置けない場合は []
+    """
+    if x < 0 or y < 0 or board[y][x] != 0:
+        return []
+    opponent = 3 - stone
+    n = len(board)
+    flipped = []
+    for line in _ray_coords(n)[y * n + x]:
+        run = []
+        for fx, fy in line:
+            cell = board[fy][fx]
+            if cell == opponent:
+                run.append((fx, fy))
+                continue
+            if cell == stone:
+                flipped.extend(run)
+            break
+    return flipped
 
 def can_place(board, stone):
     """
@@ -55,11 +87,53 @@ def can_place(board, stone):
     board: 2次元配列のオセロボード
     stone: 現在のプレイヤーの石 (1: 黒, 2: 白)
     """
-    for y in range(len(board)):
-        for x in range(len(board[0])):
-            if can_place_x_y(board, stone, x, y):
-                return True
-    return False
+    n = len(board)
+    black, white = bitboard.pack(board)
+    if stone == BLACK:
+        return bitboard.legal_moves(black, white, n) != 0
+    return bitboard.legal_moves(white, black, n) != 0
+
+def valid_moves(board, stone):
+    """
+    石を置ける場所のリストを返す関数。
+    board: 2次元配列のオセロボード
+    stone: 現在のプレイヤーの石 (1: 黒, 2: 白)
+    return: [(x, y), ...] （y, x の順に小さい方から）
+    """
+    n = len(board)
+    black, white = bitboard.pack(board)
+    if stone == BLACK:
+        moves = bitboard.legal_moves(black, white, n)
+    else:
+        moves = bitboard.legal_moves(white, black, n)
+    return [(sq % n, sq // n) for sq in bitboard.squares(moves)]
+
+def generate_moves(board, stone):
+    """
+    石を置ける場所と、そこに置いたときにひっくり返る石をまとめて返す関数。
+    can_place_x_y で調べてからひっくり返る石を数え直す、といった二度手間がいらない。
+    board: 2次元配列のオセロボード
+    stone: 現在のプレイヤーの石 (1: 黒, 2: 白)
+    return: [((x, y), [(ひっくり返る石の x, y), ...]), ...] （y, x の順に小さい方から）
+    """
+    n = len(board)
+    black, white = bitboard.pack(board)
+    if stone == BLACK:
+        generated = bitboard.generate_moves(black, white, n)
+    else:
+        generated = bitboard.generate_moves(white, black, n)
+    return [((sq % n, sq // n), [(f % n, f // n) for f in bitboard.squares(flipped)])
+            for sq, flipped in generated]
+
+def position_key(board, stone):
+    """
+    局面を識別する64ビットのキー（Zobrist ハッシュ）を返す関数。
+    同じ石の配置・同じ手番なら同じキーになる（置換表や対局の重複検出に使う）。
+    board: 2次元配列のオセロボード
+    stone: 手番のプレイヤーの石 (1: 黒, 2: 白)
+    """
+    black, white = bitboard.pack(board)
+    return zobrist.position_key(black, white, stone, len(board))
 
 def random_place(board, stone):
     """
@@ -73,6 +147,27 @@ def random_place(board, stone):
         if can_place_x_y(board, stone, x, y):
             return x, y
 
+def new_board(n=6):
+    """
+    初期配置の盤面を作る関数。
+    n: 盤面の一辺のマス数（4以上の偶数。6, 8 のほか 4, 10, 12 なども使える）
+    return: 2次元配列のオセロボード
+    """
+    black, white = bitboard.initial(bitboard.check_size(n))
+    return bitboard.unpack(black, white, n)
+
+def prepare_board(board=None):
+    """
+    対局を始める盤面を用意する関数。
+    board: 盤面サイズ（整数）または2次元配列のオセロボード。None なら 6x6
+    return: サイズが指定されたときは初期配置の盤面、盤面が渡されたときはその盤面
+    """
+    if board is None:
+        return new_board(6)
+    if isinstance(board, int):
+        return new_board(board)
+    return board
+
 def copy(board):
     """
     盤面をコピーする関数。
@@ -87,34 +182,69 @@ def move_stone(board, stone, x, y):
     board: 2次元配列のオセロボード
     x, y: 石を置きたい座標 (0-indexed)
     stone: 現在のプレイヤーの石 (1: 黒, 2: 白)
-    return:
+    return: アニメーション用に1枚ずつひっくり返した盤面のリスト
+            （キャンバス表示用。盤面だけ進めたいときは apply_move を使う）
     """
     moves = [copy(board)]*3
-    if not can_place_x_y(board, stone, x, y):
+    flip_xy = flips_x_y(board, stone, x, y)
+    if not flip_xy:
         return moves  # 置けない場合は何もしない
 
     board[y][x] = stone  # 石を置く
     moves.append(copy(board))
-    opponent = 3 - stone
-    directions = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
-    flipped_count = 0
 
-    for dx, dy in directions:
-        nx, ny = x + dx, y + dy
-        stones_to_flip = []
+    # 置いた石に近い順にひっくり返す（アニメーション用）
+    flip_xy.sort(key=lambda p: max(abs(p[0] - x), abs(p[1] - y)))
+    for flip_x, flip_y in flip_xy:
+        board[flip_y][flip_x] = stone
+        moves.append(copy(board))
 
-        while 0 <= nx < len(board[0]) and 0 <= ny < len(board) and board[ny][nx] == opponent:
-            stones_to_flip.append((nx, ny))
-            nx += dx
-            ny += dy
+    return moves
 
-        if stones_to_flip and 0 <= nx < len(board[0]) and 0 <= ny < len(board) and board[ny][nx] == stone:
-            for flip_x, flip_y in stones_to_flip:
-                board[flip_y][flip_x] = stone
-                moves.append(copy(board))
-                flipped_count += 1
 
-    return moves
+def apply_move(board, stone, x, y):
+    """
+    石を置き、ひっくり返す関数（アニメーション用の盤面コピーを作らない）。
+    対戦の進行やAIの探索など、途中経過の盤面がいらない場合はこちらを使う。
+    board: 2次元配列のオセロボード（その場で書き換える）
+    x, y: 石を置きたい座標 (0-indexed)
+    stone: 現在のプレイヤーの石 (1: 黒, 2: 白)
+    return: ひっくり返した石の座標のリスト [(x, y), ...]。置けない場合は []
+    """
+    flipped_xy = flips_x_y(board, stone, x, y)
+    if not flipped_xy:
+        return []  # 置けない場合は何もしない
+
+    board[y][x] = stone
+    for flip_x, flip_y in flipped_xy:
+        board[flip_y][flip_x] = stone
+    return flipped_xy
+
+
+def move_stone_frames(board, stone, x, y):
+    """
+    石を置き、ひっくり返す関数（アニメーションは差分で返す）。
+    move_stone と違って途中の盤面をコピーせず、フレームごとに変わったマスだけを返す。
+    board: 2次元配列のオセロボード（その場で書き換える）
+    x, y: 石を置きたい座標 (0-indexed)
+    stone: 現在のプレイヤーの石 (1: 黒, 2: 白)
+    return: フレームのイテレータ（draw_board_changes で描く）。
+            各フレームは [((x, y), 新しい石の色), ...]。
+            最初の3フレームは置く前の待ち時間で空。置けない場合は空のフレームだけ
+    """
+    flipped = apply_move(board, stone, x, y)
+    # 置いた石に近い順にひっくり返す（move_stone と同じ順番）
+    flipped.sort(key=lambda p: max(abs(p[0] - x), abs(p[1] - y)))
+    return _move_frames(stone, x, y, flipped)
+
+def _move_frames(stone, x, y, flipped):
+    for _ in range(3):
+        yield []
+    if not flipped:
+        return
+    yield [((x, y), stone)]
+    for p in flipped:
+        yield [(p, stone)]
 
 
 class PandaAI(object):
@@ -146,46 +276,103 @@ def safe_place(panda, board, stone):
         return panda(board, stone)
     return random_place(board, stone)
 
-def draw_board(canvas, board):
+def load_canvas():
+    """
+    kogi_canvas の Canvas クラスを読み込む関数。
+    盤面を描画するときに初めて読み込むので、ルールだけを使う場合
+    （トーナメントの対戦など）は kogi_canvas がなくても import できる。
+    インストールされていなければ、このときにインストールする。
+    """
+    try:
+        from kogi_canvas import Canvas
+    except ImportError:
+        os.system('pip install kogi_canvas')
+        from kogi_canvas import Canvas
+    return Canvas
+
+def _canvas_width(canvas, width):
+    if width is None:
+        width = getattr(canvas, 'width', None) or DEFAULT_WIDTH
+    return width
+
+def draw_board(canvas, board, width=None):
+    """
+    盤面を描く関数。
+    width: キャンバスの幅（省略時はキャンバスの幅）
+    """
     ctx = canvas.getContext("2d")
-    grid = width // len(board)
+    _draw_stones(ctx, board, _canvas_width(canvas, width) // len(board))
+
+def _draw_stones(ctx, board, grid):
     for y, line in enumerate(board):
         for x, stone in enumerate(line):
-            cx = x * grid + grid // 2
-            cy = y * grid + grid // 2
             if stone != 0:
-                ctx.beginPath()
-                ctx.arc(cx, cy, grid//2, 0, 2 * math.pi) # 円の描画
-                ctx.fillStyle = "black" if stone == 1 else "white"
-                ctx.fill()
+                _draw_stone(ctx, x, y, stone, grid)
 
-width=300
+def _draw_stone(ctx, x, y, stone, grid):
+    cx = x * grid + grid // 2
+    cy = y * grid + grid // 2
+    ctx.beginPath()
+    ctx.arc(cx, cy, grid//2, 0, 2 * math.pi) # 円の描画
+    ctx.fillStyle = "black" if stone == 1 else "white"
+    ctx.fill()
 
-def draw_board_moves(canvas, moves):
+def _overlay_context(canvas):
+    """
+    前のフレームに重ねて描くフレームを始める（kogi_canvas の内部に頼るのはこの関数だけ）。
+    kogi_canvas の Canvas はフレームごとの描画命令を canvas.buffers（リストのリスト）にため、
+    getContext はフレームの最初に背景とグリッドを描く命令を入れるので、それを取り除き、
+    変わったマスだけを描くフレームにする。
+    return: (描画コンテキスト, 重ねて描けるか)。canvas.buffers がなく重ねて描けない場合は、
+            警告を出し、背景から描き直すふつうのフレームのコンテキストと False を返す
+    """
+    ctx = canvas.getContext("2d")
+    buffers = getattr(canvas, 'buffers', None)
+    if not isinstance(buffers, list) or not buffers or not isinstance(buffers[-1], list):
+        warnings.warn('キャンバスに buffers がないので、変わったマスだけを重ねて描けません。'
+                      '盤面全体を描き直します', RuntimeWarning, stacklevel=3)
+        return ctx, False
+    del buffers[-1][:]
+    return ctx, True
+
+def draw_board_changes(canvas, frames, board, width=None):
+    """
+    変わったマスだけを描く関数。
+    frames: move_stone_frames が返すフレーム（[((x, y), 石の色), ...] の並び）
+    board: フレームの前にキャンバスに描いてある盤面（書き換えない）
+    width: キャンバスの幅（省略時はキャンバスの幅）
+    重ねて描けないキャンバスでは、フレームごとに盤面全体を描き直す。
+    """
+    grid = _canvas_width(canvas, width) // len(board)
+    board = copy(board)
+    for frame in frames:
+        for (x, y), stone in frame:
+            board[y][x] = stone
+        ctx, overlay = _overlay_context(canvas)
+        if not overlay:
+            _draw_stones(ctx, board, grid)
+            continue
+        for (x, y), stone in frame:
+            _draw_stone(ctx, x, y, stone, grid)
+
+def draw_board_moves(canvas, moves, width=None):
+    """
+    move_stone が返す盤面のリストを描く関数。
+    最初の盤面だけ全体を描き、あとは前の盤面から変わったマスだけを描く。
+    """
+    previous = None
     for board in moves:
-        draw_board(canvas, board)
-
-def play_othello(ai=None, board=None):
-    if board == 8:
-        board = [
-            [0,0,0,0,0,0,0,0],
-            [0,0,0,0,0,0,0,0],
-            [0,0,0,0,0,0,0,0],
-            [0,0,0,1,2,0,0,0],
-            [0,0,0,2,1,0,0,0],
-            [0,0,0,0,0,0,0,0],
-            [0,0,0,0,0,0,0,0],
-            [0,0,0,0,0,0,0,0],
-        ]
-    elif board is None or board==6:
-        board = [
-            [0,0,0,0,0,0],
-            [0,0,0,0,0,0],
-            [0,0,1,2,0,0],
-            [0,0,2,1,0,0],
-            [0,0,0,0,0,0],
-            [0,0,0,0,0,0],
-        ]
+        if previous is None:
+            draw_board(canvas, board, width)
+        else:
+            changes = [((x, y), stone)
+                       for y, (line, before) in enumerate(zip(board, previous))
+                       for x, stone in enumerate(line) if stone != before[x]]
+            draw_board_changes(canvas, [changes], previous, width)
+        previous = board
+
+def play_othello(ai=None, board=None, width=DEFAULT_WIDTH):
+    board = prepare_board(board)
     if ai is None:
         ai = PandaAI()
 
@@ -199,8 +386,9 @@ def play_othello(ai=None, board=None):
             print('そこに置けません', (x, y))
             return
 
-        moves = []
-        moves.extend(move_stone(board, BLACK, x, y))
+        shown = copy(board)  # クリックしたときに表示されている盤面
+        frames = []
+        frames.extend(move_stone_frames(board, BLACK, x, y))
 
         if can_place(board, WHITE):
             x, y = safe_place(ai, board, WHITE)
@@ -209,7 +397,7 @@ def play_othello(ai=None, board=None):
                 print('反則負けです')
                 return
             print(f'{safe_face(ai)}は', (x, y), 'におきました。')
-            moves.extend(move_stone(board, WHITE, x, y))
+            frames.extend(move_stone_frames(board, WHITE, x, y))
         else:
             print(f'{safe_face(ai)}はどこにも置けないのでスキップします')
 
@@ -218,7 +406,7 @@ def play_othello(ai=None, board=None):
                 print(f'あなたはどこにも置けないのでスキップします')
                 x, y = safe_place(ai,board, WHITE)
                 print(f'{safe_face(ai)}は', (x, y), 'におきました。')
-                moves.extend(move_stone(board, WHITE, x, y))
+                frames.extend(move_stone_frames(board, WHITE, x, y))
             else:
                 black = sum(row.count(BLACK) for row in board)
                 white = sum(row.count(WHITE) for row in board)
@@ -230,10 +418,12 @@ def play_othello(ai=None, board=None):
                 else:
                     print('引き分け')
                 break
-        draw_board_moves(canvas, moves)
+        # クリックしたときに表示されている盤面に、変わったマスだけを重ねて描く
+        draw_board_changes(canvas, frames, shown, width)
 
+    Canvas = load_canvas()
     canvas = Canvas(background='green', grid=width//len(board), width=width, height=width, onclick=redraw)
-    draw_board(canvas, board)
+    draw_board(canvas, board, width)
 
     display(canvas)
 
@@ -244,27 +434,8 @@ def count_stone(board):
     white = sum(row.count(WHITE) for row in board)
     return black, white
 
-def run_othello(blackai=None, whiteai=None, board=None, width=300):
-    if board == 8:
-        board = [
-            [0,0,0,0,0,0,0,0],
-            [0,0,0,0,0,0,0,0],
-            [0,0,0,0,0,0,0,0],
-            [0,0,0,1,2,0,0,0],
-            [0,0,0,2,1,0,0,0],
-            [0,0,0,0,0,0,0,0],
-            [0,0,0,0,0,0,0,0],
-            [0,0,0,0,0,0,0,0],
-        ]
-    elif board is None or board==6:
-        board = [
-            [0,0,0,0,0,0],
-            [0,0,0,0,0,0],
-            [0,0,1,2,0,0],
-            [0,0,2,1,0,0],
-            [0,0,0,0,0,0],
-            [0,0,0,0,0,0],
-        ]
+def run_othello(blackai=None, whiteai=None, board=None, width=DEFAULT_WIDTH):
+    board = prepare_board(board)
 
     if blackai is None:
         blackai = PandaAI()
@@ -287,7 +458,7 @@ def run_othello(blackai=None, whiteai=None, board=None, width=300):
                 print(f'黒 {safe_face(blackai)}は、置けないところに置こうとしました', (x, y))
                 print('反則負けです')
                 return
-            move_stone(board, BLACK, x, y)
+            apply_move(board, BLACK, x, y)
             black, white = count_stone(board)
             print(f'黒 {safe_face(blackai)}は{(x, y)}におきました。黒: {black}, 白: {white}')
             moved = True
@@ -302,7 +473,7 @@ def run_othello(blackai=None, whiteai=None, board=None, width=300):
                 print(f'白 {safe_face(whiteai)}は、置けないところに置こうとしました', (x, y))
                 print('反則負けです')
                 return
-            move_stone(board, WHITE, x, y)
+            apply_move(board, WHITE, x, y)
             black, white = count_stone(board)
             print(f'白 {safe_face(whiteai)}は{(x, y)}におきました。黒: {black}, 白: {white}')
             moved = True
@@ -318,6 +489,7 @@ def run_othello(blackai=None, whiteai=None, board=None, width=300):
     else:
         print('引き分け')
     
+    Canvas = load_canvas()
     canvas = Canvas(background='green', grid=width//len(board), width=width, height=width)
     draw_board(canvas, board)
     display(canvas)
@@ -0,0 +1,405 @@
+"""
+perft とエンジンの突き合わせ
+合法手の生成と着手が元のルール（1マスずつ8方向に歩く実装）と一致するかを確かめる
+
+基準（reference）はこのファイルの reference_can_place / reference_move で、
+エンジンにはよらない。othello.py の can_place_x_y / move_stone もいまは
+engine.bitboard の表を使うので、ほかのエンジンと同じく比べられる側に入れる。
+
+perft は初期局面から深さ d までのすべての手順をたどり、末端の局面の数を数える。
+打てる手がないときはパスを1手（1プライ）として数え、
+深さ d より前に終局した局面はその時点で末端として1つと数える。
+エンジンを速くしたときは、数が変わらないこと（正しさ）と
+nodes/s（速さ）をこのツールで確かめる。
+
+ファズテストはランダムな対局の途中局面を作り、各エンジンの合法手と
+着手後の盤面を reference_can_place / reference_move の結果と比べる。
+
+使い方:
+    python perft.py                       # 6x6 を深さ 1〜8 まで
+    python perft.py -s 8 -d 7 -e reference othello state
+    python perft.py --fuzz 2000 -s 4 6 8 10
+"""
+
+import argparse
+import random
+import sys
+import time
+
+try:
+    # パッケージとして使われる場合（from hachi import ...）
+    from .othello import can_place_x_y, move_stone, copy, new_board, BLACK
+    from .engine import bitboard, mailbox
+    from .engine.state import GameState
+except ImportError:
+    # 直接実行される場合（python perft.py）
+    from othello import can_place_x_y, move_stone, copy, new_board, BLACK
+    from engine import bitboard, mailbox
+    from engine.state import GameState
+
+
+# ---- 基準のルール ----
+
+DIRECTIONS = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
+
+
+def _reference_flips(board, stone, x, y):
+    """(x, y) に打ったときにひっくり返る石の座標のリスト（盤面を1マスずつ歩く）"""
+    n = len(board)
+    if board[y][x] != 0:
+        return []
+    opponent = 3 - stone
+    flips = []
+    for dx, dy in DIRECTIONS:
+        nx, ny = x + dx, y + dy
+        stones_to_flip = []
+        while 0 <= nx < n and 0 <= ny < n and board[ny][nx] == opponent:
+            stones_to_flip.append((nx, ny))
+            nx += dx
+            ny += dy
+        if stones_to_flip and 0 <= nx < n and 0 <= ny < n and board[ny][nx] == stone:
+            flips.extend(stones_to_flip)
+    return flips
+
+
+def reference_can_place(board, stone, x, y):
+    """
+    石を置けるかどうか（元の can_place_x_y と同じ歩き方。エンジンを使わない）
+
+    Args:
+        board: 2次元配列のオセロボード
+        stone: 手番の石の色
+        x, y: 石を置く座標
+
+    Returns:
+        置けるなら True
+    """
+    return bool(_reference_flips(board, stone, x, y))
+
+
+def reference_move(board, stone, x, y):
+    """
+    石を置いてひっくり返す（元の move_stone と同じ歩き方。board を書き換える）
+
+    Returns:
+        ひっくり返した石の数（置けなければ 0 で、board は変えない）
+    """
+    flips = _reference_flips(board, stone, x, y)
+    if flips:
+        board[y][x] = stone
+        for fx, fy in flips:
+            board[fy][fx] = stone
+    return len(flips)
+
+
+# ---- perft ----
+
+def perft_reference(board, stone, depth, passed=False):
+    """
+    reference_can_place / reference_move だけで数える perft（遅いが基準になる）
+
+    Args:
+        board: 2次元配列のオセロボード
+        stone: 手番の石の色
+        depth: 残りの深さ
+        passed: 直前の手がパスだったか
+
+    Returns:
+        末端の局面の数
+    """
+    if depth == 0:
+        return 1
+    n = len(board)
+    moves = [(x, y) for y in range(n) for x in range(n) if reference_can_place(board, stone, x, y)]
+    if not moves:
+        if passed:
+            return 1  # 両者とも打てない = 終局
+        return perft_reference(board, 3 - stone, depth - 1, True)
+    nodes = 0
+    for x, y in moves:
+        child = copy(board)
+        reference_move(child, stone, x, y)
+        nodes += perft_reference(child, 3 - stone, depth - 1)
+    return nodes
+
+
+def perft_othello(board, stone, depth, passed=False):
+    """othello.py の can_place_x_y / move_stone（生徒のAIが使う関数）で数える perft"""
+    if depth == 0:
+        return 1
+    n = len(board)
+    moves = [(x, y) for y in range(n) for x in range(n) if can_place_x_y(board, stone, x, y)]
+    if not moves:
+        if passed:
+            return 1
+        return perft_othello(board, 3 - stone, depth - 1, True)
+    nodes = 0
+    for x, y in moves:
+        child = copy(board)
+        move_stone(child, stone, x, y)
+        nodes += perft_othello(child, 3 - stone, depth - 1)
+    return nodes
+
+
+def perft_state(state, depth, passed=False):
+    """
+    GameState の make/unmake で数える perft
+
+    Returns:
+        末端の局面の数
+    """
+    if depth == 0:
+        return 1
+    moves = state.generate_moves()
+    if not moves:
+        if passed:
+            return 1
+        state.make_pass()
+        nodes = perft_state(state, depth - 1, True)
+        state.unmake()
+        return nodes
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    for sq, flipped in moves:
+        state.make(sq, flipped)
+        nodes += perft_state(state, depth - 1)
+        state.unmake()
+    return nodes
+
+
+def perft_mailbox(cells, stone, n, depth, passed=False):
+    """engine.mailbox の play/undo で数える perft"""
+    if depth == 0:
+        return 1
+    moves = mailbox.legal_moves(cells, stone, n)
+    if not moves:
+        if passed:
+            return 1
+        return perft_mailbox(cells, 3 - stone, n, depth - 1, True)
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    for i in moves:
+        flipped = mailbox.play(cells, stone, i, n)
+        nodes += perft_mailbox(cells, 3 - stone, n, depth - 1)
+        mailbox.undo(cells, stone, i, flipped)
+    return nodes
+
+
+# エンジン名 → (盤面サイズ, 深さ) から末端の局面の数を返す関数
+PERFT_ENGINES = {
+    'reference': lambda n, depth: perft_reference(new_board(n), BLACK, depth),
+    'othello': lambda n, depth: perft_othello(new_board(n), BLACK, depth),
+    'state': lambda n, depth: perft_state(GameState.initial(n), depth),
+    'mailbox': lambda n, depth: perft_mailbox(mailbox.to_mailbox(new_board(n)), BLACK, n, depth),
+}
+
+
+# 8x8 の初期局面からの perft の値（よく知られている値。深さ 1〜9）
+KNOWN_PERFT = {
+    8: [4, 12, 56, 244, 1396, 8200, 55092, 390216, 3005288],
+}
+
+
+def run_perft(n, max_depth, engines):
+    """
+    各エンジンで深さ 1〜max_depth の perft を数え、数と nodes/s を表示する
+
+    Returns:
+        すべての深さで全エンジンの数が一致すれば True
+    """
+    ok = True
+    print(f"perft {n}x{n}")
+    print(f"{'depth':>5} {'engine':<10} {'nodes':>12} {'time':>9} {'nodes/s':>12}")
+    for depth in range(1, max_depth + 1):
+        counts = set()
+        for name in engines:
+            start = time.perf_counter()
+            nodes = PERFT_ENGINES[name](n, depth)
+            elapsed = time.perf_counter() - start
+            counts.add(nodes)
+            rate = nodes / elapsed if elapsed > 0 else float('inf')
+            print(f"{depth:>5} {name:<10} {nodes:>12} {elapsed:>8.3f}s {rate:>12.0f}")
+        if len(counts) > 1:
+            print(f"  !! 深さ {depth} でエンジンの数が一致しません: {sorted(counts)}")
+            ok = False
+        known = KNOWN_PERFT.get(n, [])
+        if depth <= len(known) and counts != {known[depth - 1]}:
+            print(f"  !! 深さ {depth} の値が既知の値 {known[depth - 1]} と違います")
+            ok = False
+    return ok
+
+
+# ---- ファズテスト ----
+
+def _othello_engine(board, stone):
+    n = len(board)
+    moves = {}
+    for y in range(n):
+        for x in range(n):
+            if can_place_x_y(board, stone, x, y):
+                child = copy(board)
+                move_stone(child, stone, x, y)
+                moves[(x, y)] = child
+    return moves
+
+
+def _bitboard_engine(board, stone):
+    state = GameState.from_board(board, stone)
+    moves = {}
+    for sq, flipped in state.generate_moves():
+        state.make(sq, flipped)
+        moves[state.coords(sq)] = state.to_board()
+        state.unmake()
+    return moves
+
+
+def _mailbox_engine(board, stone):
+    n = len(board)
+    cells = mailbox.to_mailbox(board)
+    moves = {}
+    for i in mailbox.legal_moves(cells, stone, n):
+        flipped = mailbox.play(cells, stone, i, n)
+        moves[mailbox.coords(i, n)] = mailbox.from_mailbox(cells, n)
+        mailbox.undo(cells, stone, i, flipped)
+    return moves
+
+
+def _numpy_engine(board, stone):
+    try:
+        from .engine import batch
+    except ImportError:
+        from engine import batch
+    import numpy as np
+    n = len(board)
+    legal = batch.legal_moves([board], [stone])[0]
+    ys, xs = np.nonzero(legal)
+    if len(xs) == 0:
+        return {}
+    boards, _ = batch.apply_moves([board] * len(xs), [stone] * len(xs), xs, ys)
+    return {(int(x), int(y)): b.tolist() for x, y, b in zip(xs, ys, boards)}
+
+
+# エンジン名 → (盤面, 手番) から {(x, y): 着手後の盤面} を返す関数
+FUZZ_ENGINES = {
+    'othello': _othello_engine,
+    'state': _bitboard_engine,
+    'mailbox': _mailbox_engine,
+    'numpy': _numpy_engine,
+}
+
+
+def reference_moves(board, stone):
+    """reference_can_place と reference_move で求めた {(x, y): 着手後の盤面}"""
+    n = len(board)
+    moves = {}
+    for y in range(n):
+        for x in range(n):
+            if reference_can_place(board, stone, x, y):
+                child = copy(board)
+                reference_move(child, stone, x, y)
+                moves[(x, y)] = child
+    return moves
+
+
+def random_positions(n, count, rng):
+    """ランダムな対局の途中局面 (board, stone) を count 個作る（パスの局面も含む）"""
+    positions = []
+    while len(positions) < count:
+        board = new_board(n)
+        stone = BLACK
+        passed = False
+        while len(positions) < count:
+            positions.append((copy(board), stone))
+            moves = list(reference_moves(board, stone).values())
+            if not moves:
+                if passed:
+                    break
+                passed = True
+            else:
+                board = rng.choice(moves)
+                passed = False
+            stone = 3 - stone
+    return positions
+
+
+def fuzz(sizes, count, engines, seed=0):
+    """
+    ランダムな局面で各エンジンを基準のルール（reference_moves）と比べる
+
+    Args:
+        sizes: 盤面サイズのリスト
+        count: サイズごとの局面の数
+        engines: 比べるエンジン名のリスト（FUZZ_ENGINES のキー）
+        seed: 乱数のシード
+
+    Returns:
+        不一致の数
+    """
+    rng = random.Random(seed)
+    mismatches = 0
+    for n in sizes:
+        positions = random_positions(n, count, rng)
+        for name in engines:
+            engine = FUZZ_ENGINES[name]
+            bad = 0
+            start = time.perf_counter()
+            for board, stone in positions:
+                expected = reference_moves(board, stone)
+                actual = engine(board, stone)
+                if actual != expected:
+                    bad += 1
+                    if bad <= 3:
+                        print(f"  !! {name} {n}x{n} stone={stone} 盤面={board}")
+                        print(f"     合法手 期待: {sorted(expected)} 実際: {sorted(actual)}")
+            elapsed = time.perf_counter() - start
+            status = "OK" if bad == 0 else f"{bad} 件不一致"
+            print(f"fuzz {n}x{n} {name:<8} {len(positions)} 局面: {status} ({elapsed:.2f}s)")
+            mismatches += bad
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description='perft とエンジンの突き合わせ')
+    parser.add_argument('-s', '--size', type=int, nargs='+', default=[6],
+                        help='盤面サイズ（複数指定可、デフォルト: 6）')
+    parser.add_argument('-d', '--depth', type=int, default=8,
+                        help='perft の最大の深さ（デフォルト: 8）')
+    parser.add_argument('-e', '--engine', nargs='+', default=None,
+                        help=f'使うエンジン（perft: {", ".join(PERFT_ENGINES)} / '
+                             f'fuzz: {", ".join(FUZZ_ENGINES)}。デフォルト: すべて）')
+    parser.add_argument('--fuzz', type=int, default=0, metavar='N',
+                        help='perft の代わりに、サイズごとに N 局面のファズテストをする')
+    parser.add_argument('--seed', type=int, default=0, help='ファズテストの乱数のシード')
+    args = parser.parse_args()
+
+    for n in args.size:
+        try:
+            bitboard.check_size(n)
+        except ValueError as e:
+            parser.error(str(e))
+
+    if args.fuzz:
+        engines = args.engine or list(FUZZ_ENGINES)
+        if 'numpy' in engines and args.engine is None:
+            try:
+                import numpy  # noqa: F401
+            except ImportError:
+                engines.remove('numpy')  # numpy がなければ numpy エンジンは省く
+        unknown = [e for e in engines if e not in FUZZ_ENGINES]
+        if unknown:
+            parser.error(f"不明なエンジン: {unknown}")
+        ok = fuzz(args.size, args.fuzz, engines, args.seed) == 0
+    else:
+        engines = args.engine or list(PERFT_ENGINES)
+        unknown = [e for e in engines if e not in PERFT_ENGINES]
+        if unknown:
+            parser.error(f"不明なエンジン: {unknown}")
+        ok = all([run_perft(n, args.depth, engines) for n in args.size])
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
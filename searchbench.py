@@ -0,0 +1,128 @@
+"""
+並列探索のベンチマーク
+αβ探索AI の探索を、1プロセス（直列）とルート並列（プロセスプール）で
+同じ局面の集まりについて決まった深さまで読ませ、かかった時間を比べる
+
+局面はシードを決めたランダムな対局の途中局面なので、毎回同じになる。
+どちらも持ち時間は区切らず、置換表は局面ごとに新しく作る
+（ルート並列のプロセスの置換表はプールと一緒に使い回す）。
+最善手の評価値は直列とルート並列で一致するはずなので、それも確かめる。
+
+使い方:
+    python searchbench.py                 # 8x8、12 局面、深さ 6、プロセスは CPU の数
+    python searchbench.py -s 6 -d 8 -j 4
+"""
+
+import argparse
+import math
+import os
+import random
+import sys
+import time
+
+try:
+    # パッケージとして使われる場合（from hachi import ...）
+    from .engine import bitboard
+    from .engine.evaluation import EvaluatedState
+    from .engine.transposition import TranspositionTable
+    from .ai.alphabeta_ai import Search, TT_SIZE_MB, create_pool, get_weight_table
+except ImportError:
+    # 直接実行される場合（python searchbench.py）
+    from engine import bitboard
+    from engine.evaluation import EvaluatedState
+    from engine.transposition import TranspositionTable
+    from ai.alphabeta_ai import Search, TT_SIZE_MB, create_pool, get_weight_table
+
+
+def make_positions(n, count, plies, seed=0):
+    """
+    ランダムな対局で plies 手打った局面を count 個作る（打てる手が2つ以上のものだけ）
+
+    Returns:
+        [(black, white, stone), ...]
+    """
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        p, o = bitboard.initial(n)
+        stone = bitboard.BLACK
+        for _ in range(plies):
+            moves = bitboard.generate_moves(p, o, n)
+            if not moves:
+                p, o, stone = o, p, 3 - stone
+                moves = bitboard.generate_moves(p, o, n)
+                if not moves:
+                    break
+            sq, flipped = rng.choice(moves)
+            p, o, stone = o & ~flipped, p | flipped | (1 << sq), 3 - stone
+        if len(bitboard.generate_moves(p, o, n)) >= 2:
+            black, white = (p, o) if stone == bitboard.BLACK else (o, p)
+            positions.append((black, white, stone))
+    return positions
+
+
+def search_all(positions, n, depth, pool=None):
+    """
+    局面ごとに深さ depth まで読む
+
+    Returns:
+        [(最善手, 評価値, 読んだ局面の数, かかった時間), ...]
+    """
+    results = []
+    for black, white, stone in positions:
+        state = EvaluatedState(black, white, stone, n, get_weight_table(n))
+        search = Search(state, math.inf, depth, TranspositionTable(TT_SIZE_MB),
+                        endgame_empties=0, opening_book=False, pool=pool)
+        start = time.perf_counter()
+        sq, _ = search.run()
+        results.append((sq, search.score, search.nodes, time.perf_counter() - start))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='直列とルート並列の探索の速さを比べる')
+    parser.add_argument('-s', '--size', type=int, default=8, help='盤面サイズ（デフォルト: 8）')
+    parser.add_argument('-d', '--depth', type=int, default=6, help='読む深さ（デフォルト: 6）')
+    parser.add_argument('-n', '--positions', type=int, default=12,
+                        help='局面の数（デフォルト: 12）')
+    parser.add_argument('-p', '--plies', type=int, default=None,
+                        help='局面を作るときに打つ手数（デフォルト: マスの数の 1/3）')
+    parser.add_argument('-j', '--workers', type=int, default=os.cpu_count() or 1,
+                        help='ルート並列のプロセスの数（デフォルト: CPU の数）')
+    parser.add_argument('--seed', type=int, default=0, help='局面を作る乱数のシード')
+    args = parser.parse_args()
+    try:
+        bitboard.check_size(args.size)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.workers < 1:
+        parser.error("--workers は1以上を指定してください")
+
+    n = args.size
+    plies = args.plies if args.plies is not None else n * n // 3
+    positions = make_positions(n, args.positions, plies, args.seed)
+    print(f"{n}x{n} {len(positions)} 局面（{plies} 手目）、深さ {args.depth}、"
+          f"{args.workers} プロセス（CPU {os.cpu_count()}）")
+
+    serial = search_all(positions, n, args.depth)
+    pool = create_pool(args.workers)  # プロセスの起動の時間は比べる時間に入れない
+    try:
+        parallel = search_all(positions, n, args.depth, pool)
+    finally:
+        pool.shutdown()
+
+    mismatches = 0
+    for i, ((_, s_score, s_nodes, s_time), (_, p_score, p_nodes, p_time)) in enumerate(zip(serial, parallel), 1):
+        same = s_score == p_score
+        mismatches += not same
+        print(f"{i:3}. 直列 {s_time:7.3f}s {s_nodes:9} 局面 | 並列 {p_time:7.3f}s {p_nodes:9} 局面 "
+              f"| {s_time / p_time:5.2f} 倍{'' if same else '  評価値が不一致'}")
+    serial_time = sum(r[3] for r in serial)
+    parallel_time = sum(r[3] for r in parallel)
+    print(f"合計: 直列 {serial_time:.3f}s, 並列 {parallel_time:.3f}s → {serial_time / parallel_time:.2f} 倍"
+          f"（評価値の不一致 {mismatches} 局面）")
+    sys.exit(0 if mismatches == 0 else 1)
+
+
+if __name__ == "__main__":
+    main()
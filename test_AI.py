@@ -14,10 +14,17 @@ try:
     from sakura import othello
     can_place_x_y = othello.can_place_x_y
     move_stone = othello.move_stone
+    apply_move = othello.apply_move
     copy = othello.copy
+    valid_moves = othello.valid_moves
+    GameState = othello.GameState
+    EvaluatedState = othello.EvaluatedState
+    WeightTable = othello.WeightTable
 except ImportError:
     # 直接実行する場合
-    from othello import can_place_x_y, move_stone, copy
+    from othello import can_place_x_y, move_stone, apply_move, copy, valid_moves, GameState, EvaluatedState, WeightTable
+
+from functools import lru_cache
 
 def get_position_score_6x6():
     """6x6盤面の位置評価スコア"""
@@ -45,13 +52,54 @@ def get_position_score_8x8():
 
 def get_position_score(board):
     """盤面サイズに応じた位置評価スコアを取得"""
-    size = len(board)
+    return get_position_score_for_size(len(board))
+
+@lru_cache(maxsize=None)
+def get_weight_table(size):
+    """
+    盤面サイズに応じた位置評価スコアの表（WeightTable）を取得
+    表はサイズごとに1回だけ作り、あとは同じものを使い回す
+    """
+    return WeightTable(get_position_score_for_size(size), size)
+
+def get_position_score_nxn(size):
+    """
+    任意サイズの盤面の位置評価スコア
+
+    角が最も高く、角の隣（C・X）は低く、辺は高め、
+    外から2周目は低め、それより内側はほぼ0点にする
+    """
+    last = size - 1
+    scores = []
+    for y in range(size):
+        row = []
+        for x in range(size):
+            ring = min(x, y, last - x, last - y)  # 外から何周目か（0始まり）
+            cx = min(x, last - x)  # 近いほうの端からの距離
+            cy = min(y, last - y)
+            if cx == 0 and cy == 0:
+                row.append(100)   # 角
+            elif cx <= 1 and cy <= 1:
+                row.append(-20)   # 角の隣（C・X）
+            elif ring == 0:
+                row.append(10 if max(cx, cy) == 2 else 5)   # 辺
+            elif ring == 1:
+                row.append(-5)    # 外から2周目
+            elif ring == 2:
+                row.append(3)
+            else:
+                row.append(1)
+        scores.append(row)
+    return scores
+
+def get_position_score_for_size(size):
+    """盤面サイズ（一辺のマス数）から位置評価スコアを取得"""
     if size == 6:
         return get_position_score_6x6()
     elif size == 8:
         return get_position_score_8x8()
     else:
-        return get_position_score_6x6()
+        return get_position_score_nxn(size)
 
 def evaluate_board(board, stone):
     """
@@ -66,30 +114,50 @@ def evaluate_board(board, stone):
     Returns:
         評価値（高いほど有利）
     """
-    position_scores = get_position_score(board)
+    weights = get_weight_table(len(board)).weights
     opponent = 3 - stone
+    n = len(board)
 
     my_score = 0
     opponent_score = 0
 
-    for y in range(len(board)):
-        for x in range(len(board[0])):
-            if board[y][x] == stone:
-                my_score += position_scores[y][x]
-            elif board[y][x] == opponent:
-                opponent_score += position_scores[y][x]
+    for y, row in enumerate(board):
+        for x, cell in enumerate(row):
+            if cell == stone:
+                my_score += weights[y * n + x]
+            elif cell == opponent:
+                opponent_score += weights[y * n + x]
 
     # 自分のスコア - 相手のスコア
     return my_score - opponent_score
 
+def evaluate_state(state, stone, weights=None):
+    """
+    局面（GameState）を evaluate_board と同じ位置評価スコアで評価する関数
+
+    EvaluatedState なら差分で更新してある評価値をそのまま返す（O(1)）
+
+    Args:
+        state: 局面
+        stone: 評価する側の石の色
+        weights: 位置評価スコアの表（WeightTable、省略時は盤面サイズに応じた表）
+
+    Returns:
+        評価値（高いほど有利）
+    """
+    if weights is None:
+        weights = get_weight_table(state.n)
+    if isinstance(state, EvaluatedState) and state.weights is weights:
+        return state.evaluate(stone)
+
+    mine, theirs = (state.black, state.white) if stone == 1 else (state.white, state.black)
+
+    # 自分のスコア - 相手のスコア
+    return weights.score(mine) - weights.score(theirs)
+
 def get_valid_moves(board, stone):
     """合法手のリストを取得"""
-    valid_moves = []
-    for y in range(len(board)):
-        for x in range(len(board[0])):
-            if can_place_x_y(board, stone, x, y):
-                valid_moves.append((x, y))
-    return valid_moves
+    return valid_moves(board, stone)
 
 def myai(board, stone):
     """
@@ -102,38 +170,39 @@ def myai(board, stone):
     Returns:
         (x, y): 選択した手
     """
-    valid_moves = get_valid_moves(board, stone)
+    # 盤面は局面オブジェクトに変換し、手を試すたびに make/unmake する（コピーしない）
+    # 評価値（位置評価スコアの差）も make/unmake のたびに差分で更新される
+    weights = get_weight_table(len(board))
+    state = EvaluatedState.from_board(board, stone, weights)
+
+    valid_moves = state.moves()
 
     if not valid_moves:
         return None
 
-    opponent = 3 - stone
     best_move = None
     best_score = float('-inf')
 
     # 自分の全ての合法手を試す
-    for my_x, my_y in valid_moves:
-        # 自分の手を打った後の盤面を作成
-        test_board = copy(board)
-        move_stone(test_board, stone, my_x, my_y)
+    for my_sq in valid_moves:
+        # 自分の手を打つ
+        state.make(my_sq)
 
         # 相手の応手を全て試す
-        opponent_moves = get_valid_moves(test_board, opponent)
+        opponent_moves = state.moves()
 
         if not opponent_moves:
             # 相手が打てない場合、この盤面を評価
-            score = evaluate_board(test_board, stone)
+            score = state.evaluate(stone)
         else:
             # 相手が最善手を打つと仮定（ミニマックス）
             worst_score = float('inf')
 
-            for opp_x, opp_y in opponent_moves:
-                # 相手の手を打った後の盤面を作成
-                test_board2 = copy(test_board)
-                move_stone(test_board2, opponent, opp_x, opp_y)
-
-                # その盤面を評価
-                score = evaluate_board(test_board2, stone)
+            for opp_sq in opponent_moves:
+                # 相手の手を打って評価し、元に戻す
+                state.make(opp_sq)
+                score = state.evaluate(stone)
+                state.unmake()
 
                 # 相手にとって最善（自分にとって最悪）のスコアを記録
                 if score < worst_score:
@@ -141,10 +210,13 @@ def myai(board, stone):
 
             score = worst_score
 
+        # 自分の手を元に戻す
+        state.unmake()
+
         # 最も有利な手を選択
         if score > best_score:
             best_score = score
-            best_move = (my_x, my_y)
+            best_move = state.coords(my_sq)
       
     
     # time.sleep(0.5)
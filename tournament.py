@@ -5,24 +5,88 @@
 
 import json
 import sys
+import time
+import builtins
 import traceback
 import argparse
 import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 
 sys.path.append('ai')
 
 try:
     # パッケージとして使われる場合（from hachi import ...）
-    from .othello import can_place_x_y, copy, move_stone, can_place, safe_place, BLACK, WHITE
+    from .othello import can_place_x_y, copy, move_stone, apply_move, safe_place, BLACK, WHITE
+    from .engine import bitboard, book, endgame
+    from .instrument import instrumented
     from .ai.greedy_ai import GreedyAI
     from .ai.corner_ai import CornerAI
     from .ai.lookahead_ai import LookaheadAI
+    from .ai.alphabeta_ai import AlphaBetaAI
 except ImportError:
     # 直接実行される場合（python tournament.py）
-    from othello import can_place_x_y, copy, move_stone, can_place, safe_place, BLACK, WHITE
+    from othello import can_place_x_y, copy, move_stone, apply_move, safe_place, BLACK, WHITE
+    from engine import bitboard, book, endgame
+    from instrument import instrumented
     from greedy_ai import GreedyAI
     from corner_ai import CornerAI
     from lookahead_ai import LookaheadAI
+    from alphabeta_ai import AlphaBetaAI
+
+
+# ユーザーAIの読み込み（コードの実行）にかけてよい時間（秒）
+LOAD_TIMEOUT = 1.0
+
+# 基準AIのαβ探索AIが読む深さ。採点がスレッドの数（-j）やマシンの速さで変わらないように、
+# 持ち時間ではなく深さで区切り、置換表も手ごとに空にする（深さ 5 は 6x6 の中盤で
+# 1手 0.05 秒のときに読める深さくらい）
+SCORING_DEPTH = 5
+
+# ユーザーAIから import させないモジュール（GUIなど、対戦を止めてしまうもの）
+BLOCKED_MODULES = ('tkinter', 'turtle', 'pygame')
+
+
+class BlockedModule:
+    """ブロックしたモジュールの代わり（属性を使おうとすると ImportError）"""
+
+    def __getattr__(self, name):
+        raise ImportError(f"Module is blocked in tournament mode")
+
+
+def _guarded_import(name, *args, **kwargs):
+    """BLOCKED_MODULES だけ BlockedModule を返す __import__"""
+    if name.partition('.')[0] in BLOCKED_MODULES:
+        return BlockedModule()
+    return builtins.__import__(name, *args, **kwargs)
+
+
+@contextmanager
+def watchdog(seconds, message="timeout"):
+    """
+    この中の処理が seconds 秒を超えたら TimeoutError を送る
+
+    SIGALRM と違ってメインスレッド以外でも使え、ほかのスレッドには影響しない
+    （sys.settrace はスレッドごと）。Python のコードを1行進めるたびに時刻を調べるので、
+    time.sleep() など C の関数の中で止まっている間は割り込めない。
+
+    Args:
+        seconds: 制限時間（秒）
+        message: TimeoutError のメッセージ
+    """
+    deadline = time.monotonic() + seconds
+    previous = sys.gettrace()
+
+    def trace(frame, event, arg):
+        if time.monotonic() > deadline:
+            raise TimeoutError(message)
+        return trace
+
+    sys.settrace(trace)
+    try:
+        yield
+    finally:
+        sys.settrace(previous)
 
 
 class UserAIAdapter:
@@ -34,45 +98,31 @@ class UserAIAdapter:
         self.ai_function = None
         self.ai_instance = None
         self.error = None
+        self.namespace = None  # コードを実行した環境（計測のときに関数を差し替える）
 
         # コードを実行して関数/クラスを抽出
         self._load_ai()
 
     def _load_ai(self):
         """ユーザーのコードを実行してAI関数/クラスを取得"""
-        import signal
-
-        def timeout_handler(signum, frame):
-            raise TimeoutError("AI loading timeout - possible infinite loop or input() call")
-
         try:
             # 安全な実行環境を作成
             # 標準入力をブロックする関数（SystemExitで強制停止）
             def blocked_input(*args):
                 raise SystemExit("input() is not allowed in tournament mode")
 
-            # __builtins__をコピーしてinputを置き換え
-            import builtins
-            import sys
+            # __builtins__をコピーしてinputと__import__を置き換え
+            # （sys.modules は書き換えないので、ほかのスレッドの対戦に影響しない）
             safe_builtins = {name: getattr(builtins, name) for name in dir(builtins)}
             safe_builtins['input'] = blocked_input
-
-            # tkinterなどのGUIモジュールをブロック
-            class BlockedModule:
-                def __getattr__(self, name):
-                    raise ImportError(f"Module is blocked in tournament mode")
-
-            # sys.modulesを一時的に保存
-            original_modules = sys.modules.copy()
-            sys.modules['tkinter'] = BlockedModule()
-            sys.modules['turtle'] = BlockedModule()
-            sys.modules['pygame'] = BlockedModule()
+            safe_builtins['__import__'] = _guarded_import
 
             exec_vars = {
                 '__builtins__': safe_builtins,
                 'can_place_x_y': can_place_x_y,
                 'copy': copy,
                 'move_stone': move_stone,
+                'apply_move': apply_move,
                 'List': list,  # 型ヒント用
                 'Tuple': tuple,
                 'Optional': type(None),
@@ -84,17 +134,15 @@ class UserAIAdapter:
             # これにより関数間の参照が正しく動作する
             # __name__を設定してif __name__ == "__main__"ブロックを実行させない
             exec_vars['__name__'] = '__tournament__'
+            self.namespace = exec_vars
 
             # タイムアウトを設定（1秒）
-            signal.signal(signal.SIGALRM, timeout_handler)
-            signal.alarm(1)
             try:
-                exec(self.code, exec_vars)
+                with watchdog(LOAD_TIMEOUT, "AI loading timeout - possible infinite loop or input() call"):
+                    exec(self.code, exec_vars)
             except (SystemExit, KeyboardInterrupt):
                 # input()やmainloop()などでブロックされた場合
                 raise TimeoutError("Code execution blocked (input/GUI detected)")
-            finally:
-                signal.alarm(0)  # タイムアウト解除
 
             # 関数またはクラスを探す
             # よくある関数名: myai, othello_ai, ai_move, get_best_move
@@ -119,20 +167,7 @@ class UserAIAdapter:
             if not self.ai_function and not self.ai_instance:
                 self.error = "AI関数またはクラスが見つかりません"
 
-            # sys.modulesを復元
-            sys.modules.update(original_modules)
-            for key in list(sys.modules.keys()):
-                if key not in original_modules:
-                    del sys.modules[key]
-
         except Exception as e:
-            # sys.modulesを復元
-            import sys
-            if 'original_modules' in locals():
-                sys.modules.update(original_modules)
-                for key in list(sys.modules.keys()):
-                    if key not in original_modules:
-                        del sys.modules[key]
             self.error = f"コード実行エラー: {str(e)}\n{traceback.format_exc()}"
 
     def face(self):
@@ -231,87 +266,137 @@ def count_stones(board, stone):
     return sum(row.count(stone) for row in board)
 
 
-def run_match(ai1, ai2, board_size=6, max_turns=100):
+def _is_legal(moves, x, y, n):
+    """ビットボードの合法手マスクで (x, y) が打てるかを調べる"""
+    return x is not None and y is not None and 0 <= x < n and 0 <= y < n and (moves >> (y * n + x)) & 1
+
+
+class MatchResult(tuple):
+    """
+    計測つきの run_match の結果
+    (result, black_count, white_count) のタプルとして扱え、stats に計測結果を持つ
+    """
+
+    def __new__(cls, result, stats):
+        self = super().__new__(cls, result)
+        self.stats = stats
+        return self
+
+
+class _Attributed:
+    """AIの呼び出し中に呼ばれた関数を、そのAIの分として数えるためのラッパー"""
+
+    def __init__(self, ai, stats, label):
+        self.ai = ai
+        self.stats = stats
+        self.label = label
+
+    def place(self, board, stone):
+        with self.stats.attribute(self.label):
+            return safe_place(self.ai, board, stone)
+
+
+def run_match(ai1, ai2, board_size=6, max_turns=None, adjudicate=False, instrument=False):
     """
     2つのAIを対戦させる（displayなしの独自実装）
 
+    盤面は内部ではビットボードで持ち、AIに渡すときだけ2次元リストに変換する
+
+    Args:
+        ai1: 黒のAI
+        ai2: 白のAI
+        board_size: 盤面サイズ（4以上の偶数）
+        max_turns: 最大ターン数（省略時はマスの数。どちらかが打てば1ターンとして数える）
+        adjudicate: True なら、確定石で勝敗が決まり空きマスが少なくなった時点で
+            AIを呼ぶのをやめ、残りは engine.endgame.adjudicate で読み切って石数を決める
+            （勝敗は変わらないが、石数は両者が最善を尽くしたときの値になる）
+        instrument: True なら、can_place などのルール関数の呼び出し回数と時間を
+            AIごとに数え、結果の stats に入れる（instrument.py を参照）
+
     Returns:
         (result, black_count, white_count)
         result: 1=黒の勝ち, 2=白の勝ち, 0=引き分け, -1=エラー
-        black_count: 黒の最終石数
-        white_count: 白の最終石数
+        black_count: 黒の最終石数（打ち切ったときは読み切りの値）
+        white_count: 白の最終石数（打ち切ったときは読み切りの値）
+        instrument=True のときは MatchResult で、stats に
+        {'ai1': {関数名: {'calls': 回数, 'seconds': 時間}}, 'ai2': {...}, 'total': {...}} が入る
     """
+    n = bitboard.check_size(board_size)
+    if max_turns is None:
+        max_turns = n * n
+
+    if instrument:
+        # 計測するときだけ関数を差し替えて、同じ対局をもう一段内側で行う
+        namespaces = [getattr(ai, 'namespace', None) for ai in (ai1, ai2)]
+        with instrumented(namespaces) as stats:
+            result = run_match(_Attributed(ai1, stats, 'ai1'), _Attributed(ai2, stats, 'ai2'),
+                               board_size, max_turns, adjudicate)
+        return MatchResult(result, stats.as_dict())
+
     try:
         # 初期盤面
-        if board_size == 8:
-            board = [
-                [0,0,0,0,0,0,0,0],
-                [0,0,0,0,0,0,0,0],
-                [0,0,0,0,0,0,0,0],
-                [0,0,0,1,2,0,0,0],
-                [0,0,0,2,1,0,0,0],
-                [0,0,0,0,0,0,0,0],
-                [0,0,0,0,0,0,0,0],
-                [0,0,0,0,0,0,0,0],
-            ]
-        else:  # 6x6
-            board = [
-                [0,0,0,0,0,0],
-                [0,0,0,0,0,0],
-                [0,0,1,2,0,0],
-                [0,0,2,1,0,0],
-                [0,0,0,0,0,0],
-                [0,0,0,0,0,0],
-            ]
+        black, white = bitboard.initial(n)
 
         moved = True
         turn_count = 0
+        settled = None
 
         while moved and turn_count < max_turns:
             moved = False
             turn_count += 1
 
+            if adjudicate:
+                settled = endgame.adjudicate(black, white, BLACK, n)
+                if settled:
+                    break
+
             # 黒(ai1)のターン
-            if can_place(board, BLACK):
+            moves = bitboard.legal_moves(black, white, n)
+            if moves:
                 try:
-                    x, y = safe_place(ai1, copy(board), BLACK)
-                    if x is not None and y is not None and can_place_x_y(board, BLACK, x, y):
-                        move_stone(board, BLACK, x, y)
+                    x, y = safe_place(ai1, bitboard.unpack(black, white, n), BLACK)
+                    if _is_legal(moves, x, y, n):
+                        black, white, _ = bitboard.play(black, white, y * n + x, n)
                         moved = True
                     else:
                         # 無効な手 = 反則負け
-                        black_count = count_stones(board, BLACK)
-                        white_count = count_stones(board, WHITE)
-                        return (2, black_count, white_count)  # 白の勝ち
+                        return (2, bitboard.count(black), bitboard.count(white))  # 白の勝ち
                 except Exception as e:
                     # エラー（盤面サイズ非対応など）= AI動作不能
                     print(f"  AI1 error: {e}")
                     return (-1, 0, 0)
 
+            if adjudicate:
+                settled = endgame.adjudicate(black, white, WHITE, n)
+                if settled:
+                    break
+
             # 白(ai2)のターン
-            if can_place(board, WHITE):
+            moves = bitboard.legal_moves(white, black, n)
+            if moves:
                 try:
-                    x, y = safe_place(ai2, copy(board), WHITE)
-                    if x is not None and y is not None and can_place_x_y(board, WHITE, x, y):
-                        move_stone(board, WHITE, x, y)
+                    x, y = safe_place(ai2, bitboard.unpack(black, white, n), WHITE)
+                    if _is_legal(moves, x, y, n):
+                        white, black, _ = bitboard.play(white, black, y * n + x, n)
                         moved = True
                     else:
                         # 無効な手 = 反則負け
-                        black_count = count_stones(board, BLACK)
-                        white_count = count_stones(board, WHITE)
-                        return (1, black_count, white_count)  # 黒の勝ち
+                        return (1, bitboard.count(black), bitboard.count(white))  # 黒の勝ち
                 except Exception as e:
                     # エラー（盤面サイズ非対応など）= AI動作不能
                     print(f"  AI2 error: {e}")
                     return (-1, 0, 0)
 
             # 両者とも打てない場合は終了
-            if not can_place(board, BLACK) and not can_place(board, WHITE):
+            if not bitboard.legal_moves(black, white, n) and not bitboard.legal_moves(white, black, n):
                 break
 
         # 石の数を数えて勝敗を判定
-        black_count = count_stones(board, BLACK)
-        white_count = count_stones(board, WHITE)
+        if settled:
+            black_count, white_count = settled
+        else:
+            black_count = bitboard.count(black)
+            white_count = bitboard.count(white)
 
         if black_count > white_count:
             return (1, black_count, white_count)  # 黒の勝ち
@@ -326,7 +411,53 @@ def run_match(ai1, ai2, board_size=6, max_turns=100):
         return (-1, 0, 0)  # エラー
 
 
-def calculate_scores(user_ais, reference_ais, board_size=6):
+def run_matches(matchups, board_size=6, workers=None, **kwargs):
+    """
+    複数の対局をスレッドプールで同時に行う
+
+    run_match はモジュールの状態を書き換えないので、別々のスレッドで同時に呼べる
+    （instrument=True だけは関数を差し替えるので使えない）。
+
+    Args:
+        matchups: [(黒のAI, 白のAI), ...]
+        board_size: 盤面サイズ
+        workers: スレッド数（省略時は ThreadPoolExecutor の既定値）
+        **kwargs: run_match に渡す引数（max_turns, adjudicate）
+
+    Returns:
+        run_match の結果のリスト（matchups と同じ順番）
+    """
+    if kwargs.get('instrument'):
+        raise ValueError("run_matches では instrument=True は使えません")
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(run_match, ai1, ai2, board_size, **kwargs) for ai1, ai2 in matchups]
+        return [future.result() for future in futures]
+
+
+def _add_calls(total, calls):
+    """関数ごとの呼び出し回数と時間を total に足し込む"""
+    for name, entry in calls.items():
+        summed = total.setdefault(name, {'calls': 0, 'seconds': 0.0})
+        summed['calls'] += entry['calls']
+        summed['seconds'] += entry['seconds']
+
+
+def scoring_alphabeta(workers=1):
+    """
+    採点に使うαβ探索AI（持ち時間ではなく深さ SCORING_DEPTH で区切り、置換表は手ごとに空にする）
+
+    同じ局面にはいつも同じ手を返すので、calculate_scores の workers を増やしても結果は変わらない
+    """
+    return AlphaBetaAI(time_limit=float('inf'), max_depth=SCORING_DEPTH, workers=workers, fresh_table=True)
+
+
+def _time_budgeted(ai):
+    """持ち時間で探索を区切るAIか（読める深さがマシンの速さや同時に動くスレッドで変わる）"""
+    time_limit = getattr(ai, 'time_limit', None)
+    return time_limit is not None and time_limit != float('inf')
+
+
+def calculate_scores(user_ais, reference_ais, board_size=6, instrument=False, workers=1):
     """
     各ユーザーAIと基準AIを対戦させ、スコアを計算
 
@@ -340,122 +471,177 @@ def calculate_scores(user_ais, reference_ais, board_size=6):
         user_ais: [(generation_id, adapter, original_data), ...]
         reference_ais: [AI1, AI2, AI3, ...]
         board_size: 盤面サイズ
+        instrument: True なら、ユーザーAIが呼んだルール関数の回数と時間を数え、
+            結果の engineCalls に入れる
+        workers: 同時に対戦させるユーザーAIの数（スレッド数）。
+            表示と結果の順番は workers=1 のときと同じ
 
     Returns:
         {generation_id: (score, original_data), ...}
+
+    Raises:
+        ValueError: workers > 1 で、持ち時間で区切る基準AI（time_limit のあるAI）がある場合など
     """
+    if instrument and workers > 1:
+        # 計測はモジュールの関数を差し替えるので、ほかのスレッドの対戦まで数えてしまう
+        raise ValueError("instrument=True と workers > 1 は同時に使えません")
+    if workers > 1:
+        # 持ち時間で区切るAIは、同時に動くスレッドが増えると読める深さが浅くなり、
+        # workers=1 のときと結果が変わってしまう（scoring_alphabeta のように深さで区切る）
+        budgeted = [ai.__class__.__name__ for ai in reference_ais if _time_budgeted(ai)]
+        if budgeted:
+            raise ValueError(f"持ち時間で区切る基準AIがあるときは workers > 1 は使えません: {budgeted}")
+
     results = {}
+    if workers <= 1:
+        for generation_id, user_ai, original_data in user_ais:
+            results[generation_id] = _score_user(generation_id, user_ai, original_data,
+                                                 reference_ais, board_size, instrument, print)
+        return results
+
+    def score(entry):
+        lines = []
+        result = _score_user(*entry, reference_ais, board_size, instrument, lines.append)
+        return result, lines
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(score, entry) for entry in user_ais]
+        # 終わった順ではなく、読み込んだ順に表示する
+        for (generation_id, _, _), future in zip(user_ais, futures):
+            results[generation_id], lines = future.result()
+            for line in lines:
+                print(line)
+    return results
 
-    for generation_id, user_ai, original_data in user_ais:
-        total_score = 0
-        matches_played = 0
-
-        user_id = original_data.get('userId', 'unknown')
-        print(f"\n=== {generation_id} (user: {user_id}) ===")
-
-        # エラーで読み込めなかったAIは0点
-        if user_ai.error:
-            print(f"  AI読み込みエラーのため対戦スキップ: {user_ai.error[:50]}...")
-            data_with_stones = original_data.copy()
-            data_with_stones['stonesCount_total'] = 0
-            # 全ての対戦相手のフィールドを0で埋める
-            for ref_ai in reference_ais:
-                opponent_name = ref_ai.__class__.__name__
-                data_with_stones[f'stonesCount_{opponent_name}_senkou'] = 0
-                data_with_stones[f'stonesCount_{opponent_name}_koukou'] = 0
-            results[generation_id] = (0, data_with_stones)
-            continue
-
-        # 実行時エラーチェック用フラグ
-        is_ai_working = True
-        total_stones_taken = 0  # ユーザーAIが取った石の合計
-        stones_by_opponent = {}  # 対戦相手ごとの石の数
 
-        for ref_ai in reference_ais:
-            opponent_name = ref_ai.__class__.__name__  # 'GreedyAI', 'CornerAI', 'LookaheadAI'
-            opponent_stones_black = 0  # 先攻（黒番）
-            opponent_stones_white = 0  # 後攻（白番）
-
-            # ユーザーAI(黒) vs 基準AI(白)
-            result1, black_count, white_count = run_match(user_ai, ref_ai, board_size)
-            if result1 == 1:
-                total_score += 3  # 勝ち
-                total_stones_taken += black_count
-                opponent_stones_black = black_count
-                print(f"  vs {ref_ai.face()}{ref_ai.name()}: WIN (黒) +3 [{black_count}-{white_count}]")
-            elif result1 == 0:
-                total_score += 2  # 引き分け
-                total_stones_taken += black_count
-                opponent_stones_black = black_count
-                print(f"  vs {ref_ai.face()}{ref_ai.name()}: DRAW (黒) +2 [{black_count}-{white_count}]")
-            elif result1 == 2:
-                total_score += 1  # 負け
-                total_stones_taken += black_count
-                opponent_stones_black = black_count
-                print(f"  vs {ref_ai.face()}{ref_ai.name()}: LOSE (黒) +1 [{black_count}-{white_count}]")
-            else:
-                # エラー：盤面サイズ非対応など実行不能
-                print(f"  vs {ref_ai.face()}{ref_ai.name()}: ERROR (黒) - AI動作不能のため0点扱い")
-                is_ai_working = False
-                break
+def _score_user(generation_id, user_ai, original_data, reference_ais, board_size, instrument, log):
+    """
+    1つのユーザーAIを基準AIと対戦させる（calculate_scores の1人分）
 
-            matches_played += 1
-
-            # 基準AI(黒) vs ユーザーAI(白)
-            result2, black_count, white_count = run_match(ref_ai, user_ai, board_size)
-            if result2 == 2:
-                total_score += 3  # 勝ち
-                total_stones_taken += white_count
-                opponent_stones_white = white_count
-                print(f"  vs {ref_ai.face()}{ref_ai.name()}: WIN (白) +3 [{black_count}-{white_count}]")
-            elif result2 == 0:
-                total_score += 2  # 引き分け
-                total_stones_taken += white_count
-                opponent_stones_white = white_count
-                print(f"  vs {ref_ai.face()}{ref_ai.name()}: DRAW (白) +2 [{black_count}-{white_count}]")
-            elif result2 == 1:
-                total_score += 1  # 負け
-                total_stones_taken += white_count
-                opponent_stones_white = white_count
-                print(f"  vs {ref_ai.face()}{ref_ai.name()}: LOSE (白) +1 [{black_count}-{white_count}]")
-            else:
-                # エラー：盤面サイズ非対応など実行不能
-                print(f"  vs {ref_ai.face()}{ref_ai.name()}: ERROR (白) - AI動作不能のため0点扱い")
-                is_ai_working = False
-                break
+    Args:
+        log: 表示する行を受け取る関数（print など）
 
-            matches_played += 1
-            stones_by_opponent[opponent_name] = {
-                'black': opponent_stones_black,
-                'white': opponent_stones_white
-            }
+    Returns:
+        (score, data_with_stones)
+    """
+    total_score = 0
+    matches_played = 0
+
+    user_id = original_data.get('userId', 'unknown')
+    log(f"\n=== {generation_id} (user: {user_id}) ===")
 
-        # エラーが出たAIは0点
-        if not is_ai_working:
-            data_with_stones = original_data.copy()
-            data_with_stones['stonesCount_total'] = 0
-            # 全ての対戦相手のフィールドを0で埋める
-            for ref_ai in reference_ais:
-                opponent_name = ref_ai.__class__.__name__
-                data_with_stones[f'stonesCount_{opponent_name}_senkou'] = 0
-                data_with_stones[f'stonesCount_{opponent_name}_koukou'] = 0
-            results[generation_id] = (0, data_with_stones)
-            print(f"  Total Score: 0 (AI動作不能)")
-            continue
-
-        # フラットな構造に変換（トップレベルに追加）
+    # エラーで読み込めなかったAIは0点
+    if user_ai.error:
+        log(f"  AI読み込みエラーのため対戦スキップ: {user_ai.error[:50]}...")
         data_with_stones = original_data.copy()
-        data_with_stones['stonesCount_total'] = total_stones_taken
-        for opponent, counts in stones_by_opponent.items():
-            data_with_stones[f'stonesCount_{opponent}_senkou'] = counts['black']
-            data_with_stones[f'stonesCount_{opponent}_koukou'] = counts['white']
+        data_with_stones['stonesCount_total'] = 0
+        # 全ての対戦相手のフィールドを0で埋める
+        for ref_ai in reference_ais:
+            opponent_name = ref_ai.__class__.__name__
+            data_with_stones[f'stonesCount_{opponent_name}_senkou'] = 0
+            data_with_stones[f'stonesCount_{opponent_name}_koukou'] = 0
+        return 0, data_with_stones
 
-        results[generation_id] = (total_score, data_with_stones)
-        print(f"  Total Score: {total_score} ({matches_played} matches, {total_stones_taken} stones)")
-        for opponent, counts in stones_by_opponent.items():
-            print(f"    {opponent}: 黒{counts['black']} + 白{counts['white']} = {counts['black'] + counts['white']}")
+    # 実行時エラーチェック用フラグ
+    is_ai_working = True
+    total_stones_taken = 0  # ユーザーAIが取った石の合計
+    stones_by_opponent = {}  # 対戦相手ごとの石の数
+    engine_calls = {}  # ユーザーAIが呼んだルール関数の回数と時間（instrument のとき）
 
-    return results
+    for ref_ai in reference_ais:
+        opponent_name = ref_ai.__class__.__name__  # 'GreedyAI', 'CornerAI', 'LookaheadAI', 'AlphaBetaAI'
+        opponent_stones_black = 0  # 先攻（黒番）
+        opponent_stones_white = 0  # 後攻（白番）
+
+        # ユーザーAI(黒) vs 基準AI(白)
+        match = run_match(user_ai, ref_ai, board_size, instrument=instrument)
+        result1, black_count, white_count = match
+        if instrument:
+            _add_calls(engine_calls, match.stats.get('ai1', {}))
+        if result1 == 1:
+            total_score += 3  # 勝ち
+            total_stones_taken += black_count
+            opponent_stones_black = black_count
+            log(f"  vs {ref_ai.face()}{ref_ai.name()}: WIN (黒) +3 [{black_count}-{white_count}]")
+        elif result1 == 0:
+            total_score += 2  # 引き分け
+            total_stones_taken += black_count
+            opponent_stones_black = black_count
+            log(f"  vs {ref_ai.face()}{ref_ai.name()}: DRAW (黒) +2 [{black_count}-{white_count}]")
+        elif result1 == 2:
+            total_score += 1  # 負け
+            total_stones_taken += black_count
+            opponent_stones_black = black_count
+            log(f"  vs {ref_ai.face()}{ref_ai.name()}: LOSE (黒) +1 [{black_count}-{white_count}]")
+        else:
+            # エラー：盤面サイズ非対応など実行不能
+            log(f"  vs {ref_ai.face()}{ref_ai.name()}: ERROR (黒) - AI動作不能のため0点扱い")
+            is_ai_working = False
+            break
+
+        matches_played += 1
+
+        # 基準AI(黒) vs ユーザーAI(白)
+        match = run_match(ref_ai, user_ai, board_size, instrument=instrument)
+        result2, black_count, white_count = match
+        if instrument:
+            _add_calls(engine_calls, match.stats.get('ai2', {}))
+        if result2 == 2:
+            total_score += 3  # 勝ち
+            total_stones_taken += white_count
+            opponent_stones_white = white_count
+            log(f"  vs {ref_ai.face()}{ref_ai.name()}: WIN (白) +3 [{black_count}-{white_count}]")
+        elif result2 == 0:
+            total_score += 2  # 引き分け
+            total_stones_taken += white_count
+            opponent_stones_white = white_count
+            log(f"  vs {ref_ai.face()}{ref_ai.name()}: DRAW (白) +2 [{black_count}-{white_count}]")
+        elif result2 == 1:
+            total_score += 1  # 負け
+            total_stones_taken += white_count
+            opponent_stones_white = white_count
+            log(f"  vs {ref_ai.face()}{ref_ai.name()}: LOSE (白) +1 [{black_count}-{white_count}]")
+        else:
+            # エラー：盤面サイズ非対応など実行不能
+            log(f"  vs {ref_ai.face()}{ref_ai.name()}: ERROR (白) - AI動作不能のため0点扱い")
+            is_ai_working = False
+            break
+
+        matches_played += 1
+        stones_by_opponent[opponent_name] = {
+            'black': opponent_stones_black,
+            'white': opponent_stones_white
+        }
+
+    # エラーが出たAIは0点
+    if not is_ai_working:
+        data_with_stones = original_data.copy()
+        data_with_stones['stonesCount_total'] = 0
+        # 全ての対戦相手のフィールドを0で埋める
+        for ref_ai in reference_ais:
+            opponent_name = ref_ai.__class__.__name__
+            data_with_stones[f'stonesCount_{opponent_name}_senkou'] = 0
+            data_with_stones[f'stonesCount_{opponent_name}_koukou'] = 0
+        log(f"  Total Score: 0 (AI動作不能)")
+        return 0, data_with_stones
+
+    # フラットな構造に変換（トップレベルに追加）
+    data_with_stones = original_data.copy()
+    data_with_stones['stonesCount_total'] = total_stones_taken
+    for opponent, counts in stones_by_opponent.items():
+        data_with_stones[f'stonesCount_{opponent}_senkou'] = counts['black']
+        data_with_stones[f'stonesCount_{opponent}_koukou'] = counts['white']
+
+    if instrument:
+        data_with_stones['engineCalls'] = engine_calls
+        for name, entry in sorted(engine_calls.items()):
+            log(f"  {name}: {entry['calls']} calls, {entry['seconds']:.3f}s")
+
+    log(f"  Total Score: {total_score} ({matches_played} matches, {total_stones_taken} stones)")
+    for opponent, counts in stones_by_opponent.items():
+        log(f"    {opponent}: 黒{counts['black']} + 白{counts['white']} = {counts['black'] + counts['white']}")
+
+    return total_score, data_with_stones
 
 
 def save_results(results, output_path):
@@ -485,11 +671,31 @@ def main():
                         help='結果を保存するJSONLファイルのパス（デフォルト: results/tournament_results.jsonl）')
     parser.add_argument('-s', '--size',
                         type=int,
-                        choices=[6, 8],
                         default=6,
-                        help='盤面サイズ（6または8、デフォルト: 6）')
+                        help='盤面サイズ（4以上の偶数、デフォルト: 6）')
+    parser.add_argument('--profile',
+                        action='store_true',
+                        help='ユーザーAIが呼んだルール関数（can_place など）の回数と時間を数える')
+    parser.add_argument('-j', '--workers',
+                        type=int,
+                        default=1,
+                        help='同時に対戦させるユーザーAIの数（スレッド数、デフォルト: 1）')
+    parser.add_argument('--search-workers',
+                        type=int,
+                        default=1,
+                        help='αβ探索AIがルート並列で使うプロセスの数（デフォルト: 1、並列にしない）')
 
     args = parser.parse_args()
+    try:
+        bitboard.check_size(args.size)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.workers < 1:
+        parser.error("--workers は1以上を指定してください")
+    if args.search_workers < 1:
+        parser.error("--search-workers は1以上を指定してください")
+    if args.profile and args.workers > 1:
+        parser.error("--profile と --workers は同時に使えません")
 
     # JSONLファイルからユーザーAIを読み込む
     print(f"Loading user AIs from: {args.input_file}")
@@ -501,11 +707,18 @@ def main():
         GreedyAI(),      # 貪欲AI 🤑
         CornerAI(),      # 角優先AI 📐
         LookaheadAI(),   # 先読みAI 🔮
+        scoring_alphabeta(workers=args.search_workers),  # αβ探索AI 🧠（深さ SCORING_DEPTH まで）
     ]
 
     # トーナメント実行
     print(f"\n=== Starting Tournament (Board Size: {args.size}x{args.size}) ===")
-    results = calculate_scores(user_ais, reference_ais, board_size=args.size)
+    try:
+        results = calculate_scores(user_ais, reference_ais, board_size=args.size,
+                                   instrument=args.profile, workers=args.workers)
+    finally:
+        for ref_ai in reference_ais:
+            if isinstance(ref_ai, AlphaBetaAI):
+                ref_ai.close()  # ルート並列のプロセスを止める
 
     # 結果を保存
     save_results(results, args.output)
@@ -518,10 +731,17 @@ def main():
         user_id = data.get('userId', 'unknown')
         print(f"{rank}. {generation_id} (user: {user_id}): {score} points")
 
+    # 基準AIが定石（engine.book）を使っていれば、どれだけ引けたかを表示
+    opening_book = book.default(args.size)
+    if opening_book is not None:
+        stats = opening_book.stats()
+        print(f"\n定石: {stats['hits']}/{stats['probes']} 局面を定石から引きました "
+              f"(hit 率 {stats['hit_rate']:.1%})")
+
 
 def battle_with_myai(myai_func, board_size=6):
     """
-    Google Colab用：myai関数とaiフォルダ内のAIを対戦させ、7行で結果を出力
+    Google Colab用：myai関数とaiフォルダ内のAIを対戦させ、9行で結果を出力
 
     使い方 (Google Colabで):
         !git clone https://github.com/YuuhaNi/othello2025.git hachi
@@ -531,7 +751,7 @@ def battle_with_myai(myai_func, board_size=6):
 
     Args:
         myai_func: myai関数 (board, stone) -> (x, y)
-        board_size: 盤面サイズ (6 or 8)
+        board_size: 盤面サイズ（4以上の偶数、6 や 8 など）
     """
     # myai関数をPandaAIラッパーにする
     class MyAIWrapper:
@@ -554,6 +774,7 @@ def battle_with_myai(myai_func, board_size=6):
         GreedyAI(),      # 貪欲AI 🤑
         CornerAI(),      # 角優先AI 📐
         LookaheadAI(),   # 先読みAI 🔮
+        scoring_alphabeta(),  # αβ探索AI 🧠（深さ SCORING_DEPTH まで）
     ]
 
     # 対戦結果を記録
@@ -586,7 +807,7 @@ def battle_with_myai(myai_func, board_size=6):
         if result2 != -1:
             total_stones += white_count
 
-    # 7行で結果を出力
+    # 9行で結果を出力
     print("=" * 40)
     for i, r in enumerate(results, 1):
         result_str = "勝" if (r['turn'] == '先攻' and r['result'] == 1) or (r['turn'] == '後攻' and r['result'] == 2) else \